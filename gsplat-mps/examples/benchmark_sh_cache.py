@@ -0,0 +1,52 @@
+"""Times SHColorCache against spherical_harmonics on slow orbits."""
+
+import math
+import time
+from typing import Tuple
+
+import torch
+import tyro
+from gsplat import SHColorCache, spherical_harmonics
+
+
+def _orbit(step: float, num_frames: int):
+    for i in range(num_frames):
+        angle = step * i
+        yield torch.tensor([4.0 * math.sin(angle), 0.5, -4.0 * math.cos(angle)])
+
+
+def main(
+    num_points: int = 500000,
+    degree: int = 3,
+    tolerance: float = 0.01,
+    num_frames: int = 40,
+    warmup: int = 5,
+    steps: Tuple[float, ...] = (0.0002, 0.0005, 0.002, 0.01),
+) -> None:
+    torch.manual_seed(0)
+    means3d = torch.rand(num_points, 3) * 2 - 1
+    coeffs = torch.randn(num_points, (degree + 1) ** 2, 3)
+
+    for step in steps:
+        cache = SHColorCache(tolerance)
+        direct = cached = 0.0
+        for i, position in enumerate(_orbit(step, num_frames)):
+            viewdirs = means3d - position
+            start = time.perf_counter()
+            spherical_harmonics(degree, viewdirs, coeffs)
+            middle = time.perf_counter()
+            cache(degree, viewdirs, coeffs, position)
+            end = time.perf_counter()
+            if i >= warmup:
+                direct += middle - start
+                cached += end - middle
+        num_timed = num_frames - warmup
+        print(
+            f"orbit step {step} rad: direct {direct / num_timed * 1e3:.1f} ms, "
+            f"cached {cached / num_timed * 1e3:.1f} ms, "
+            f"{cache.num_skipped} of {num_frames} frames reused"
+        )
+
+
+if __name__ == "__main__":
+    tyro.cli(main)
@@ -0,0 +1,390 @@
+"""Websocket server streaming renders of a gaussian scene to the 4K4D web player.
+
+The player (client/components/4K4DPlayer.tsx) sends its camera as zlib
+compressed ASCII JSON: the calibrated camera (H, W, K, R, T, n, f, t, origin,
+world_up, ...) and the mouse deltas dx, dy and dz accumulated since the last
+message. The server keeps the pose of each client, orbits it by the deltas,
+renders it and sends back a JPEG.
+
+The player waits for each frame before sending its next camera. With
+``--max-in-flight`` above 1, the server also accepts cameras sent without
+waiting: it renders the newest pose as soon as fewer frames than that are in
+flight, dropping the poses replaced in the meantime, so that rendering, encoding
+and the network overlap. Every JPEG carries its sequence number in a comment
+segment (``seq=<n>``) for such players to discard late frames, and they may
+acknowledge the last frame drawn with an ``ack`` field holding its number.
+Without ``ack``, each message acknowledges the oldest frame sent.
+"""
+
+import asyncio
+import dataclasses
+import io
+import json
+import math
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import torch
+import tyro
+import websockets
+from gsplat import (
+    GaussianSequence,
+    TileSortCache,
+    load_scene,
+    project_gaussians,
+    rasterize_gaussians,
+    spherical_harmonics,
+)
+from gsplat.sh import deg_from_sh
+from PIL import Image
+from torch import Tensor
+
+BLOCK_X, BLOCK_Y = 16, 16
+
+
+def _rotation(axis: Tensor, angle: float) -> Tensor:
+    # Rodrigues' formula, rotating by angle around a unit axis
+    x, y, z = axis.tolist()
+    cross = torch.tensor([[0.0, -z, y], [z, 0.0, -x], [-y, x, 0.0]])
+    return (
+        torch.eye(3) + math.sin(angle) * cross + (1 - math.cos(angle)) * (cross @ cross)
+    )
+
+
+@dataclass
+class Camera:
+    """Pinhole camera of the player, R and T map world to OpenCV camera coordinates."""
+
+    H: int
+    W: int
+    K: Tensor
+    R: Tensor
+    T: Tensor
+    n: float
+    t: float
+    origin: Tensor
+    world_up: Tensor
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "Camera":
+        return cls(
+            H=int(state["H"]),
+            W=int(state["W"]),
+            K=torch.tensor(state["K"], dtype=torch.float32),
+            R=torch.tensor(state["R"], dtype=torch.float32),
+            T=torch.tensor(state["T"], dtype=torch.float32).reshape(3),
+            n=float(state.get("n", 0.01)),
+            t=float(state.get("t", 0.0)),
+            origin=torch.tensor(state.get("origin", [0, 0, 0]), dtype=torch.float32),
+            world_up=torch.tensor(
+                state.get("world_up", [0, -1, 0]), dtype=torch.float32
+            ),
+        )
+
+    def orbit(self, dx: float, dy: float, dz: float, speed: float, zoom_speed: float):
+        """Turns around the origin by mouse deltas, and moves closer or further away."""
+        center = -self.R.T @ self.T
+        up = torch.nn.functional.normalize(self.world_up, dim=0)
+        # yaw around the world up, then pitch around the right axis of the camera
+        rotation = _rotation(up, -dx * speed)
+        rotation = _rotation(rotation @ self.R[0], dy * speed) @ rotation
+        offset = (rotation @ (center - self.origin)) * math.exp(dz * zoom_speed)
+        self.R = self.R @ rotation.T
+        self.T = -self.R @ (self.origin + offset)
+
+    @property
+    def viewmat(self) -> Tensor:
+        viewmat = torch.eye(4)
+        viewmat[:3, :3] = self.R
+        viewmat[:3, 3] = self.T
+        return viewmat
+
+    @property
+    def projmat(self) -> Tensor:
+        fx, fy = self.K[0, 0].item(), self.K[1, 1].item()
+        ndc = torch.tensor(
+            [
+                [2 * fx / self.W, 0.0, 0.0, 0.0],
+                [0.0, 2 * fy / self.H, 0.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+            ]
+        )
+        return ndc @ self.viewmat
+
+
+class ClientCamera:
+    """Pose of one client, following the calibrated camera it sends and its deltas."""
+
+    def __init__(self, speed: float = 0.005, zoom_speed: float = 0.001):
+        self.speed = speed
+        self.zoom_speed = zoom_speed
+        self.camera = None
+        self._calibration = None
+
+    def update(self, state: Dict) -> Camera:
+        # the player sends its calibrated pose with every message, and only
+        # changes it to reset the view
+        calibration = (state["K"], state["R"], state["T"], state["H"], state["W"])
+        if calibration != self._calibration:
+            self._calibration = calibration
+            self.camera = Camera.from_state(state)
+        self.camera.t = float(state.get("t", 0.0))
+        self.camera.orbit(
+            float(state.get("dx", 0.0)),
+            float(state.get("dy", 0.0)),
+            float(state.get("dz", 0.0)),
+            self.speed,
+            self.zoom_speed,
+        )
+        # a copy, the pose moves on with the next messages while it renders
+        return dataclasses.replace(self.camera)
+
+
+class Renderer:
+    """Renders a static scene or a sequence written by gsplat.save_scene or save_sequence."""
+
+    def __init__(self, path: Path, device: torch.device, glob_scale: float = 1.0):
+        self.device = device
+        self.glob_scale = glob_scale
+        self.background = torch.zeros(3, device=device)
+        tensors = load_scene(str(path))
+        if "num_frames" in tensors:
+            self.sequence = GaussianSequence(str(path), device=device)
+            self.scene = None
+        else:
+            self.sequence = None
+            self.scene = {name: tensor.to(device) for name, tensor in tensors.items()}
+
+    def frame(self, t: float) -> Dict[str, Tensor]:
+        if self.sequence is None:
+            return self.scene
+        # t runs over the whole sequence from 0 to 1
+        index = round(min(max(t, 0.0), 1.0) * (len(self.sequence) - 1))
+        return self.sequence.frame(index)
+
+    @torch.no_grad()
+    def render(self, camera: Camera, sort_cache: Optional[TileSortCache] = None):
+        scene = self.frame(camera.t)
+        H, W = camera.H, camera.W
+        tile_bounds = (W + BLOCK_X - 1) // BLOCK_X, (H + BLOCK_Y - 1) // BLOCK_Y, 1
+        viewmat = camera.viewmat.to(self.device)
+        K = camera.K.tolist()
+        xys, depths, radii, conics, num_tiles_hit, _ = project_gaussians(
+            scene["means3d"],
+            scene["scales"],
+            self.glob_scale,
+            scene["quats"],
+            viewmat,
+            camera.projmat.to(self.device),
+            K[0][0],
+            K[1][1],
+            K[0][2],
+            K[1][2],
+            H,
+            W,
+            tile_bounds,
+            clip_thresh=camera.n,
+        )
+        colors = scene["colors"]
+        if colors.dim() == 3:
+            # sh coefficients, evaluated towards the camera
+            center = -viewmat[:3, :3].T @ viewmat[:3, 3]
+            colors = spherical_harmonics(
+                deg_from_sh(colors.shape[-2]), scene["means3d"] - center, colors
+            )
+            colors = torch.clamp(colors + 0.5, min=0.0)
+        image = rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            colors,
+            scene["opacities"],
+            H,
+            W,
+            self.background,
+            sort_cache=sort_cache,
+        )
+        return (image.clamp(0, 1) * 255).to(torch.uint8).cpu().numpy()
+
+
+def decode_message(message: bytes) -> Dict:
+    return json.loads(zlib.decompress(message).decode("ascii"))
+
+
+def encode_jpeg(image: np.ndarray, quality: int, seq: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format="JPEG", quality=quality)
+    jpeg = buffer.getvalue()
+    # a comment segment right after the start of image marker
+    comment = f"seq={seq}".encode("ascii")
+    return (
+        jpeg[:2]
+        + b"\xff\xfe"
+        + struct.pack(">H", len(comment) + 2)
+        + comment
+        + jpeg[2:]
+    )
+
+
+class ClientSession:
+    """Frames of one player, rendering its newest pose while fewer than max_in_flight are in flight."""
+
+    def __init__(self, server: "FrameServer", websocket):
+        self.server = server
+        self.websocket = websocket
+        self.client = ClientCamera()
+        # each client orbits smoothly, so its sorted intersections are repaired,
+        # which is why the renders are not compacted: compaction renumbers the
+        # gaussians whenever their visibility changes and defeats the cache
+        self.sort_cache = TileSortCache()
+        self.pending = None  # newest pose not rendered yet
+        self.seq = 0
+        self.last_sent = 0
+        self.rendering = 0
+        self.unacked = deque()  # sequence numbers of the frames sent
+        self.num_dropped = 0  # poses replaced before rendering, and late frames
+        self.changed = asyncio.Event()
+        self.closed = False
+        self.error = None
+
+    @property
+    def in_flight(self) -> int:
+        return self.rendering + len(self.unacked)
+
+    async def run(self):
+        receiver = asyncio.create_task(self.receive())
+        deliveries = set()
+        try:
+            while True:
+                await self.changed.wait()
+                self.changed.clear()
+                if self.error is not None:
+                    raise self.error
+                if self.closed:
+                    break
+                while (
+                    self.pending is not None
+                    and self.in_flight < self.server.max_in_flight
+                ):
+                    camera, self.pending = self.pending, None
+                    self.seq += 1
+                    self.rendering += 1
+                    task = asyncio.create_task(self.deliver(self.seq, camera))
+                    deliveries.add(task)
+                    task.add_done_callback(deliveries.discard)
+        finally:
+            receiver.cancel()
+            for task in deliveries:
+                task.cancel()
+            await asyncio.gather(receiver, *deliveries, return_exceptions=True)
+
+    async def receive(self):
+        try:
+            async for message in self.websocket:
+                state = decode_message(message)
+                if self.pending is not None:
+                    self.num_dropped += 1
+                self.pending = self.client.update(state)
+                if "ack" in state:
+                    while self.unacked and self.unacked[0] <= int(state["ack"]):
+                        self.unacked.popleft()
+                elif self.unacked:
+                    self.unacked.popleft()
+                self.changed.set()
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as error:
+            # e.g. a malformed message, raised by run rather than lost
+            self.error = error
+        finally:
+            self.closed = True
+            self.changed.set()
+
+    async def deliver(self, seq: int, camera: Camera):
+        loop = asyncio.get_running_loop()
+        server = self.server
+        try:
+            image = await loop.run_in_executor(
+                server.render_executor, server.renderer.render, camera, self.sort_cache
+            )
+            jpeg = await loop.run_in_executor(
+                server.encode_executor, encode_jpeg, image, server.quality, seq
+            )
+            # a newer frame may have been sent while this one was encoding
+            if seq < self.last_sent:
+                self.num_dropped += 1
+                return
+            self.last_sent = seq
+            self.unacked.append(seq)
+            await self.websocket.send(jpeg)
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as error:
+            self.error = error
+        finally:
+            self.rendering -= 1
+            self.changed.set()
+
+
+class FrameServer:
+    """Serves renders to every connected player.
+
+    Rendering runs on a single worker thread, as the backends expect one caller
+    at a time, and JPEG encoding on a pool of threads, so that neither blocks
+    the event loop handling the websockets.
+    """
+
+    def __init__(
+        self,
+        renderer: Renderer,
+        quality: int = 85,
+        encode_workers: int = 2,
+        max_in_flight: int = 1,
+    ):
+        self.renderer = renderer
+        self.quality = quality
+        self.max_in_flight = max_in_flight
+        self.render_executor = ThreadPoolExecutor(1, thread_name_prefix="render")
+        self.encode_executor = ThreadPoolExecutor(
+            encode_workers, thread_name_prefix="encode"
+        )
+
+    async def serve_client(self, websocket):
+        await ClientSession(self, websocket).run()
+
+    async def serve(self, host: str, port: int):
+        async with websockets.serve(self.serve_client, host, port, max_size=None):
+            await asyncio.Future()
+
+
+def main(
+    scene: Path,
+    host: str = "0.0.0.0",
+    port: int = 1024,
+    quality: int = 85,
+    glob_scale: float = 1.0,
+    max_in_flight: int = 1,
+) -> None:
+    if torch.backends.mps.is_available():
+        device = torch.device("mps")
+    elif torch.cuda.is_available():
+        device = torch.device("cuda:0")
+    else:
+        device = torch.device("cpu")
+    renderer = Renderer(scene, device, glob_scale)
+    server = FrameServer(renderer, quality, max_in_flight=max_in_flight)
+    print(f"Serving {scene} on ws://{host}:{port}")
+    asyncio.run(server.serve(host, port))
+
+
+if __name__ == "__main__":
+    tyro.cli(main)
@@ -9,6 +9,7 @@ import torch
 import tyro
 from gsplat.project_gaussians import _ProjectGaussians
 from gsplat.rasterize import _RasterizeGaussians
+from gsplat.spatial import morton_order, reorder_gaussians
 from PIL import Image
 from torch import Tensor, optim
 
@@ -21,7 +22,12 @@ class SimpleTrainer:
         gt_image: Tensor,
         num_points: int = 2000,
     ):
-        self.device = torch.device("mps")
+        if torch.backends.mps.is_available():
+            self.device = torch.device("mps")
+        elif torch.cuda.is_available():
+            self.device = torch.device("cuda:0")
+        else:
+            self.device = torch.device("cpu")
         self.gt_image = gt_image.to(device=self.device)
         self.num_points = num_points
 
@@ -73,6 +79,16 @@ class SimpleTrainer:
         )
         self.background = torch.zeros(3, device=self.device)
 
+        # neighbouring gaussians next to each other in memory
+        reorder_gaussians(
+            morton_order(self.means),
+            self.means,
+            self.scales,
+            self.rgbs,
+            self.quats,
+            self.opacities,
+        )
+
         self.means.requires_grad = True
         self.scales.requires_grad = True
         self.quats.requires_grad = True
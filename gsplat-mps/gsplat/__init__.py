@@ -1,15 +1,25 @@
 from typing import Any
 import torch
-from .project_gaussians import project_gaussians
-from .rasterize import rasterize_gaussians
+from .project_gaussians import project_gaussians, project_gaussians_batched
+from .rasterize import rasterize_gaussians, rasterize_gaussians_batched
 from .utils import (
     map_gaussian_to_intersects,
     bin_and_sort_gaussians,
+    bin_and_sort_gaussians_batched,
+    compact_gaussians,
     compute_cumulative_intersects,
     compute_cov2d_bounds,
+    get_compact_key_error,
     get_tile_bin_edges,
+    TileSortCache,
 )
-from .sh import spherical_harmonics
+from .sh import SHColorCache, spherical_harmonics
+from .spatial import SpatialIndex, morton_order, reorder_gaussians
+from .lod import LODHierarchy
+from .compression import CompactGaussians
+from .loader import FrameLoader
+from .store import GaussianSequence, load_scene, save_scene, save_sequence
+from .backends import get_backend, register_backend, set_backend, warmup
 from .version import __version__
 import warnings
 
@@ -17,14 +27,36 @@ import warnings
 __all__ = [
     "__version__",
     "project_gaussians",
+    "project_gaussians_batched",
     "rasterize_gaussians",
+    "rasterize_gaussians_batched",
     "spherical_harmonics",
+    "SHColorCache",
+    "SpatialIndex",
+    "morton_order",
+    "reorder_gaussians",
+    "LODHierarchy",
+    "CompactGaussians",
+    "load_scene",
+    "save_scene",
+    "save_sequence",
+    "GaussianSequence",
+    "FrameLoader",
+    # backends
+    "get_backend",
+    "register_backend",
+    "set_backend",
+    "warmup",
     # utils
     "bin_and_sort_gaussians",
+    "bin_and_sort_gaussians_batched",
+    "compact_gaussians",
     "compute_cumulative_intersects",
     "compute_cov2d_bounds",
+    "get_compact_key_error",
     "get_tile_bin_edges",
     "map_gaussian_to_intersects",
+    "TileSortCache",
     # Function.apply() will be deprecated
     "ProjectGaussians",
     "RasterizeGaussians",
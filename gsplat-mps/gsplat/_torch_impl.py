@@ -1,7 +1,9 @@
 """Pure PyTorch implementations of various functions"""
+import math
+
 import torch
 import torch.nn.functional as F
-import struct
+from typing import Tuple
 from jaxtyping import Float
 from torch import Tensor
 
@@ -68,46 +70,65 @@ def eval_sh_bases(basis_dim: int, dirs: torch.Tensor):
 
     :return: torch.Tensor (..., basis_dim)
     """
-    result = torch.empty(
-        (*dirs.shape[:-1], basis_dim), dtype=dirs.dtype, device=dirs.device
-    )
-    result[..., 0] = SH_C0
-    if basis_dim > 1:
-        x, y, z = dirs.unbind(-1)
-        result[..., 1] = -SH_C1 * y
-        result[..., 2] = SH_C1 * z
-        result[..., 3] = -SH_C1 * x
-        if basis_dim > 4:
-            xx, yy, zz = x * x, y * y, z * z
-            xy, yz, xz = x * y, y * z, x * z
-            result[..., 4] = SH_C2[0] * xy
-            result[..., 5] = SH_C2[1] * yz
-            result[..., 6] = SH_C2[2] * (2.0 * zz - xx - yy)
-            result[..., 7] = SH_C2[3] * xz
-            result[..., 8] = SH_C2[4] * (xx - yy)
-
-            if basis_dim > 9:
-                result[..., 9] = SH_C3[0] * y * (3 * xx - yy)
-                result[..., 10] = SH_C3[1] * xy * z
-                result[..., 11] = SH_C3[2] * y * (4 * zz - xx - yy)
-                result[..., 12] = SH_C3[3] * z * (2 * zz - 3 * xx - 3 * yy)
-                result[..., 13] = SH_C3[4] * x * (4 * zz - xx - yy)
-                result[..., 14] = SH_C3[5] * z * (xx - yy)
-                result[..., 15] = SH_C3[6] * x * (xx - 3 * yy)
-
-                if basis_dim > 16:
-                    result[..., 16] = SH_C4[0] * xy * (xx - yy)
-                    result[..., 17] = SH_C4[1] * yz * (3 * xx - yy)
-                    result[..., 18] = SH_C4[2] * xy * (7 * zz - 1)
-                    result[..., 19] = SH_C4[3] * yz * (7 * zz - 3)
-                    result[..., 20] = SH_C4[4] * (zz * (35 * zz - 30) + 3)
-                    result[..., 21] = SH_C4[5] * xz * (7 * zz - 3)
-                    result[..., 22] = SH_C4[6] * (xx - yy) * (7 * zz - 1)
-                    result[..., 23] = SH_C4[7] * xz * (xx - 3 * yy)
-                    result[..., 24] = SH_C4[8] * (
-                        xx * (xx - 3 * yy) - yy * (3 * xx - yy)
-                    )
-    return result
+    degree = round(math.sqrt(basis_dim)) - 1
+    return eval_sh_bases_rows(degree, dirs).movedim(0, -1)
+
+
+def eval_sh_bases_rows(degree: int, dirs: torch.Tensor):
+    """
+    Evaluate the spherical harmonics bases of a degree at unit directions,
+    one contiguous row per basis.
+
+    The bases of each degree are written in place from shared products of the
+    coordinates, and use x^2 + y^2 + z^2 = 1 to drop terms.
+
+    :param degree: int SH degree, 0 to 4
+    :param dirs: torch.Tensor (..., 3) unit directions
+
+    :return: torch.Tensor ((degree + 1) ** 2, ...)
+    """
+    batch_shape = dirs.shape[:-1]
+    x, y, z = dirs.reshape(-1, 3).T.contiguous()
+    result = dirs.new_empty(((degree + 1) ** 2, x.shape[0]))
+    result[0] = SH_C0
+    if degree < 1:
+        return result.reshape((-1,) + batch_shape)
+    torch.mul(y, -SH_C1, out=result[1])
+    torch.mul(z, SH_C1, out=result[2])
+    torch.mul(x, -SH_C1, out=result[3])
+    if degree < 2:
+        return result.reshape((-1,) + batch_shape)
+    xx, yy, zz = x * x, y * y, z * z
+    xy, yz, xz = x * y, y * z, x * z
+    xx_yy = xx - yy
+    torch.mul(xy, SH_C2[0], out=result[4])
+    torch.mul(yz, SH_C2[1], out=result[5])
+    torch.mul(zz * 3 - 1, SH_C2[2], out=result[6])
+    torch.mul(xz, SH_C2[3], out=result[7])
+    torch.mul(xx_yy, SH_C2[4], out=result[8])
+    if degree < 3:
+        return result.reshape((-1,) + batch_shape)
+    zz5_1 = zz * 5 - 1
+    torch.mul(y * (xx * 3 - yy), SH_C3[0], out=result[9])
+    torch.mul(xy * z, SH_C3[1], out=result[10])
+    torch.mul(y * zz5_1, SH_C3[2], out=result[11])
+    torch.mul(z * (zz * 5 - 3), SH_C3[3], out=result[12])
+    torch.mul(x * zz5_1, SH_C3[4], out=result[13])
+    torch.mul(z * xx_yy, SH_C3[5], out=result[14])
+    torch.mul(x * (xx - yy * 3), SH_C3[6], out=result[15])
+    if degree < 4:
+        return result.reshape((-1,) + batch_shape)
+    zz7_1, zz7_3 = zz * 7 - 1, zz * 7 - 3
+    torch.mul(xy * xx_yy, SH_C4[0], out=result[16])
+    torch.mul(yz * (xx * 3 - yy), SH_C4[1], out=result[17])
+    torch.mul(xy * zz7_1, SH_C4[2], out=result[18])
+    torch.mul(yz * zz7_3, SH_C4[3], out=result[19])
+    torch.mul(zz * (zz * 35 - 30) + 3, SH_C4[4], out=result[20])
+    torch.mul(xz * zz7_3, SH_C4[5], out=result[21])
+    torch.mul(xx_yy * zz7_1, SH_C4[6], out=result[22])
+    torch.mul(xz * (xx - yy * 3), SH_C4[7], out=result[23])
+    torch.mul(xx * (xx - yy * 3) - yy * (xx * 3 - yy), SH_C4[8], out=result[24])
+    return result.reshape((-1,) + batch_shape)
 
 
 def quat_to_rotmat(quat: Tensor) -> Tensor:
@@ -144,14 +165,71 @@ def quat_to_rotmat(quat: Tensor) -> Tensor:
     )
 
 
+def rotmat_to_quat(R: Tensor) -> Tensor:
+    # inverse of quat_to_rotmat for proper rotations, with w >= 0
+    assert R.shape[-2:] == (3, 3), R.shape
+    m00, m11, m22 = R[..., 0, 0], R[..., 1, 1], R[..., 2, 2]
+    w = 0.5 * torch.sqrt(torch.clamp(1 + m00 + m11 + m22, min=0))
+    x = 0.5 * torch.sqrt(torch.clamp(1 + m00 - m11 - m22, min=0))
+    y = 0.5 * torch.sqrt(torch.clamp(1 - m00 + m11 - m22, min=0))
+    z = 0.5 * torch.sqrt(torch.clamp(1 - m00 - m11 + m22, min=0))
+    x = torch.copysign(x, R[..., 2, 1] - R[..., 1, 2])
+    y = torch.copysign(y, R[..., 0, 2] - R[..., 2, 0])
+    z = torch.copysign(z, R[..., 1, 0] - R[..., 0, 1])
+    return F.normalize(torch.stack([w, x, y, z], dim=-1), dim=-1)
+
+
+# covariances are symmetric, so only their upper triangular entries are stored:
+# (xx, xy, xz, yy, yz, zz) for 3D and (xx, xy, yy) for 2D, as in the kernels
+_TRIU_3X3 = ((0, 0), (0, 1), (0, 2), (1, 1), (1, 2), (2, 2))
+
+
+def sym3_matvec(cov: Tensor, v: Tensor) -> Tensor:
+    """Product of packed symmetric (..., 6) matrices with (..., 3) vectors."""
+    a, b, c, d, e, f = cov.unbind(-1)
+    x, y, z = v.unbind(-1)
+    return torch.stack(
+        [a * x + b * y + c * z, b * x + d * y + e * z, c * x + e * y + f * z], dim=-1
+    )
+
+
 def scale_rot_to_cov3d(scale: Tensor, glob_scale: float, quat: Tensor) -> Tensor:
     assert scale.shape[-1] == 3, scale.shape
     assert quat.shape[-1] == 4, quat.shape
     assert scale.shape[:-1] == quat.shape[:-1], (scale.shape, quat.shape)
     R = quat_to_rotmat(quat)  # (..., 3, 3)
     M = R * glob_scale * scale[..., None, :]  # (..., 3, 3)
-    # TODO: save upper right because symmetric
-    return M @ M.transpose(-1, -2)  # (..., 3, 3)
+    # upper triangle of M @ M.T, one row dot product per entry
+    return torch.stack(
+        [(M[..., i, :] * M[..., j, :]).sum(-1) for i, j in _TRIU_3X3], dim=-1
+    )  # (..., 6)
+
+
+def _ewa_jacobian_rows(
+    mean3d: Tensor,
+    viewmat: Tensor,
+    fx: float,
+    fy: float,
+    tan_fovx: float,
+    tan_fovy: float,
+):
+    # rows of T = J @ W, the jacobian of the projection (clamped to a slightly
+    # widened field of view) composed with the rotation of the view
+    W = viewmat[..., :3, :3]  # (..., 3, 3)
+    t = torch.einsum("...ij,...j->...i", W, mean3d) + viewmat[..., :3, 3]
+    tx, ty, tz = t.unbind(-1)
+    lim_x, lim_y = 1.3 * tan_fovx, 1.3 * tan_fovy
+    clip_x = (tx / tz).abs() > lim_x
+    clip_y = (ty / tz).abs() > lim_y
+    txtz = torch.clamp(tx / tz, -lim_x, lim_x)
+    tytz = torch.clamp(ty / tz, -lim_y, lim_y)
+    tx, ty = tz * txtz, tz * tytz
+
+    rz = 1.0 / tz
+    rz2 = rz**2
+    T0 = (fx * rz)[..., None] * W[..., 0, :] - (fx * tx * rz2)[..., None] * W[..., 2, :]
+    T1 = (fy * rz)[..., None] * W[..., 1, :] - (fy * ty * rz2)[..., None] * W[..., 2, :]
+    return T0, T1, (tx, ty, rz, txtz, tytz, clip_x, clip_y)
 
 
 def project_cov3d_ewa(
@@ -164,73 +242,56 @@ def project_cov3d_ewa(
     tan_fovy: float,
 ) -> Tensor:
     assert mean3d.shape[-1] == 3, mean3d.shape
-    assert cov3d.shape[-2:] == (3, 3), cov3d.shape
+    assert cov3d.shape[-1] == 6, cov3d.shape
     assert viewmat.shape[-2:] == (4, 4), viewmat.shape
-    W = viewmat[..., :3, :3]  # (..., 3, 3)
-    p = viewmat[..., :3, 3]  # (..., 3)
-    t = torch.matmul(W, mean3d[..., None])[..., 0] + p  # (..., 3)
-
-    lim_x = 1.3 * torch.tensor([tan_fovx], device=mean3d.device)
-    lim_y = 1.3 * torch.tensor([tan_fovy], device=mean3d.device)
-
-    min_lim_x = t[..., 2] * torch.min(lim_x, torch.max(-lim_x, t[..., 0] / t[..., 2]))
-    min_lim_y = t[..., 2] * torch.min(lim_y, torch.max(-lim_y, t[..., 1] / t[..., 2]))
-    t = torch.cat([min_lim_x[..., None], min_lim_y[..., None], t[..., 2, None]], dim=-1)
-
-    rz = 1.0 / t[..., 2]  # (...,)
-    rz2 = rz**2  # (...,)
-    J = torch.stack(
+    T0, T1, _ = _ewa_jacobian_rows(mean3d, viewmat, fx, fy, tan_fovx, tan_fovy)
+    # upper triangle of T @ cov3d @ T.T, plus a little blur along the axes
+    cov_T0 = sym3_matvec(cov3d, T0)
+    cov_T1 = sym3_matvec(cov3d, T1)
+    return torch.stack(
         [
-            torch.stack([fx * rz, torch.zeros_like(rz), -fx * t[..., 0] * rz2], dim=-1),
-            torch.stack([torch.zeros_like(rz), fy * rz, -fy * t[..., 1] * rz2], dim=-1),
+            (T0 * cov_T0).sum(-1) + 0.3,
+            (T0 * cov_T1).sum(-1),
+            (T1 * cov_T1).sum(-1) + 0.3,
         ],
-        dim=-2,
-    )  # (..., 2, 3)
-    T = J @ W  # (..., 2, 3)
-    cov2d = T @ cov3d @ T.transpose(-1, -2)  # (..., 2, 2)
-    # add a little blur along axes and (TODO save upper triangular elements)
-    cov2d[..., 0, 0] = cov2d[..., 0, 0] + 0.3
-    cov2d[..., 1, 1] = cov2d[..., 1, 1] + 0.3
-    return cov2d
+        dim=-1,
+    )  # (..., 3)
 
 
 def compute_cov2d_bounds(cov2d: Tensor, eps=1e-6):
-    det = cov2d[..., 0, 0] * cov2d[..., 1, 1] - cov2d[..., 0, 1] ** 2
+    a, b, c = cov2d.unbind(-1)
+    det = a * c - b**2
     det = torch.clamp(det, min=eps)
-    conic = torch.stack(
-        [
-            cov2d[..., 1, 1] / det,
-            -cov2d[..., 0, 1] / det,
-            cov2d[..., 0, 0] / det,
-        ],
-        dim=-1,
-    )  # (..., 3)
-    b = (cov2d[..., 0, 0] + cov2d[..., 1, 1]) / 2  # (...,)
+    conic = torch.stack([c / det, -b / det, a / det], dim=-1)  # (..., 3)
+    b = (a + c) / 2  # (...,)
     v1 = b + torch.sqrt(torch.clamp(b**2 - det, min=0.1))  # (...,)
     v2 = b - torch.sqrt(torch.clamp(b**2 - det, min=0.1))  # (...,)
     radius = torch.ceil(3.0 * torch.sqrt(torch.max(v1, v2)))  # (...,)
     return conic, radius, det > eps
 
 
-def ndc2pix(x, W):
-    return 0.5 * ((x + 1.0) * W - 1.0)
+def ndc2pix(x, W, cx=None):
+    if cx is None:
+        cx = 0.5 * W
+    return 0.5 * W * x + cx - 0.5
 
 
-def project_pix(mat, p, img_size, eps=1e-6):
+def project_pix(mat, p, img_size, eps=1e-6, pp=None):
     p_hom = F.pad(p, (0, 1), value=1.0)
     p_hom = torch.einsum("...ij,...j->...i", mat, p_hom)
-    rw = 1.0 / torch.clamp(p_hom[..., 3], min=eps)
+    rw = 1.0 / (p_hom[..., 3] + eps)
     p_proj = p_hom[..., :3] * rw[..., None]
-    u = ndc2pix(p_proj[..., 0], img_size[0])
-    v = ndc2pix(p_proj[..., 1], img_size[1])
+    cx, cy = (None, None) if pp is None else pp
+    u = ndc2pix(p_proj[..., 0], img_size[0], cx)
+    v = ndc2pix(p_proj[..., 1], img_size[1], cy)
     return torch.stack([u, v], dim=-1)
 
 
 def clip_near_plane(p, viewmat, clip_thresh=0.01):
     R = viewmat[..., :3, :3]
     T = viewmat[..., :3, 3]
-    p_view = torch.matmul(R, p[..., None])[..., 0] + T
-    return p_view, p_view[..., 2] < clip_thresh
+    p_view = torch.einsum("...ij,...j->...i", R, p) + T
+    return p_view, p_view[..., 2] <= clip_thresh
 
 
 def get_tile_bbox(pix_center, pix_radius, tile_bounds, BLOCK_X=16, BLOCK_Y=16):
@@ -241,7 +302,7 @@ def get_tile_bbox(pix_center, pix_radius, tile_bounds, BLOCK_X=16, BLOCK_Y=16):
     tile_radius = pix_radius[..., None] / tile_size
 
     top_left = (tile_center - tile_radius).to(torch.int32)
-    bottom_right = (tile_center + tile_radius).to(torch.int32) + 1
+    bottom_right = (tile_center + tile_radius + 1).to(torch.int32)
     tile_min = torch.stack(
         [
             torch.clamp(top_left[..., 0], 0, tile_bounds[0]),
@@ -272,13 +333,14 @@ def project_gaussians_forward(
     tile_bounds,
     clip_thresh=0.01,
 ):
+    # img_size is (height, width)
     tan_fovx = 0.5 * img_size[1] / fx
     tan_fovy = 0.5 * img_size[0] / fy
     p_view, is_close = clip_near_plane(means3d, viewmat, clip_thresh)
     cov3d = scale_rot_to_cov3d(scales, glob_scale, quats)
     cov2d = project_cov3d_ewa(means3d, cov3d, viewmat, fx, fy, tan_fovx, tan_fovy)
     conic, radius, det_valid = compute_cov2d_bounds(cov2d)
-    center = project_pix(projmat, means3d, img_size)
+    center = project_pix(projmat, means3d, (img_size[1], img_size[0]))
     tile_min, tile_max = get_tile_bbox(center, radius, tile_bounds)
     tile_area = (tile_max[..., 0] - tile_min[..., 0]) * (
         tile_max[..., 1] - tile_min[..., 1]
@@ -294,61 +356,243 @@ def project_gaussians_forward(
     return cov3d, xys, depths, radii, conics, num_tiles_hit, mask
 
 
-def map_gaussian_to_intersects(
-    num_points, xys, depths, radii, cum_tiles_hit, tile_bounds
-):
-    num_intersects = cum_tiles_hit[-1]
-    isect_ids = torch.zeros(num_intersects, dtype=torch.int64, device=xys.device)
-    gaussian_ids = torch.zeros(num_intersects, dtype=torch.int32, device=xys.device)
-
-    for idx in range(num_points):
-        if radii[idx] <= 0:
-            break
+def quat_to_rotmat_vjp(quat: Tensor, v_R: Tensor) -> Tensor:
+    norm = torch.linalg.norm(quat, dim=-1, keepdim=True)
+    w, x, y, z = torch.unbind(quat / norm, dim=-1)
+    G = v_R
+    v_quat_n = 2 * torch.stack(
+        [
+            x * (G[..., 2, 1] - G[..., 1, 2])
+            + y * (G[..., 0, 2] - G[..., 2, 0])
+            + z * (G[..., 1, 0] - G[..., 0, 1]),
+            -2 * x * (G[..., 1, 1] + G[..., 2, 2])
+            + y * (G[..., 0, 1] + G[..., 1, 0])
+            + z * (G[..., 0, 2] + G[..., 2, 0])
+            + w * (G[..., 2, 1] - G[..., 1, 2]),
+            x * (G[..., 0, 1] + G[..., 1, 0])
+            - 2 * y * (G[..., 0, 0] + G[..., 2, 2])
+            + z * (G[..., 1, 2] + G[..., 2, 1])
+            + w * (G[..., 0, 2] - G[..., 2, 0]),
+            x * (G[..., 0, 2] + G[..., 2, 0])
+            + y * (G[..., 1, 2] + G[..., 2, 1])
+            - 2 * z * (G[..., 0, 0] + G[..., 1, 1])
+            + w * (G[..., 1, 0] - G[..., 0, 1]),
+        ],
+        dim=-1,
+    )
+    # back through the normalization of the quaternion
+    quat_n = quat / norm
+    return (v_quat_n - quat_n * (quat_n * v_quat_n).sum(-1, keepdim=True)) / norm
+
+
+def scale_rot_to_cov3d_vjp(
+    scale: Tensor, glob_scale: float, quat: Tensor, v_cov3d: Tensor
+) -> Tuple[Tensor, Tensor]:
+    R = quat_to_rotmat(quat)
+    S = glob_scale * scale
+    M = R * S[..., None, :]
+    # cov3d = M @ M.T with packed gradients, the off-diagonal entries of which
+    # already count both halves of the symmetric matrix
+    v_xx, v_xy, v_xz, v_yy, v_yz, v_zz = v_cov3d.unbind(-1)
+    v_sym = torch.stack([2 * v_xx, v_xy, v_xz, 2 * v_yy, v_yz, 2 * v_zz], dim=-1)
+    v_M = torch.stack([sym3_matvec(v_sym, M[..., k]) for k in range(3)], dim=-1)
+    v_scale = glob_scale * (R * v_M).sum(dim=-2)
+    v_quat = quat_to_rotmat_vjp(quat, v_M * S[..., None, :])
+    return v_scale, v_quat
+
+
+def project_cov3d_ewa_vjp(
+    mean3d: Tensor,
+    cov3d: Tensor,
+    viewmat: Tensor,
+    fx: float,
+    fy: float,
+    tan_fovx: float,
+    tan_fovy: float,
+    v_cov2d: Tensor,
+) -> Tuple[Tensor, Tensor]:
+    # cov3d is packed (..., 6) and v_cov2d packed (..., 3)
+    W = viewmat[..., :3, :3]
+    T0, T1, (tx, ty, rz, txtz, tytz, clip_x, clip_y) = _ewa_jacobian_rows(
+        mean3d, viewmat, fx, fy, tan_fovx, tan_fovy
+    )
+    v_00, v_01, v_11 = v_cov2d.unbind(-1)
 
-        tile_min, tile_max = get_tile_bbox(xys[idx], radii[idx], tile_bounds)
+    # cov2d = T @ cov3d @ T.T
+    v_cov3d = torch.stack(
+        [
+            (2 - (i == j))
+            * (v_00 * T0[..., i] * T0[..., j] + v_11 * T1[..., i] * T1[..., j])
+            + v_01 * (T0[..., i] * T1[..., j] + (i != j) * T0[..., j] * T1[..., i])
+            for i, j in _TRIU_3X3
+        ],
+        dim=-1,
+    )
+    cov_T0 = sym3_matvec(cov3d, T0)
+    cov_T1 = sym3_matvec(cov3d, T1)
+    v_T0 = 2 * v_00[..., None] * cov_T0 + v_01[..., None] * cov_T1
+    v_T1 = v_01[..., None] * cov_T0 + 2 * v_11[..., None] * cov_T1
+    # T = J @ W
+    v_J0 = torch.einsum("...ij,...j->...i", W, v_T0)
+    v_J1 = torch.einsum("...ij,...j->...i", W, v_T1)
+
+    rz2 = rz**2
+    rz3 = rz2 * rz
+    v_tx = -fx * rz2 * v_J0[..., 2]
+    v_ty = -fy * rz2 * v_J1[..., 2]
+    v_tz = (
+        -fx * rz2 * v_J0[..., 0]
+        - fy * rz2 * v_J1[..., 1]
+        + 2 * fx * tx * rz3 * v_J0[..., 2]
+        + 2 * fy * ty * rz3 * v_J1[..., 2]
+    )
+    # back through the clamping of t to the (widened) field of view
+    v_tz = v_tz + torch.where(clip_x, txtz * v_tx, 0.0)
+    v_tz = v_tz + torch.where(clip_y, tytz * v_ty, 0.0)
+    v_t = torch.stack(
+        [
+            torch.where(clip_x, 0.0, v_tx),
+            torch.where(clip_y, 0.0, v_ty),
+            v_tz,
+        ],
+        dim=-1,
+    )
+    v_mean3d = torch.einsum("...ji,...j->...i", W, v_t)
+    return v_cov3d, v_mean3d
 
-        cur_idx = 0 if idx == 0 else cum_tiles_hit[idx - 1].item()
 
-        # Get raw byte representation of the float value at the given index
-        raw_bytes = struct.pack("f", depths[idx])
+def cov2d_to_conic_vjp(conic: Tensor, v_conic: Tensor) -> Tensor:
+    # conic = inverse(cov2d), both in upper triangular form, so
+    # v_cov2d = -conic @ v_conic @ conic with v_conic symmetrized
+    p, q, r = conic.unbind(-1)
+    g0, g1, g2 = v_conic.unbind(-1)
+    h = 0.5 * g1
+    return -torch.stack(
+        [
+            p * p * g0 + 2 * p * q * h + q * q * g2,
+            2 * (p * q * g0 + (p * r + q * q) * h + q * r * g2),
+            q * q * g0 + 2 * q * r * h + r * r * g2,
+        ],
+        dim=-1,
+    )
 
-        # Interpret those bytes as an int32_t
-        depth_id_n = struct.unpack("i", raw_bytes)[0]
 
-        for i in range(tile_min[1], tile_max[1]):
-            for j in range(tile_min[0], tile_max[0]):
-                tile_id = i * tile_bounds[0] + j
-                isect_ids[cur_idx] = (tile_id << 32) | depth_id_n
-                gaussian_ids[cur_idx] = idx
-                cur_idx += 1
+def project_pix_vjp(mat, p, img_size, v_xy, eps=1e-6):
+    p_hom = F.pad(p, (0, 1), value=1.0)
+    p_hom = torch.einsum("...ij,...j->...i", mat, p_hom)
+    rw = 1.0 / (p_hom[..., 3] + eps)
+    v_ndc_x = 0.5 * img_size[0] * v_xy[..., 0]
+    v_ndc_y = 0.5 * img_size[1] * v_xy[..., 1]
+    v_proj = torch.stack(
+        [
+            v_ndc_x * rw,
+            v_ndc_y * rw,
+            torch.zeros_like(rw),
+            -(v_ndc_x * p_hom[..., 0] + v_ndc_y * p_hom[..., 1]) * rw * rw,
+        ],
+        dim=-1,
+    )
+    return torch.einsum("...ij,...i->...j", mat[..., :3], v_proj)
 
-    return isect_ids, gaussian_ids
 
+def project_gaussians_backward(
+    means3d,
+    scales,
+    glob_scale,
+    quats,
+    viewmat,
+    projmat,
+    fx,
+    fy,
+    img_size,
+    cov3d,
+    radii,
+    conics,
+    v_xy,
+    v_depth,
+    v_conic,
+):
+    # img_size is (height, width), cov3d is packed (..., 6)
+    tan_fovx = 0.5 * img_size[1] / fx
+    tan_fovy = 0.5 * img_size[0] / fy
+    v_mean3d = project_pix_vjp(projmat, means3d, (img_size[1], img_size[0]), v_xy)
+    v_mean3d = v_mean3d + viewmat[..., 2, :3] * v_depth[..., None]
 
-def get_tile_bin_edges(num_intersects, isect_ids_sorted):
-    tile_bins = torch.zeros(
-        (num_intersects, 2), dtype=torch.int32, device=isect_ids_sorted.device
+    v_cov2d = cov2d_to_conic_vjp(conics, v_conic)
+    v_cov3d, v_mean3d_cov = project_cov3d_ewa_vjp(
+        means3d, cov3d, viewmat, fx, fy, tan_fovx, tan_fovy, v_cov2d
     )
+    v_mean3d = v_mean3d + v_mean3d_cov
+    v_scale, v_quat = scale_rot_to_cov3d_vjp(scales, glob_scale, quats, v_cov3d)
 
-    for idx in range(num_intersects):
+    # only gaussians that were rendered get gradients
+    mask = (radii > 0)[..., None]
+    v_cov2d = torch.where(mask, v_cov2d, 0.0)
+    v_cov3d = torch.where(mask, v_cov3d, 0.0)
+    v_mean3d = torch.where(mask, v_mean3d, 0.0)
+    v_scale = torch.where(mask, v_scale, 0.0)
+    v_quat = torch.where(mask, v_quat, 0.0)
+    return v_cov2d, v_cov3d, v_mean3d, v_scale, v_quat
 
-        cur_tile_idx = isect_ids_sorted[idx] >> 32
 
-        if idx == 0:
-            tile_bins[cur_tile_idx, 0] = 0
-            continue
+def map_gaussian_to_intersects(
+    num_points, xys, depths, radii, cum_tiles_hit, tile_bounds
+):
+    num_intersects = cum_tiles_hit[-1]
+    isect_ids = torch.zeros(num_intersects, dtype=torch.int64, device=xys.device)
+    gaussian_ids = torch.zeros(num_intersects, dtype=torch.int32, device=xys.device)
+
+    xys = xys[:num_points]
+    radii = radii[:num_points]
+    tile_min, tile_max = get_tile_bbox(xys, radii, tile_bounds)
+    tile_min = tile_min.long()
+    tile_dims = (tile_max.long() - tile_min).clamp(min=0)
+
+    # gaussians with a non-positive radius write nothing, like the kernel
+    num_hit = torch.where(
+        radii > 0, tile_dims[..., 0] * tile_dims[..., 1], torch.zeros_like(radii)
+    ).long()
+    src_ids = torch.repeat_interleave(
+        torch.arange(num_points, device=xys.device), num_hit
+    )
+    if src_ids.numel() == 0:
+        return isect_ids, gaussian_ids
+
+    # offset of each intersection within its gaussian's tile bbox (row major)
+    local_starts = torch.cumsum(num_hit, dim=0) - num_hit
+    local = torch.arange(src_ids.numel(), device=xys.device) - local_starts[src_ids]
+    width = tile_dims[src_ids, 0]
+    tile_y = tile_min[src_ids, 1] + local // width
+    tile_x = tile_min[src_ids, 0] + local % width
+    tile_ids = tile_y * tile_bounds[0] + tile_x
+
+    # reinterpret the float32 depth bits as a (sign-extended) int32
+    depth_ids = depths[:num_points].float().contiguous().view(torch.int32).long()
+
+    # write each gaussian's run starting at cum_tiles_hit[idx - 1]
+    starts = F.pad(cum_tiles_hit[: num_points - 1].long(), (1, 0))
+    dst = starts[src_ids] + local
+    isect_ids[dst] = (tile_ids << 32) | depth_ids[src_ids]
+    gaussian_ids[dst] = src_ids.to(torch.int32)
+
+    return isect_ids, gaussian_ids
 
-        if idx == num_intersects - 1:
-            tile_bins[cur_tile_idx, 1] = num_intersects
-            break
 
-        prev_tile_idx = isect_ids_sorted[idx - 1] >> 32
+def get_tile_bin_edges(num_intersects, isect_ids_sorted, num_tiles=None):
+    tile_ids = (isect_ids_sorted[:num_intersects] >> 32).long()
+    if num_tiles is None:
+        num_tiles = int(tile_ids[-1].item()) + 1 if num_intersects > 0 else 0
+    return get_tile_bins(tile_ids, num_tiles)
 
-        if cur_tile_idx != prev_tile_idx:
-            tile_bins[prev_tile_idx, 1] = idx
-            tile_bins[cur_tile_idx, 0] = idx
 
-    return tile_bins
+def get_tile_bins(tile_ids_sorted, num_tiles):
+    # ids are sorted by tile, so each tile owns one contiguous run
+    counts = torch.bincount(tile_ids_sorted, minlength=num_tiles)[:num_tiles]
+    ends = torch.cumsum(counts, dim=0)
+    tile_bins = torch.stack([ends - counts, ends], dim=-1)
+    # empty tiles keep the (0, 0) range the kernel leaves untouched
+    tile_bins = torch.where(counts[:, None] > 0, tile_bins, 0)
+    return tile_bins.to(torch.int32)
 
 
 def rasterize_forward(
@@ -364,58 +608,288 @@ def rasterize_forward(
     background,
 ):
     channels = colors.shape[1]
+    img_width, img_height = img_size[0], img_size[1]
     out_img = torch.zeros(
-        (img_size[1], img_size[0], channels), dtype=torch.float32, device=xys.device
-    )
-    final_Ts = torch.zeros(
-        (img_size[1], img_size[0]), dtype=torch.float32, device=xys.device
+        (img_height, img_width, channels), dtype=xys.dtype, device=xys.device
     )
+    final_Ts = torch.zeros((img_height, img_width), dtype=xys.dtype, device=xys.device)
     final_idx = torch.zeros(
-        (img_size[1], img_size[0]), dtype=torch.int32, device=xys.device
+        (img_height, img_width), dtype=torch.int32, device=xys.device
     )
-    for i in range(img_size[1]):
-        for j in range(img_size[0]):
-            tile_id = (i // block[0]) * tile_bounds[0] + (j // block[1])
-            tile_bin_start = tile_bins[tile_id, 0]
-            tile_bin_end = tile_bins[tile_id, 1]
-            T = 1.0
-
-            for idx in range(tile_bin_start, tile_bin_end):
-                gaussian_id = gaussian_ids_sorted[idx]
-                conic = conics[gaussian_id]
-                center = xys[gaussian_id]
-                delta = center - torch.tensor(
-                    [j, i], dtype=torch.float32, device=xys.device
-                )
-
-                sigma = (
-                    0.5
-                    * (conic[0] * delta[0] * delta[0] + conic[2] * delta[1] * delta[1])
-                    + conic[1] * delta[0] * delta[1]
-                )
-
-                if sigma < 0:
-                    continue
+    gaussian_ids_sorted = gaussian_ids_sorted.long()
+    opacities = opacities.reshape(-1)
+    tile_ranges = tile_bins.tolist()
+    for tile_id in range(tile_bounds[0] * tile_bounds[1]):
+        rasterize_tile(
+            tile_id,
+            tile_bounds,
+            block,
+            tile_ranges[tile_id] if tile_id < len(tile_ranges) else (0, 0),
+            gaussian_ids_sorted,
+            xys,
+            conics,
+            colors,
+            opacities,
+            background,
+            out_img,
+            final_Ts,
+            final_idx,
+        )
+    return out_img, final_Ts, final_idx
 
-                opac = opacities[gaussian_id]
-                alpha = min(0.999, opac * torch.exp(-sigma))
 
-                if alpha < 1 / 255:
-                    continue
+RASTERIZE_BATCH_SIZE = 256
 
-                next_T = T * (1 - alpha)
 
-                if next_T <= 1e-4:
-                    idx -= 1
-                    break
+def rasterize_tile(
+    tile_id,
+    tile_bounds,
+    block,
+    tile_range,
+    gaussian_ids_sorted,
+    xys,
+    conics,
+    colors,
+    opacities,
+    background,
+    out_img,
+    final_Ts,
+    final_idx,
+):
+    """Rasterizes one tile as a dense (pixels x gaussians) problem.
+
+    Gaussians are composited front to back in batches of RASTERIZE_BATCH_SIZE,
+    carrying the transmittance of every pixel between batches and stopping as
+    soon as all pixels of the tile are saturated. Writes into the tile's slice
+    of out_img, final_Ts and final_idx; final_idx holds the bin index of the
+    last gaussian that contributed to each pixel (0 if none), as in the
+    rasterize_forward kernel. colors and opacities may have fewer rows than
+    xys, shared by the views of a batch: gaussian g reads row g % len(colors).
+    """
+    img_height, img_width = final_Ts.shape
+    tile_y, tile_x = divmod(tile_id, tile_bounds[0])
+    i0, j0 = tile_y * block[1], tile_x * block[0]
+    i1, j1 = min(i0 + block[1], img_height), min(j0 + block[0], img_width)
+    if i0 >= i1 or j0 >= j1:
+        return
+
+    device = xys.device
+    py, px = torch.meshgrid(
+        torch.arange(i0, i1, dtype=xys.dtype, device=device),
+        torch.arange(j0, j1, dtype=xys.dtype, device=device),
+        indexing="ij",
+    )
+    px, py = px.reshape(-1, 1), py.reshape(-1, 1)
+    num_pixels = px.shape[0]
+
+    T = torch.ones((num_pixels, 1), dtype=xys.dtype, device=device)
+    cur_idx = torch.zeros(num_pixels, dtype=torch.int64, device=device)
+    done = torch.zeros(num_pixels, dtype=torch.bool, device=device)
+    pix_out = torch.zeros((num_pixels, colors.shape[1]), dtype=xys.dtype, device=device)
+
+    range_start, range_end = tile_range
+    for batch_start in range(range_start, range_end, RASTERIZE_BATCH_SIZE):
+        batch_end = min(batch_start + RASTERIZE_BATCH_SIZE, range_end)
+        g = gaussian_ids_sorted[batch_start:batch_end]
+        xy, conic = xys[g], conics[g]
+        opac = opacities[g % opacities.shape[0]]
+
+        dx = xy[:, 0] - px  # (pixels, gaussians)
+        dy = xy[:, 1] - py
+        sigma = (
+            0.5 * (conic[:, 0] * dx * dx + conic[:, 2] * dy * dy)
+            + conic[:, 1] * dx * dy
+        )
+        alpha = torch.clamp_max(opac * torch.exp(-sigma), 0.999)
+        valid = (sigma >= 0) & (alpha >= 1 / 255) & ~done[:, None]
+
+        # transmittance after each gaussian, multiplied in compositing order;
+        # it only decreases, so once a pixel saturates nothing after it counts
+        factor = torch.where(valid, 1 - alpha, torch.ones_like(alpha))
+        Ts = torch.cumprod(torch.cat([T, factor], dim=1), dim=1)
+        contrib = valid & (Ts[:, 1:] > 1e-4)
+        done |= (valid & ~contrib).any(dim=1)
+
+        vis = torch.where(contrib, alpha * Ts[:, :-1], torch.zeros_like(alpha))
+        pix_out += vis @ colors[g % colors.shape[0]]
+
+        # position of the last contributing gaussian in this batch, if any
+        steps = torch.arange(1, batch_end - batch_start + 1, device=device)
+        last = (contrib * steps).amax(dim=1)
+        hit = last > 0
+        T = torch.where(hit[:, None], Ts.gather(1, last[:, None]), T)
+        cur_idx = torch.where(hit, batch_start + last - 1, cur_idx)
+
+        if done.all():
+            break
 
-                vis = alpha * T
+    out_img[i0:i1, j0:j1] = (pix_out + T * background).view(i1 - i0, j1 - j0, -1)
+    final_Ts[i0:i1, j0:j1] = T.view(i1 - i0, j1 - j0)
+    final_idx[i0:i1, j0:j1] = cur_idx.view(i1 - i0, j1 - j0).to(torch.int32)
 
-                out_img[i, j] += vis * colors[gaussian_id]
-                T = next_T
 
-            final_Ts[i, j] = T
-            final_idx[i, j] = idx
-            out_img[i, j] += T * background
+def rasterize_backward(
+    tile_bounds,
+    block,
+    img_size,
+    gaussian_ids_sorted,
+    tile_bins,
+    xys,
+    conics,
+    colors,
+    opacities,
+    background,
+    final_Ts,
+    final_idx,
+    v_output,
+    v_output_alpha,
+):
+    v_xy = torch.zeros_like(xys)
+    v_conic = torch.zeros_like(conics)
+    v_colors = torch.zeros_like(colors)
+    v_opacity = torch.zeros((opacities.shape[0], 1), dtype=xys.dtype, device=xys.device)
+    gaussian_ids_sorted = gaussian_ids_sorted.long()
+    opacities = opacities.reshape(-1)
+    tile_ranges = tile_bins.tolist()
+    for tile_id in range(min(tile_bounds[0] * tile_bounds[1], len(tile_ranges))):
+        rasterize_tile_backward(
+            tile_id,
+            tile_bounds,
+            block,
+            tile_ranges[tile_id],
+            gaussian_ids_sorted,
+            xys,
+            conics,
+            colors,
+            opacities,
+            background,
+            final_Ts,
+            final_idx,
+            v_output,
+            v_output_alpha,
+            v_xy,
+            v_conic,
+            v_colors,
+            v_opacity,
+        )
+    return v_xy, v_conic, v_colors, v_opacity
+
+
+def rasterize_tile_backward(
+    tile_id,
+    tile_bounds,
+    block,
+    tile_range,
+    gaussian_ids_sorted,
+    xys,
+    conics,
+    colors,
+    opacities,
+    background,
+    final_Ts,
+    final_idx,
+    v_output,
+    v_output_alpha,
+    v_xy,
+    v_conic,
+    v_colors,
+    v_opacity,
+    bin_offset=0,
+):
+    """Accumulates the gradients of one tile into v_xy, v_conic, v_colors and v_opacity.
+
+    Walks the gaussians of the tile back to front in batches, recovering the
+    transmittance of each pixel from the saved final_Ts by dividing out
+    (1 - alpha) and only counting gaussians up to the saved final_idx.
+    ``gaussian_ids_sorted`` may hold only the bins from ``bin_offset`` on, the
+    tile range and final_idx still being bin indices of the whole frame.
+    Shared colors and opacities get the gradients of every view, see
+    :func:`rasterize_tile`.
+    """
+    img_height, img_width = final_Ts.shape
+    tile_y, tile_x = divmod(tile_id, tile_bounds[0])
+    i0, j0 = tile_y * block[1], tile_x * block[0]
+    i1, j1 = min(i0 + block[1], img_height), min(j0 + block[0], img_width)
+    range_start, range_end = tile_range
+    if i0 >= i1 or j0 >= j1 or range_start >= range_end:
+        return
+
+    device = xys.device
+    py, px = torch.meshgrid(
+        torch.arange(i0, i1, dtype=xys.dtype, device=device),
+        torch.arange(j0, j1, dtype=xys.dtype, device=device),
+        indexing="ij",
+    )
+    px, py = px.reshape(-1, 1), py.reshape(-1, 1)
+    T_final = final_Ts[i0:i1, j0:j1].reshape(-1, 1)
+    bin_final = final_idx[i0:i1, j0:j1].reshape(-1, 1).long()
+    v_out = v_output[i0:i1, j0:j1].reshape(px.shape[0], -1)
+    v_out_alpha = v_output_alpha[i0:i1, j0:j1].reshape(-1, 1)
+
+    # every term involving the background only depends on the pixel
+    v_bg = T_final * ((v_out * background).sum(dim=-1, keepdim=True) - v_out_alpha)
+
+    T = T_final
+    # running sum of rgb * alpha * T behind the current gaussian, dotted with v_out
+    S = torch.zeros_like(T_final)
+    batch_end = min(range_end, int(bin_final.max().item()) + 1)
+    while batch_end > range_start:
+        batch_start = max(batch_end - RASTERIZE_BATCH_SIZE, range_start)
+        # back to front
+        bins = torch.arange(batch_end - 1, batch_start - 1, -1, device=device)
+        g = gaussian_ids_sorted[bins - bin_offset]
+        # rows of the colors and opacities, which may be shared by views
+        g_rgb, g_opac = g % colors.shape[0], g % opacities.shape[0]
+        xy, conic, opac, rgb = xys[g], conics[g], opacities[g_opac], colors[g_rgb]
+
+        dx = xy[:, 0] - px  # (pixels, gaussians)
+        dy = xy[:, 1] - py
+        sigma = (
+            0.5 * (conic[:, 0] * dx * dx + conic[:, 2] * dy * dy)
+            + conic[:, 1] * dx * dy
+        )
+        vis = torch.exp(-sigma)
+        alpha = torch.clamp_max(opac * vis, 0.999)
+        valid = (sigma >= 0) & (alpha >= 1 / 255) & (bins <= bin_final)
+
+        # transmittance in front of each gaussian
+        ra = torch.where(valid, 1 / (1 - alpha), torch.ones_like(alpha))
+        Ts = T * torch.cumprod(ra, dim=1)
+        fac = torch.where(valid, alpha * Ts, torch.zeros_like(alpha))
+        rgb_v_out = v_out @ rgb.T
+        contrib = fac * rgb_v_out
+        S_behind = S + torch.cumsum(contrib, dim=1) - contrib
+
+        v_alpha = rgb_v_out * Ts - (S_behind + v_bg) * ra
+        v_alpha = torch.where(valid, v_alpha, torch.zeros_like(v_alpha))
+        v_sigma = -opac * vis * v_alpha
+
+        v_colors.index_add_(0, g_rgb, fac.T @ v_out)
+        v_opacity.index_add_(0, g_opac, (vis * v_alpha).sum(dim=0)[:, None])
+        v_conic.index_add_(
+            0,
+            g,
+            torch.stack(
+                [
+                    0.5 * (v_sigma * dx * dx).sum(dim=0),
+                    (v_sigma * dx * dy).sum(dim=0),
+                    0.5 * (v_sigma * dy * dy).sum(dim=0),
+                ],
+                dim=-1,
+            ),
+        )
+        v_xy.index_add_(
+            0,
+            g,
+            torch.stack(
+                [
+                    (v_sigma * (conic[:, 0] * dx + conic[:, 1] * dy)).sum(dim=0),
+                    (v_sigma * (conic[:, 1] * dx + conic[:, 2] * dy)).sum(dim=0),
+                ],
+                dim=-1,
+            ),
+        )
 
-    return out_img, final_Ts, final_idx
+        T = Ts[:, -1:]
+        S = S + contrib.sum(dim=1, keepdim=True)
+        batch_end = batch_start
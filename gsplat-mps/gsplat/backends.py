@@ -0,0 +1,98 @@
+"""Selection of the kernel backend used by the python bindings"""
+
+import importlib
+import os
+import threading
+from types import ModuleType
+from typing import Dict, Optional, Union
+
+import torch
+
+# backend name -> module exposing the bindings declared in ext.cpp
+_BACKENDS: Dict[str, str] = {
+    "mps": "gsplat.mps",
+    "cuda": "gsplat.cuda",
+    "cpu": "gsplat.cpu",
+}
+
+# device type -> backend used when no backend is set for the process
+_DEVICE_BACKENDS: Dict[str, str] = {
+    "mps": "mps",
+    "cuda": "cuda",
+    "cpu": "cpu",
+}
+
+_backend_name: Optional[str] = os.getenv("GSPLAT_BACKEND") or None
+
+
+def register_backend(name: str, module: str, device_type: Optional[str] = None):
+    """Registers a module implementing the kernel bindings under a backend name.
+
+    Args:
+        name (str): backend name, e.g. "cpu".
+        module (str): import path of the module providing the bindings.
+        device_type (str): if given, tensors on this device type use the backend by default.
+    """
+    _BACKENDS[name] = module
+    if device_type is not None:
+        _DEVICE_BACKENDS[device_type] = name
+
+
+def set_backend(name: Optional[str]):
+    """Forces every call in this process to use the given backend.
+
+    The ``GSPLAT_BACKEND`` environment variable sets the same value at import time.
+
+    Args:
+        name (str): one of the registered backends ("mps", "cuda", "cpu"), or None to select the backend from the device of the inputs again.
+    """
+    global _backend_name
+    if name is not None and name not in _BACKENDS:
+        raise ValueError(
+            f"Unknown gsplat backend {name!r}, expected one of {sorted(_BACKENDS)}"
+        )
+    _backend_name = name
+
+
+def get_backend(device: Optional[Union[str, torch.device]] = None) -> ModuleType:
+    """Returns the kernel bindings to use for inputs on ``device``.
+
+    Args:
+        device (torch.device): device of the inputs of the call.
+
+    Returns:
+        The backend module, with the same functions as the native extensions.
+    """
+    name = _backend_name
+    if name is None:
+        device_type = torch.device(device).type if device is not None else "cpu"
+        name = _DEVICE_BACKENDS.get(device_type, "cpu")
+    if name not in _BACKENDS:
+        raise ValueError(
+            f"Unknown gsplat backend {name!r}, expected one of {sorted(_BACKENDS)}"
+        )
+    return importlib.import_module(_BACKENDS[name])
+
+
+def warmup(
+    device: Optional[Union[str, torch.device]] = None, background: bool = False
+) -> Optional[threading.Thread]:
+    """Loads the native extension of the backend for ``device`` ahead of the first kernel call.
+
+    Extensions are otherwise loaded (and JIT compiled if no build matches the
+    sources and torch version) lazily by the first call that needs them.
+
+    Args:
+        device (torch.device): device the kernels will run on.
+        background (bool): load in a daemon thread instead of blocking.
+
+    Returns:
+        The loading thread if ``background`` is set, otherwise None.
+    """
+    backend = get_backend(device)
+    if not background:
+        backend.warmup()
+        return None
+    thread = threading.Thread(target=backend.warmup, name="gsplat-warmup", daemon=True)
+    thread.start()
+    return thread
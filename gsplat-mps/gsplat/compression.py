@@ -0,0 +1,236 @@
+"""Quantized storage of gaussians, decoded in chunks ahead of rendering"""
+
+import math
+from typing import Optional, Tuple
+
+import torch
+from jaxtyping import Float
+from torch import Tensor
+
+# each of the three smallest quaternion components lies in [-1/sqrt(2), 1/sqrt(2)]
+_QUAT_BITS = 10
+_QUAT_RANGE = 1 / math.sqrt(2)
+
+
+def _pack_quats(quats: Tensor) -> Tensor:
+    # smallest three encoding, 2 bits for the index of the largest component
+    quats = torch.nn.functional.normalize(quats, dim=-1)
+    largest = quats.abs().argmax(dim=-1, keepdim=True)
+    sign = torch.where(quats.gather(-1, largest) < 0, -1.0, 1.0)
+    keep = torch.arange(4, device=quats.device).expand(quats.shape[0], 4)
+    keep = keep[keep != largest].view(-1, 3)
+    rest = quats.gather(-1, keep) * sign
+    levels = (1 << _QUAT_BITS) - 1
+    rest = ((rest / _QUAT_RANGE + 1) * (levels / 2)).round().long().clamp(0, levels)
+    packed = largest[:, 0] << (3 * _QUAT_BITS)
+    for i in range(3):
+        packed |= rest[:, i] << ((2 - i) * _QUAT_BITS)
+    # stored as int32, wrapping the largest index into the sign bit
+    return torch.where(packed >= 1 << 31, packed - (1 << 32), packed).to(torch.int32)
+
+
+def _unpack_quats(packed: Tensor) -> Tensor:
+    packed = packed.long() & 0xFFFFFFFF
+    levels = (1 << _QUAT_BITS) - 1
+    rest = torch.stack(
+        [(packed >> ((2 - i) * _QUAT_BITS)) & levels for i in range(3)], dim=-1
+    )
+    rest = (rest.float() * (2 / levels) - 1) * _QUAT_RANGE
+    largest = (packed >> (3 * _QUAT_BITS))[:, None]
+    first = torch.sqrt((1 - (rest * rest).sum(dim=-1, keepdim=True)).clamp(min=0))
+    # insert the largest component back at its index
+    quats = torch.cat([rest, first], dim=-1)
+    slots = torch.arange(4, device=packed.device)
+    order = torch.where(slots < largest, slots, slots - 1)
+    order = torch.where(slots == largest, 3, order)
+    return quats.gather(-1, order)
+
+
+def _nearest(points: Tensor, codebook: Tensor, chunk_size: int) -> Tensor:
+    # index of the closest codeword of each point, in chunks of points
+    norms = (codebook * codebook).sum(dim=-1)
+    labels = torch.empty(points.shape[0], dtype=torch.long, device=points.device)
+    for start in range(0, points.shape[0], chunk_size):
+        chunk = points[start : start + chunk_size]
+        distances = torch.addmm(norms, chunk, codebook.T, alpha=-2)
+        labels[start : start + chunk_size] = distances.argmin(dim=-1)
+    return labels
+
+
+def _kmeans(points: Tensor, size: int, iterations: int, chunk_size: int) -> Tensor:
+    generator = torch.Generator(device="cpu").manual_seed(0)
+    perm = torch.randperm(points.shape[0], generator=generator).to(points.device)
+    codebook = points[perm[:size]].clone()
+    for _ in range(iterations):
+        labels = _nearest(points, codebook, chunk_size)
+        counts = torch.bincount(labels, minlength=size)
+        sums = torch.zeros_like(codebook).index_add_(0, labels, points)
+        # empty clusters keep their codeword
+        filled = counts > 0
+        codebook[filled] = sums[filled] / counts[filled, None]
+    return codebook
+
+
+class CompactGaussians:
+    """Gaussians of a scene stored quantized, for several scenes to fit in memory.
+
+    Each gaussian takes 16 bytes besides the shared color codebook:
+
+    - means as float16 offsets from the center of the scene,
+    - scales as 8 bits per axis on a log scale spanning the scales of the scene,
+    - rotations as the three smallest components of the unit quaternion on 10
+      bits each, with 2 bits for the index of the largest one,
+    - colors, or sh coefficients, as 16 bit indices into a codebook of
+      ``codebook_size`` entries fit by k-means,
+    - opacities as 8 bits.
+
+    :meth:`decode` restores float32 tensors for some or all of the gaussians, in
+    chunks to bound the temporary memory, right before they are rendered::
+
+        scene = CompactGaussians(means3d, scales, quats, colors, opacities)
+        means3d, scales, quats, colors, opacities = scene.decode(ids)
+        xys, depths, radii, conics, num_tiles_hit, cov3d = project_gaussians(
+            means3d, scales, glob_scale, quats, viewmat, ...
+        )
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians.
+        quats (Tensor): rotations in quaternion [w,x,y,z] format.
+        colors (Tensor): features of the gaussians, of shape (N, ...), e.g. rgb or sh coefficients.
+        opacities (Tensor): opacities of the gaussians, in [0, 1].
+        codebook_size (int): number of distinct colors kept, at most 65536.
+        kmeans_samples (int): number of gaussians the codebook is fit on.
+        kmeans_iterations (int): iterations of k-means fitting the codebook.
+        chunk_size (int): number of gaussians encoded or decoded at once.
+    """
+
+    def __init__(
+        self,
+        means3d: Float[Tensor, "*batch 3"],
+        scales: Float[Tensor, "*batch 3"],
+        quats: Float[Tensor, "*batch 4"],
+        colors: Tensor,
+        opacities: Float[Tensor, "*batch 1"],
+        codebook_size: int = 4096,
+        kmeans_samples: int = 65536,
+        kmeans_iterations: int = 10,
+        chunk_size: int = 1 << 16,
+    ):
+        if not 1 <= codebook_size <= 1 << 16:
+            raise ValueError(f"Expected 1 to 65536 codewords, got {codebook_size}")
+        self.chunk_size = chunk_size
+        with torch.no_grad():
+            self._encode(
+                means3d.detach().float(),
+                scales.detach().float(),
+                quats.detach().float(),
+                colors.detach().float(),
+                opacities.detach().float().reshape(-1),
+                codebook_size,
+                kmeans_samples,
+                kmeans_iterations,
+            )
+
+    def _encode(
+        self,
+        means3d,
+        scales,
+        quats,
+        colors,
+        opacities,
+        codebook_size,
+        kmeans_samples,
+        kmeans_iterations,
+    ):
+        num_points = means3d.shape[0]
+        self.num_points = num_points
+        self.center = (means3d.amin(dim=0) + means3d.amax(dim=0)) / 2
+        self.means3d = (means3d - self.center).half()
+
+        log_scales = torch.log(scales.clamp(min=1e-12))
+        self.log_scale_range = (float(log_scales.min()), float(log_scales.max()))
+        lower, upper = self.log_scale_range
+        step = max(upper - lower, 1e-6) / 255
+        self.scales = ((log_scales - lower) / step).round().clamp(0, 255)
+        self.scales = self.scales.to(torch.uint8)
+
+        self.quats = torch.empty(num_points, dtype=torch.int32, device=means3d.device)
+        for start in range(0, num_points, self.chunk_size):
+            end = start + self.chunk_size
+            self.quats[start:end] = _pack_quats(quats[start:end])
+
+        self.color_shape = colors.shape[1:]
+        features = colors.reshape(num_points, -1)
+        if num_points <= codebook_size:
+            self.codebook = features.clone()
+            labels = torch.arange(num_points, device=means3d.device)
+        else:
+            generator = torch.Generator(device="cpu").manual_seed(0)
+            samples = torch.randperm(num_points, generator=generator)
+            samples = samples[:kmeans_samples].to(means3d.device)
+            self.codebook = _kmeans(
+                features[samples], codebook_size, kmeans_iterations, self.chunk_size
+            )
+            labels = _nearest(features, self.codebook, self.chunk_size)
+        # 16 bit indices, read back as unsigned
+        self.color_ids = torch.where(labels >= 1 << 15, labels - (1 << 16), labels)
+        self.color_ids = self.color_ids.to(torch.int16)
+
+        self.opacities = (opacities.clamp(0, 1) * 255).round().to(torch.uint8)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes taken by the quantized gaussians and the codebook."""
+        tensors = (self.means3d, self.scales, self.quats, self.color_ids)
+        tensors += (self.opacities, self.codebook)
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def decode(
+        self, ids: Optional[Tensor] = None
+    ) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]:
+        """Restores the gaussians, or the subset given by ``ids``.
+
+        Args:
+            ids (Tensor): indices of the gaussians to decode, e.g. from :meth:`SpatialIndex.query`, all of them if None.
+
+        Returns:
+            A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor}:
+
+            - **means3d** (Tensor): xyzs of the gaussians.
+            - **scales** (Tensor): scales of the gaussians.
+            - **quats** (Tensor): unit rotations in quaternion [w,x,y,z] format.
+            - **colors** (Tensor): features of the gaussians, from the codebook.
+            - **opacities** (Tensor): opacities of the gaussians, of shape (N, 1).
+        """
+        device = self.means3d.device
+        num_points = self.num_points if ids is None else ids.shape[0]
+        means3d = torch.empty((num_points, 3), device=device)
+        scales = torch.empty((num_points, 3), device=device)
+        quats = torch.empty((num_points, 4), device=device)
+        colors = self.codebook.new_empty((num_points,) + self.codebook.shape[1:])
+        opacities = torch.empty((num_points, 1), device=device)
+
+        lower, upper = self.log_scale_range
+        step = max(upper - lower, 1e-6) / 255
+        for start in range(0, num_points, self.chunk_size):
+            end = min(start + self.chunk_size, num_points)
+            if ids is None:
+                chunk = slice(start, end)
+            else:
+                chunk = ids[start:end].to(device)
+            torch.add(self.means3d[chunk].float(), self.center, out=means3d[start:end])
+            torch.exp(self.scales[chunk].float() * step + lower, out=scales[start:end])
+            quats[start:end] = _unpack_quats(self.quats[chunk])
+            color_ids = self.color_ids[chunk].long() & 0xFFFF
+            torch.index_select(self.codebook, 0, color_ids, out=colors[start:end])
+            torch.div(
+                self.opacities[chunk, None].float(), 255, out=opacities[start:end]
+            )
+        return (
+            means3d,
+            scales,
+            quats,
+            colors.view((num_points,) + self.color_shape),
+            opacities,
+        )
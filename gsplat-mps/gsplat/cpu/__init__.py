@@ -0,0 +1,55 @@
+from typing import Callable
+
+from ._parallel import get_num_workers, set_num_workers
+
+
+def _make_lazy_cpu_func(name: str) -> Callable:
+    def call_cpu(*args, **kwargs):
+        # pylint: disable=import-outside-toplevel
+        from ._backend import _C
+
+        return getattr(_C, name)(*args, **kwargs)
+
+    return call_cpu
+
+
+def _make_lazy_torch_func(name: str) -> Callable:
+    # bindings without a native kernel, always run in PyTorch
+    def call_torch(*args, **kwargs):
+        # pylint: disable=import-outside-toplevel
+        from . import _torch_bindings
+
+        return getattr(_torch_bindings, name)(*args, **kwargs)
+
+    return call_torch
+
+
+def warmup() -> None:
+    """Loads the compiled cpu kernels now, if they are available, instead of on first use."""
+    # pylint: disable=import-outside-toplevel
+    from ._backend import load_extension
+
+    load_extension()
+
+
+# the rasterizers read row g % len(colors) of colors and opacities with fewer
+# rows than xys, so the views of a batch can share them without copies
+rasterize_shared_features = True
+
+nd_rasterize_forward = _make_lazy_cpu_func("nd_rasterize_forward")
+nd_rasterize_backward = _make_lazy_cpu_func("nd_rasterize_backward")
+rasterize_forward = _make_lazy_cpu_func("rasterize_forward")
+rasterize_backward = _make_lazy_cpu_func("rasterize_backward")
+compute_cov2d_bounds = _make_lazy_cpu_func("compute_cov2d_bounds")
+project_gaussians_forward = _make_lazy_cpu_func("project_gaussians_forward")
+project_gaussians_backward = _make_lazy_cpu_func("project_gaussians_backward")
+compute_sh_forward = _make_lazy_cpu_func("compute_sh_forward")
+compute_sh_backward = _make_lazy_cpu_func("compute_sh_backward")
+map_gaussian_to_intersects = _make_lazy_cpu_func("map_gaussian_to_intersects")
+get_tile_bin_edges = _make_lazy_cpu_func("get_tile_bin_edges")
+project_gaussians_batched_forward = _make_lazy_torch_func(
+    "project_gaussians_batched_forward"
+)
+project_gaussians_batched_backward = _make_lazy_torch_func(
+    "project_gaussians_batched_backward"
+)
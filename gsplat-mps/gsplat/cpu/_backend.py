@@ -0,0 +1,132 @@
+import glob
+import hashlib
+import importlib.machinery
+import os
+import shutil
+import sys
+import threading
+from types import ModuleType
+from typing import Optional
+
+import torch
+from rich.console import Console
+from torch.utils.cpp_extension import (
+    _get_build_directory,
+    _import_module_from_library,
+    load,
+)
+
+from . import _torch_bindings
+from ._parallel import get_num_workers
+
+PATH = os.path.dirname(os.path.abspath(__file__))
+
+# "auto" uses the compiled kernels when they were built by setup.py or by an
+# earlier JIT build of the same sources, "jit" also builds them if needed and
+# "off" always runs the PyTorch implementation in _torch_bindings.
+EXTENSION_MODE = os.getenv("GSPLAT_CPU_EXTENSION", "auto")
+
+name = "gsplat_cpu"
+extra_include_paths = []
+extra_cflags = ["-O3"]
+extra_ldflags = []
+if sys.platform != "darwin":
+    extra_cflags += ["-fopenmp"]
+    extra_ldflags += ["-fopenmp"]
+
+sources = list(glob.glob(os.path.join(PATH, "csrc/*.cpp")))
+
+# The extension is only loaded (and built if needed) on first use of a kernel,
+# so that importing gsplat stays cheap. `_C` is resolved by __getattr__ below.
+_ext: Optional[ModuleType] = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def source_hash() -> str:
+    """Hash of everything the compiled extension depends on."""
+    h = hashlib.sha256()
+    h.update(torch.__version__.encode())
+    h.update(" ".join(extra_cflags + extra_ldflags).encode())
+    headers = glob.glob(os.path.join(PATH, "csrc/*.h"))
+    for path in sorted(sources + headers):
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def _load() -> Optional[ModuleType]:
+    if EXTENSION_MODE == "off":
+        return None
+    try:
+        # try to import the compiled module (via setup.py)
+        from gsplat import cpu_csrc
+
+        return cpu_csrc
+    except ImportError:
+        pass
+
+    # if failed, look for a JIT build of the same sources and torch version
+    build_name = f"{name}_{source_hash()}"
+    build_dir = _get_build_directory(build_name, verbose=False)
+    # the library has the extension suffix of the platform, .so or .pyd
+    if any(
+        os.path.exists(os.path.join(build_dir, build_name + suffix))
+        for suffix in importlib.machinery.EXTENSION_SUFFIXES
+    ):
+        return _import_module_from_library(build_name, build_dir, True)
+    if EXTENSION_MODE != "jit":
+        return None
+
+    # Build from scratch. Remove the build directory just to be safe: pytorch jit might stuck
+    # if the build directory exists with a lock file in it.
+    shutil.rmtree(build_dir, ignore_errors=True)
+    try:
+        with Console().status(
+            "[bold yellow]gsplat: Setting up cpu (This may take a few minutes the first time)",
+            spinner="bouncingBall",
+        ):
+            return load(
+                name=build_name,
+                sources=sources,
+                extra_cflags=extra_cflags,
+                extra_ldflags=extra_ldflags,
+                extra_include_paths=extra_include_paths,
+            )
+    except (OSError, RuntimeError) as e:
+        Console().print(
+            f"[yellow]gsplat: Could not build the cpu extension ({e}), "
+            "falling back to the PyTorch implementation.[/yellow]"
+        )
+        return None
+
+
+def load_extension() -> Optional[ModuleType]:
+    """Loads the compiled cpu kernels, if available. Safe to call from several threads."""
+    global _ext, _loaded
+    if _loaded:
+        return _ext
+    with _lock:
+        if not _loaded:
+            _ext = _load()
+            if _ext is not None:
+                _ext.set_num_threads(get_num_workers())
+            _loaded = True
+    return _ext
+
+
+def set_num_threads(num_threads: int):
+    if _ext is not None:
+        _ext.set_num_threads(num_threads)
+
+
+def __getattr__(attr: str):
+    # `from ._backend import _C` triggers the load on first access
+    if attr == "_C":
+        ext = load_extension()
+        return _torch_bindings if ext is None else ext
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
+
+
+__all__ = ["_C", "load_extension"]
@@ -0,0 +1,115 @@
+"""Thread pool that runs the tiles of the CPU rasterizer in parallel.
+
+Every tile is a handful of dense torch ops, which release the GIL, so plain
+threads share the work without copying the inputs to other processes. The
+workers run these ops on a single intra-op thread each: the pool already spreads
+the tiles over the cores, and letting every worker also start torch's own
+threads would run several threads per core.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+import torch
+from torch import Tensor
+
+# work units per worker, so that a few expensive units do not leave workers idle
+UNITS_PER_WORKER = 4
+# cost of a tile with no intersections, in intersections; covers the per-pixel work
+TILE_BASE_COST = 16
+
+_num_workers: int = int(os.getenv("GSPLAT_CPU_NUM_WORKERS", "0")) or (
+    os.cpu_count() or 1
+)
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def set_num_workers(num_workers: Optional[int]):
+    """Sets the number of threads used by the cpu kernels.
+
+    Applies to the thread pool of the PyTorch implementation and to the
+    OpenMP threads of the compiled kernels.
+
+    The ``GSPLAT_CPU_NUM_WORKERS`` environment variable sets the same value at import time.
+
+    Args:
+        num_workers (int): number of threads, or None for one per cpu core. 1 runs the tiles in the calling thread.
+    """
+    global _num_workers, _pool
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_workers < 1:
+        raise ValueError(f"num_workers must be at least 1, got {num_workers}")
+    with _pool_lock:
+        if _pool is not None and num_workers != _num_workers:
+            _pool.shutdown(wait=False)
+            _pool = None
+        _num_workers = num_workers
+    # pylint: disable=import-outside-toplevel
+    from . import _backend
+
+    _backend.set_num_threads(num_workers)
+
+
+def get_num_workers() -> int:
+    """Returns the number of threads used by the cpu kernels."""
+    return _num_workers
+
+
+def _init_worker():
+    # the intra-op thread count is per thread with OpenMP, the calling thread
+    # keeps its own
+    torch.set_num_threads(1)
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=_num_workers,
+                thread_name_prefix="gsplat-cpu",
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def partition_tiles(tile_bins: Tensor, num_tiles: int, num_units: int) -> List[range]:
+    """Splits the tile ids into contiguous runs of roughly equal cost.
+
+    The cost of a tile is its number of intersections in ``tile_bins`` plus
+    TILE_BASE_COST. Runs are contiguous so that each unit writes a compact
+    band of the image.
+    """
+    counts = torch.zeros(num_tiles, dtype=torch.int64)
+    n = min(num_tiles, tile_bins.shape[0])
+    counts[:n] = (tile_bins[:n, 1] - tile_bins[:n, 0]).long().cpu()
+    cum_cost = torch.cumsum(counts + TILE_BASE_COST, dim=0)
+    total = cum_cost[-1].item()
+    targets = torch.arange(1, num_units, dtype=torch.int64) * total // num_units
+    bounds = torch.searchsorted(cum_cost, targets, right=True).tolist()
+    edges = [0] + bounds + [num_tiles]
+    return [range(a, b) for a, b in zip(edges[:-1], edges[1:]) if a < b]
+
+
+def tile_units(tile_bins: Tensor, num_tiles: int) -> List[range]:
+    """Work units for the current number of workers."""
+    if _num_workers == 1 or num_tiles <= 1:
+        return [range(num_tiles)]
+    num_units = min(num_tiles, _num_workers * UNITS_PER_WORKER)
+    return partition_tiles(tile_bins, num_tiles, num_units)
+
+
+def run_units(fn: Callable[[range], None], units: Sequence[range]):
+    """Calls ``fn(unit)`` for every unit, spread over the worker threads.
+
+    Units are disjoint, so ``fn`` may write to per-tile outputs without locking.
+    """
+    if len(units) == 1:
+        fn(units[0])
+        return
+    # list() propagates the first exception raised by a unit
+    list(_get_pool().map(fn, units))
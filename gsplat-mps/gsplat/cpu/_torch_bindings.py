@@ -0,0 +1,421 @@
+"""CPU kernels with the same signatures as the native bindings in ext.cpp,
+implemented on top of the pure PyTorch functions in gsplat._torch_impl"""
+
+import threading
+from typing import Tuple
+
+import torch
+from torch import Tensor
+
+from gsplat import _torch_impl
+
+from ._parallel import run_units, tile_units
+
+# points per pass of the sh functions, which bounds their temporary memory
+SH_CHUNK_SIZE = 1 << 15
+
+
+def compute_cov2d_bounds(num_pts: int, covs2d: Tensor) -> Tuple[Tensor, Tensor]:
+    conic, radius, valid = _torch_impl.compute_cov2d_bounds(covs2d[:num_pts])
+    conics = torch.where(valid[:, None], conic, 0.0)
+    radii = torch.where(valid, radius, 0.0)[:, None]
+    return conics, radii
+
+
+def _project_cov3d(
+    means3d: Tensor,
+    cov3d: Tensor,
+    viewmat: Tensor,
+    projmat: Tensor,
+    fx,
+    fy,
+    cx,
+    cy,
+    img_height: int,
+    img_width: int,
+    tile_bounds: Tuple[int, int, int],
+    clip_thresh: float,
+) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor, Tensor]:
+    # viewmat, projmat and the intrinsics broadcast against the gaussians, so a
+    # leading camera dimension projects the same cov3d into every camera
+    tan_fovx = 0.5 * img_width / fx
+    tan_fovy = 0.5 * img_height / fy
+    p_view, is_close = _torch_impl.clip_near_plane(means3d, viewmat, clip_thresh)
+    cov2d = _torch_impl.project_cov3d_ewa(
+        means3d, cov3d, viewmat, fx, fy, tan_fovx, tan_fovy
+    )
+    conics, radius, det_valid = _torch_impl.compute_cov2d_bounds(cov2d)
+    xys = _torch_impl.project_pix(
+        projmat, means3d, (img_width, img_height), pp=(cx, cy)
+    )
+    tile_min, tile_max = _torch_impl.get_tile_bbox(xys, radius, tile_bounds)
+    num_tiles_hit = torch.prod(tile_max - tile_min, dim=-1)
+    mask = (num_tiles_hit > 0) & ~is_close & det_valid
+
+    # zero what the kernel leaves untouched for culled gaussians
+    conics = torch.where((~is_close & det_valid)[..., None], conics, 0.0)
+    xys = torch.where(mask[..., None], xys, 0.0)
+    depths = torch.where(mask, p_view[..., 2], 0.0)
+    radii = torch.where(mask, radius, 0.0).to(torch.int32)
+    num_tiles_hit = torch.where(mask, num_tiles_hit, 0).to(torch.int32)
+    return xys, depths, radii, conics, num_tiles_hit, is_close
+
+
+def project_gaussians_forward(
+    num_points: int,
+    means3d: Tensor,
+    scales: Tensor,
+    glob_scale: float,
+    quats: Tensor,
+    viewmat: Tensor,
+    projmat: Tensor,
+    fx: float,
+    fy: float,
+    cx: float,
+    cy: float,
+    img_height: int,
+    img_width: int,
+    tile_bounds: Tuple[int, int, int],
+    clip_thresh: float,
+) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor, Tensor]:
+    cov3d = _torch_impl.scale_rot_to_cov3d(scales, glob_scale, quats)
+    xys, depths, radii, conics, num_tiles_hit, is_close = _project_cov3d(
+        means3d,
+        cov3d,
+        viewmat,
+        projmat,
+        fx,
+        fy,
+        cx,
+        cy,
+        img_height,
+        img_width,
+        tile_bounds,
+        clip_thresh,
+    )
+    cov3d = torch.where(is_close[:, None], 0.0, cov3d)
+    return cov3d, xys, depths, radii, conics, num_tiles_hit
+
+
+def project_gaussians_backward(
+    num_points: int,
+    means3d: Tensor,
+    scales: Tensor,
+    glob_scale: float,
+    quats: Tensor,
+    viewmat: Tensor,
+    projmat: Tensor,
+    fx: float,
+    fy: float,
+    cx: float,
+    cy: float,
+    img_height: int,
+    img_width: int,
+    cov3d: Tensor,
+    radii: Tensor,
+    conics: Tensor,
+    v_xy: Tensor,
+    v_depth: Tensor,
+    v_conic: Tensor,
+) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]:
+    return _torch_impl.project_gaussians_backward(
+        means3d,
+        scales,
+        glob_scale,
+        quats,
+        viewmat,
+        projmat,
+        fx,
+        fy,
+        (img_height, img_width),
+        cov3d,
+        radii,
+        conics,
+        v_xy,
+        v_depth,
+        v_conic,
+    )
+
+
+def project_gaussians_batched_forward(
+    num_points: int,
+    means3d: Tensor,
+    scales: Tensor,
+    glob_scale: float,
+    quats: Tensor,
+    viewmats: Tensor,
+    projmats: Tensor,
+    intrins: Tensor,
+    img_height: int,
+    img_width: int,
+    tile_bounds: Tuple[int, int, int],
+    clip_thresh: float,
+) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor, Tensor]:
+    # cov3d does not depend on the camera and is computed once for all of them
+    cov3d = _torch_impl.scale_rot_to_cov3d(scales, glob_scale, quats)
+    fx, fy, cx, cy = intrins[:, None, :].unbind(-1)
+    outputs = _project_cov3d(
+        means3d,
+        cov3d,
+        viewmats[:, None],
+        projmats[:, None],
+        fx,
+        fy,
+        cx,
+        cy,
+        img_height,
+        img_width,
+        tile_bounds,
+        clip_thresh,
+    )
+    return (cov3d,) + outputs[:-1]
+
+
+def project_gaussians_batched_backward(
+    num_points: int,
+    means3d: Tensor,
+    scales: Tensor,
+    glob_scale: float,
+    quats: Tensor,
+    viewmats: Tensor,
+    projmats: Tensor,
+    intrins: Tensor,
+    img_height: int,
+    img_width: int,
+    cov3d: Tensor,
+    radii: Tensor,
+    conics: Tensor,
+    v_xy: Tensor,
+    v_depth: Tensor,
+    v_conic: Tensor,
+) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]:
+    fx, fy, _, _ = intrins[:, None, :].unbind(-1)
+    viewmats = viewmats[:, None]
+    v_mean3d = _torch_impl.project_pix_vjp(
+        projmats[:, None], means3d, (img_width, img_height), v_xy
+    )
+    v_mean3d = v_mean3d + viewmats[..., 2, :3] * v_depth[..., None]
+    v_cov2d = _torch_impl.cov2d_to_conic_vjp(conics, v_conic)
+    v_cov3d, v_mean3d_cov = _torch_impl.project_cov3d_ewa_vjp(
+        means3d,
+        cov3d,
+        viewmats,
+        fx,
+        fy,
+        0.5 * img_width / fx,
+        0.5 * img_height / fy,
+        v_cov2d,
+    )
+
+    # only gaussians rendered by a camera get gradients from it, and the
+    # gradients of cov3d are summed over cameras before the single vjp to
+    # scales and rotations
+    mask = (radii > 0)[..., None]
+    v_cov2d = torch.where(mask, v_cov2d, 0.0)
+    v_cov3d = torch.where(mask, v_cov3d, 0.0).sum(0)
+    v_mean3d = torch.where(mask, v_mean3d + v_mean3d_cov, 0.0).sum(0)
+    v_scale, v_quat = _torch_impl.scale_rot_to_cov3d_vjp(
+        scales, glob_scale, quats, v_cov3d
+    )
+    return v_cov2d, v_cov3d, v_mean3d, v_scale, v_quat
+
+
+def compute_sh_forward(
+    num_points: int,
+    degree: int,
+    degrees_to_use: int,
+    viewdirs: Tensor,
+    coeffs: Tensor,
+) -> Tensor:
+    num_bases = (degrees_to_use + 1) ** 2
+    if degrees_to_use == 0:
+        return coeffs[:num_points, 0] * _torch_impl.SH_C0
+    colors = coeffs.new_empty((num_points, coeffs.shape[-1]))
+    for start in range(0, num_points, SH_CHUNK_SIZE):
+        end = min(start + SH_CHUNK_SIZE, num_points)
+        bases = _torch_impl.eval_sh_bases_rows(
+            degrees_to_use, torch.nn.functional.normalize(viewdirs[start:end], dim=-1)
+        )
+        torch.bmm(
+            bases.T[:, None], coeffs[start:end, :num_bases], out=colors[start:end, None]
+        )
+    return colors
+
+
+def compute_sh_backward(
+    num_points: int,
+    degree: int,
+    degrees_to_use: int,
+    viewdirs: Tensor,
+    v_colors: Tensor,
+) -> Tensor:
+    num_bases = (degrees_to_use + 1) ** 2
+    v_coeffs = v_colors.new_empty((num_points, (degree + 1) ** 2, v_colors.shape[-1]))
+    # bases above degrees_to_use do not contribute
+    v_coeffs[:, num_bases:] = 0.0
+    if degrees_to_use == 0:
+        torch.mul(v_colors[:num_points], _torch_impl.SH_C0, out=v_coeffs[:, 0])
+        return v_coeffs
+    for start in range(0, num_points, SH_CHUNK_SIZE):
+        end = min(start + SH_CHUNK_SIZE, num_points)
+        bases = _torch_impl.eval_sh_bases_rows(
+            degrees_to_use, torch.nn.functional.normalize(viewdirs[start:end], dim=-1)
+        )
+        torch.mul(
+            bases.T[:, :, None],
+            v_colors[start:end, None, :],
+            out=v_coeffs[start:end, :num_bases],
+        )
+    return v_coeffs
+
+
+def map_gaussian_to_intersects(
+    num_points: int,
+    num_intersects: int,
+    xys: Tensor,
+    depths: Tensor,
+    radii: Tensor,
+    cum_tiles_hit: Tensor,
+    tile_bounds: Tuple[int, int, int],
+) -> Tuple[Tensor, Tensor]:
+    return _torch_impl.map_gaussian_to_intersects(
+        num_points, xys, depths, radii, cum_tiles_hit, tile_bounds
+    )
+
+
+def get_tile_bin_edges(num_intersects: int, isect_ids_sorted: Tensor) -> Tensor:
+    return _torch_impl.get_tile_bin_edges(num_intersects, isect_ids_sorted)
+
+
+def rasterize_forward(
+    tile_bounds: Tuple[int, int, int],
+    block: Tuple[int, int, int],
+    img_size: Tuple[int, int, int],
+    gaussian_ids_sorted: Tensor,
+    tile_bins: Tensor,
+    xys: Tensor,
+    conics: Tensor,
+    colors: Tensor,
+    opacities: Tensor,
+    background: Tensor,
+) -> Tuple[Tensor, Tensor, Tensor]:
+    img_width, img_height = img_size[0], img_size[1]
+    out_img = torch.zeros(
+        (img_height, img_width, colors.shape[1]), dtype=xys.dtype, device=xys.device
+    )
+    final_Ts = torch.zeros((img_height, img_width), dtype=xys.dtype, device=xys.device)
+    final_idx = torch.zeros(
+        (img_height, img_width), dtype=torch.int32, device=xys.device
+    )
+    gaussian_ids_sorted = gaussian_ids_sorted.long()
+    opacities = opacities.reshape(-1)
+    num_tiles = tile_bounds[0] * tile_bounds[1]
+    tile_ranges = tile_bins.tolist()
+
+    def rasterize_unit(unit: range):
+        for tile_id in unit:
+            _torch_impl.rasterize_tile(
+                tile_id,
+                tile_bounds,
+                block,
+                tile_ranges[tile_id] if tile_id < len(tile_ranges) else (0, 0),
+                gaussian_ids_sorted,
+                xys,
+                conics,
+                colors,
+                opacities,
+                background,
+                out_img,
+                final_Ts,
+                final_idx,
+            )
+
+    # each tile writes its own block of pixels
+    run_units(rasterize_unit, tile_units(tile_bins, num_tiles))
+    return out_img, final_Ts, final_idx
+
+
+# the tile rasterizer handles any number of channels; final_idx always holds
+# the last contributing gaussian, as in the 3 channel kernel
+nd_rasterize_forward = rasterize_forward
+
+
+def rasterize_backward(
+    img_height: int,
+    img_width: int,
+    gaussian_ids_sorted: Tensor,
+    tile_bins: Tensor,
+    xys: Tensor,
+    conics: Tensor,
+    colors: Tensor,
+    opacities: Tensor,
+    background: Tensor,
+    final_Ts: Tensor,
+    final_idx: Tensor,
+    v_output: Tensor,
+    v_output_alpha: Tensor,
+) -> Tuple[Tensor, Tensor, Tensor, Tensor]:
+    BLOCK_X, BLOCK_Y = 16, 16
+    tile_bounds = (
+        (img_width + BLOCK_X - 1) // BLOCK_X,
+        (img_height + BLOCK_Y - 1) // BLOCK_Y,
+        1,
+    )
+    gaussian_ids_sorted = gaussian_ids_sorted.long()
+    opacities = opacities.reshape(-1)
+    num_tiles = min(tile_bounds[0] * tile_bounds[1], tile_bins.shape[0])
+    tile_ranges = tile_bins.tolist()
+
+    v_xy = torch.zeros_like(xys)
+    v_conic = torch.zeros_like(conics)
+    v_colors = torch.zeros_like(colors)
+    v_opacity = torch.zeros((opacities.shape[0], 1), dtype=xys.dtype, device=xys.device)
+    lock = threading.Lock()
+
+    def rasterize_unit_backward(unit: range):
+        # the bins of the tiles of a unit are contiguous, empty tiles aside
+        ranges = [tile_ranges[t] for t in unit if tile_ranges[t][0] < tile_ranges[t][1]]
+        if not ranges:
+            return
+        start, end = ranges[0][0], ranges[-1][1]
+        # gaussians span several tiles, so every unit accumulates the gradients
+        # of its own gaussians only, then adds them to those of the others
+        ids, local_ids = torch.unique(
+            gaussian_ids_sorted[start:end], return_inverse=True
+        )
+        grads = (
+            xys.new_zeros((len(ids), 2)),
+            conics.new_zeros((len(ids), 3)),
+            colors.new_zeros((len(ids), colors.shape[1])),
+            xys.new_zeros((len(ids), 1)),
+        )
+        # rows of the colors and opacities, which may be shared by views
+        rows = (ids, ids, ids % colors.shape[0], ids % opacities.shape[0])
+        local_inputs = tuple(
+            v.index_select(0, i) for v, i in zip((xys, conics, colors, opacities), rows)
+        )
+        for tile_id in unit:
+            _torch_impl.rasterize_tile_backward(
+                tile_id,
+                tile_bounds,
+                (BLOCK_X, BLOCK_Y, 1),
+                tile_ranges[tile_id],
+                local_ids,
+                *local_inputs,
+                background,
+                final_Ts,
+                final_idx,
+                v_output,
+                v_output_alpha,
+                *grads,
+                bin_offset=start,
+            )
+        with lock:
+            for v, i, grad in zip((v_xy, v_conic, v_colors, v_opacity), rows, grads):
+                v.index_add_(0, i, grad)
+
+    run_units(rasterize_unit_backward, tile_units(tile_bins, num_tiles))
+    return v_xy, v_conic, v_colors, v_opacity
+
+
+nd_rasterize_backward = rasterize_backward
@@ -0,0 +1,350 @@
+#include "backward.h"
+#include "helpers.h"
+#include <vector>
+
+// one iteration per gaussian; only gaussians with a positive radius were
+// rendered and get gradients, the outputs of the others stay zero
+template <typename T>
+void project_gaussians_backward_kernel(
+    const int num_points,
+    const T *__restrict__ means3d,
+    const T *__restrict__ scales,
+    const T glob_scale,
+    const T *__restrict__ quats,
+    const T *__restrict__ viewmat,
+    const T *__restrict__ projmat,
+    const T *intrins,
+    const int *img_size,
+    const T *__restrict__ cov3d,
+    const int *__restrict__ radii,
+    const T *__restrict__ conics,
+    const T *__restrict__ v_xy,
+    const T *__restrict__ v_depth,
+    const T *__restrict__ v_conic,
+    T *__restrict__ v_cov2d,
+    T *__restrict__ v_cov3d,
+    T *__restrict__ v_mean3d,
+    T *__restrict__ v_scale,
+    T *__restrict__ v_quat
+) {
+    const T fx = intrins[0];
+    const T fy = intrins[1];
+    const T W_img = T(img_size[0]);
+    const T H_img = T(img_size[1]);
+    const T lim_x = T(1.3) * T(0.5) * W_img / fx;
+    const T lim_y = T(1.3) * T(0.5) * H_img / fy;
+    const T W[9] = {
+        viewmat[0],
+        viewmat[1],
+        viewmat[2],
+        viewmat[4],
+        viewmat[5],
+        viewmat[6],
+        viewmat[8],
+        viewmat[9],
+        viewmat[10]
+    };
+
+#pragma omp parallel for schedule(static) num_threads(gsplat_num_threads())
+    for (int idx = 0; idx < num_points; ++idx) {
+        if (radii[idx] <= 0) {
+            continue;
+        }
+        const T *p = &means3d[3 * idx];
+
+        // gradient of the pixel position and the depth wrt the mean
+        T *v_mean = &v_mean3d[3 * idx];
+        project_pix_vjp(projmat, p, W_img, H_img, &v_xy[2 * idx], v_mean);
+        for (int k = 0; k < 3; ++k) {
+            v_mean[k] += viewmat[8 + k] * v_depth[idx];
+        }
+
+        // conic = inverse(cov2d): v_cov2d = -X G X, with G the symmetric
+        // gradient of the conic, whose off diagonal entry is counted twice
+        const T *X = &conics[3 * idx];
+        const T *vc = &v_conic[3 * idx];
+        const T G[4] = {vc[0], T(0.5) * vc[1], T(0.5) * vc[1], vc[2]};
+        const T Xm[4] = {X[0], X[1], X[1], X[2]};
+        T XG[4], vS[4];
+        matmul(Xm, G, XG, 2, 2, 2);
+        matmul(XG, Xm, vS, 2, 2, 2);
+        T *v_c2 = &v_cov2d[3 * idx];
+        v_c2[0] = -vS[0];
+        v_c2[1] = -T(2) * vS[1];
+        v_c2[2] = -vS[3];
+
+        // through the ewa projection, t clipped to the widened fov
+        T t[3];
+        transform_4x3(viewmat, p, t);
+        const T txtz = t[0] / t[2];
+        const T tytz = t[1] / t[2];
+        const bool clip_x = std::abs(txtz) > lim_x;
+        const bool clip_y = std::abs(tytz) > lim_y;
+        const T ctxtz = std::min(lim_x, std::max(-lim_x, txtz));
+        const T ctytz = std::min(lim_y, std::max(-lim_y, tytz));
+        const T tx = t[2] * ctxtz;
+        const T ty = t[2] * ctytz;
+        const T rz = T(1) / t[2];
+        const T rz2 = rz * rz;
+        const T rz3 = rz2 * rz;
+        const T J[6] = {fx * rz, 0, -fx * tx * rz2, 0, fy * rz, -fy * ty * rz2};
+        T JW[6];
+        matmul(J, W, JW, 2, 3, 3);
+
+        T V[9];
+        unpack_cov3d(&cov3d[6 * idx], V);
+        const T vC[4] = {v_c2[0], T(0.5) * v_c2[1], T(0.5) * v_c2[1], v_c2[2]};
+
+        // v_V = JW^T vC JW
+        T vC_JW[6], v_V[9];
+        matmul(vC, JW, vC_JW, 2, 2, 3);
+        matmul_tn(JW, vC_JW, v_V, 3, 2, 3);
+        // v_JW = 2 vC JW V, v_J = v_JW W^T
+        T v_JW[6], v_J[6];
+        matmul(vC_JW, V, v_JW, 2, 3, 3);
+        for (int k = 0; k < 6; ++k) {
+            v_JW[k] *= T(2);
+        }
+        matmul_nt(v_JW, W, v_J, 2, 3, 3);
+
+        T v_tx = -fx * rz2 * v_J[2];
+        T v_ty = -fy * rz2 * v_J[5];
+        T v_tz = -fx * rz2 * v_J[0] - fy * rz2 * v_J[4] +
+                 T(2) * fx * tx * rz3 * v_J[2] + T(2) * fy * ty * rz3 * v_J[5];
+        if (clip_x) {
+            v_tz += ctxtz * v_tx;
+            v_tx = T(0);
+        }
+        if (clip_y) {
+            v_tz += ctytz * v_ty;
+            v_ty = T(0);
+        }
+        const T v_t[3] = {v_tx, v_ty, v_tz};
+        for (int k = 0; k < 3; ++k) {
+            v_mean[k] += W[k] * v_t[0] + W[3 + k] * v_t[1] + W[6 + k] * v_t[2];
+        }
+
+        // packed cov3d: off diagonal entries stand for both halves
+        T *v_c3 = &v_cov3d[6 * idx];
+        v_c3[0] = v_V[0];
+        v_c3[1] = T(2) * v_V[1];
+        v_c3[2] = T(2) * v_V[2];
+        v_c3[3] = v_V[4];
+        v_c3[4] = T(2) * v_V[5];
+        v_c3[5] = v_V[8];
+
+        // through cov3d = M M^T with M = R S
+        const T *quat = &quats[4 * idx];
+        const T *scale = &scales[3 * idx];
+        T R[9], M[9], v_M[9];
+        quat_to_rotmat(quat, R);
+        const T S[3] = {
+            glob_scale * scale[0], glob_scale * scale[1], glob_scale * scale[2]
+        };
+        for (int i = 0; i < 3; ++i) {
+            for (int j = 0; j < 3; ++j) {
+                M[3 * i + j] = R[3 * i + j] * S[j];
+            }
+        }
+        matmul(v_V, M, v_M, 3, 3, 3);
+        T v_R[9];
+        for (int j = 0; j < 3; ++j) {
+            T acc = T(0);
+            for (int i = 0; i < 3; ++i) {
+                v_M[3 * i + j] *= T(2);
+                acc += R[3 * i + j] * v_M[3 * i + j];
+                v_R[3 * i + j] = v_M[3 * i + j] * S[j];
+            }
+            v_scale[3 * idx + j] = glob_scale * acc;
+        }
+        quat_to_rotmat_vjp(quat, v_R, &v_quat[4 * idx]);
+    }
+}
+
+// one iteration per tile. Each pixel walks its gaussians back to front,
+// starting at final_index and recovering the transmittance from final_Ts.
+// Gradients are summed per tile in local buffers, then added to the outputs
+// once per gaussian and tile. Shared colors and opacities, see
+// rasterize_forward_kernel, get the gradients of every view.
+template <typename T>
+void rasterize_backward_kernel(
+    const int *tile_bounds,
+    const int *img_size,
+    const int channels,
+    const int num_bins,
+    const int num_colors,
+    const int num_opacities,
+    const int32_t *__restrict__ gaussian_ids_sorted,
+    const int32_t *__restrict__ tile_bins,
+    const T *__restrict__ xys,
+    const T *__restrict__ conics,
+    const T *__restrict__ colors,
+    const T *__restrict__ opacities,
+    const T *__restrict__ background,
+    const T *__restrict__ final_Ts,
+    const int *__restrict__ final_index,
+    const T *__restrict__ v_output,
+    const T *__restrict__ v_output_alpha,
+    T *__restrict__ v_xy,
+    T *__restrict__ v_conic,
+    T *__restrict__ v_colors,
+    T *__restrict__ v_opacity
+) {
+    const int num_tiles = std::min(tile_bounds[0] * tile_bounds[1], num_bins);
+
+#pragma omp parallel num_threads(gsplat_num_threads())
+    {
+        std::vector<T> v_xy_local, v_conic_local, v_colors_local, v_opacity_local;
+
+#pragma omp for schedule(dynamic, 1)
+        for (int tile_id = 0; tile_id < num_tiles; ++tile_id) {
+            const int range_start = tile_bins[2 * tile_id];
+            const int range_end = tile_bins[2 * tile_id + 1];
+            const int count = range_end - range_start;
+            if (count <= 0) {
+                continue;
+            }
+            const int tile_y = tile_id / tile_bounds[0];
+            const int tile_x = tile_id % tile_bounds[0];
+            const int i0 = tile_y * BLOCK_Y;
+            const int j0 = tile_x * BLOCK_X;
+            const int i1 = std::min(i0 + BLOCK_Y, img_size[1]);
+            const int j1 = std::min(j0 + BLOCK_X, img_size[0]);
+
+            v_xy_local.assign(2 * count, T(0));
+            v_conic_local.assign(3 * count, T(0));
+            v_colors_local.assign(channels * count, T(0));
+            v_opacity_local.assign(count, T(0));
+
+            for (int i = i0; i < i1; ++i) {
+                for (int j = j0; j < j1; ++j) {
+                    const T px = (T)j;
+                    const T py = (T)i;
+                    const int pix_id = i * img_size[0] + j;
+                    const T *v_out = &v_output[channels * pix_id];
+                    const T T_final = final_Ts[pix_id];
+
+                    // every term involving the background only depends on the pixel
+                    T v_bg = T(0);
+                    for (int c = 0; c < channels; ++c) {
+                        v_bg += v_out[c] * background[c];
+                    }
+                    v_bg = T_final * (v_bg - v_output_alpha[pix_id]);
+
+                    T T_ = T_final;
+                    // sum of rgb * alpha * T behind the current gaussian, dotted
+                    // with v_out
+                    T S = T(0);
+                    const int bin_final =
+                        std::min(final_index[pix_id], range_end - 1);
+                    for (int b = bin_final; b >= range_start; --b) {
+                        const int32_t g = gaussian_ids_sorted[b];
+                        const T *conic = &conics[3 * g];
+                        const T dx = xys[2 * g] - px;
+                        const T dy = xys[2 * g + 1] - py;
+                        const T sigma =
+                            T(0.5) * (conic[0] * dx * dx + conic[2] * dy * dy) +
+                            conic[1] * dx * dy;
+                        const T vis = std::exp(-sigma);
+                        const T opac = opacities[g % num_opacities];
+                        const T alpha = std::min(T(0.999), opac * vis);
+                        if (sigma < T(0) || alpha < T(1) / T(255)) {
+                            continue;
+                        }
+                        // transmittance in front of this gaussian
+                        const T ra = T(1) / (T(1) - alpha);
+                        T_ *= ra;
+                        const T fac = alpha * T_;
+                        const T *rgb = &colors[channels * (g % num_colors)];
+                        T rgb_v_out = T(0);
+                        for (int c = 0; c < channels; ++c) {
+                            rgb_v_out += rgb[c] * v_out[c];
+                        }
+                        const T v_alpha = rgb_v_out * T_ - (S + v_bg) * ra;
+                        S += fac * rgb_v_out;
+                        const T v_sigma = -opac * vis * v_alpha;
+
+                        const int k = b - range_start;
+                        for (int c = 0; c < channels; ++c) {
+                            v_colors_local[channels * k + c] += fac * v_out[c];
+                        }
+                        v_opacity_local[k] += vis * v_alpha;
+                        v_conic_local[3 * k] += T(0.5) * v_sigma * dx * dx;
+                        v_conic_local[3 * k + 1] += v_sigma * dx * dy;
+                        v_conic_local[3 * k + 2] += T(0.5) * v_sigma * dy * dy;
+                        v_xy_local[2 * k] +=
+                            v_sigma * (conic[0] * dx + conic[1] * dy);
+                        v_xy_local[2 * k + 1] +=
+                            v_sigma * (conic[1] * dx + conic[2] * dy);
+                    }
+                }
+            }
+
+            // a gaussian appears at most once per tile
+            for (int k = 0; k < count; ++k) {
+                const int32_t g = gaussian_ids_sorted[range_start + k];
+                const int32_t g_rgb = g % num_colors;
+                for (int c = 0; c < channels; ++c) {
+                    atomic_add(&v_colors[channels * g_rgb + c], v_colors_local[channels * k + c]);
+                }
+                atomic_add(&v_opacity[g % num_opacities], v_opacity_local[k]);
+                for (int c = 0; c < 3; ++c) {
+                    atomic_add(&v_conic[3 * g + c], v_conic_local[3 * k + c]);
+                }
+                for (int c = 0; c < 2; ++c) {
+                    atomic_add(&v_xy[2 * g + c], v_xy_local[2 * k + c]);
+                }
+            }
+        }
+    }
+}
+
+#define INSTANTIATE_BACKWARD(T)                                                \
+    template void project_gaussians_backward_kernel<T>(                        \
+        const int,                                                             \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T,                                                               \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *,                                                             \
+        const int *,                                                           \
+        const T *__restrict__,                                                 \
+        const int *__restrict__,                                               \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        T *__restrict__,                                                       \
+        T *__restrict__,                                                       \
+        T *__restrict__,                                                       \
+        T *__restrict__,                                                       \
+        T *__restrict__                                                        \
+    );                                                                         \
+    template void rasterize_backward_kernel<T>(                                \
+        const int *,                                                           \
+        const int *,                                                           \
+        const int,                                                             \
+        const int,                                                             \
+        const int,                                                             \
+        const int,                                                             \
+        const int32_t *__restrict__,                                           \
+        const int32_t *__restrict__,                                           \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const int *__restrict__,                                               \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        T *__restrict__,                                                       \
+        T *__restrict__,                                                       \
+        T *__restrict__,                                                       \
+        T *__restrict__                                                        \
+    );
+
+INSTANTIATE_BACKWARD(float)
+INSTANTIATE_BACKWARD(double)
@@ -0,0 +1,53 @@
+#pragma once
+#include <cstdint>
+
+// gradients of the 2d gaussian parameters wrt the 3d gaussian parameters
+template <typename T>
+void project_gaussians_backward_kernel(
+    const int num_points,
+    const T *__restrict__ means3d,
+    const T *__restrict__ scales,
+    const T glob_scale,
+    const T *__restrict__ quats,
+    const T *__restrict__ viewmat,
+    const T *__restrict__ projmat,
+    const T *intrins,
+    const int *img_size,
+    const T *__restrict__ cov3d,
+    const int *__restrict__ radii,
+    const T *__restrict__ conics,
+    const T *__restrict__ v_xy,
+    const T *__restrict__ v_depth,
+    const T *__restrict__ v_conic,
+    T *__restrict__ v_cov2d,
+    T *__restrict__ v_cov3d,
+    T *__restrict__ v_mean3d,
+    T *__restrict__ v_scale,
+    T *__restrict__ v_quat
+);
+
+// gradients of the image with any number of channels wrt the 2d gaussians
+template <typename T>
+void rasterize_backward_kernel(
+    const int *tile_bounds,
+    const int *img_size,
+    const int channels,
+    const int num_bins,
+    const int num_colors,
+    const int num_opacities,
+    const int32_t *__restrict__ gaussian_ids_sorted,
+    const int32_t *__restrict__ tile_bins,
+    const T *__restrict__ xys,
+    const T *__restrict__ conics,
+    const T *__restrict__ colors,
+    const T *__restrict__ opacities,
+    const T *__restrict__ background,
+    const T *__restrict__ final_Ts,
+    const int *__restrict__ final_index,
+    const T *__restrict__ v_output,
+    const T *__restrict__ v_output_alpha,
+    T *__restrict__ v_xy,
+    T *__restrict__ v_conic,
+    T *__restrict__ v_colors,
+    T *__restrict__ v_opacity
+);
@@ -0,0 +1,560 @@
+#include "backward.h"
+#include "bindings.h"
+#include "forward.h"
+#include "helpers.h"
+#include "sh.h"
+#include <cstdio>
+#include <iostream>
+#include <math.h>
+#include <torch/extension.h>
+#include <tuple>
+
+static int num_threads_ = 0;
+
+void set_num_threads(const int num_threads) { num_threads_ = num_threads; }
+
+int gsplat_num_threads() {
+    if (num_threads_ > 0) {
+        return num_threads_;
+    }
+#ifdef _OPENMP
+    return omp_get_max_threads();
+#else
+    return 1;
+#endif
+}
+
+std::tuple<
+    torch::Tensor, // output conics
+    torch::Tensor> // output radii
+compute_cov2d_bounds_tensor(const int num_pts, torch::Tensor &covs2d) {
+    CHECK_CPU(covs2d);
+    torch::Tensor covs2d_c = covs2d.contiguous();
+    torch::Tensor conics = torch::zeros({num_pts, covs2d.size(1)}, covs2d.options());
+    torch::Tensor radii = torch::zeros({num_pts, 1}, covs2d.options());
+
+    AT_DISPATCH_FLOATING_TYPES(covs2d.scalar_type(), "compute_cov2d_bounds", [&] {
+        compute_cov2d_bounds_kernel<scalar_t>(
+            num_pts,
+            covs2d_c.data_ptr<scalar_t>(),
+            conics.data_ptr<scalar_t>(),
+            radii.data_ptr<scalar_t>()
+        );
+    });
+    return std::make_tuple(conics, radii);
+}
+
+torch::Tensor compute_sh_forward_tensor(
+    const unsigned num_points,
+    const unsigned degree,
+    const unsigned degrees_to_use,
+    torch::Tensor &viewdirs,
+    torch::Tensor &coeffs
+) {
+    CHECK_CPU(viewdirs);
+    CHECK_CPU(coeffs);
+    unsigned num_bases = num_sh_bases(degree);
+    if (coeffs.ndimension() != 3 || coeffs.size(0) != num_points ||
+        coeffs.size(1) != num_bases) {
+        AT_ERROR("coeffs must have dimensions (N, D, C)");
+    }
+    const unsigned channels = coeffs.size(2);
+    torch::Tensor coeffs_c = coeffs.contiguous();
+    torch::Tensor viewdirs_c = viewdirs.to(coeffs.scalar_type()).contiguous();
+    torch::Tensor colors = torch::empty({num_points, channels}, coeffs.options());
+
+    AT_DISPATCH_FLOATING_TYPES(coeffs.scalar_type(), "compute_sh_forward", [&] {
+        compute_sh_forward_kernel<scalar_t>(
+            num_points,
+            degree,
+            degrees_to_use,
+            channels,
+            viewdirs_c.data_ptr<scalar_t>(),
+            coeffs_c.data_ptr<scalar_t>(),
+            colors.data_ptr<scalar_t>()
+        );
+    });
+    return colors;
+}
+
+torch::Tensor compute_sh_backward_tensor(
+    const unsigned num_points,
+    const unsigned degree,
+    const unsigned degrees_to_use,
+    torch::Tensor &viewdirs,
+    torch::Tensor &v_colors
+) {
+    CHECK_CPU(viewdirs);
+    CHECK_CPU(v_colors);
+    if (viewdirs.ndimension() != 2 || viewdirs.size(0) != num_points ||
+        viewdirs.size(1) != 3) {
+        AT_ERROR("viewdirs must have dimensions (N, 3)");
+    }
+    if (v_colors.ndimension() != 2 || v_colors.size(0) != num_points) {
+        AT_ERROR("v_colors must have dimensions (N, C)");
+    }
+    const unsigned num_bases = num_sh_bases(degree);
+    const unsigned channels = v_colors.size(1);
+    torch::Tensor v_colors_c = v_colors.contiguous();
+    torch::Tensor viewdirs_c = viewdirs.to(v_colors.scalar_type()).contiguous();
+    // every value is written by the kernel
+    torch::Tensor v_coeffs =
+        torch::empty({num_points, num_bases, channels}, v_colors.options());
+
+    AT_DISPATCH_FLOATING_TYPES(v_colors.scalar_type(), "compute_sh_backward", [&] {
+        compute_sh_backward_kernel<scalar_t>(
+            num_points,
+            degree,
+            degrees_to_use,
+            channels,
+            viewdirs_c.data_ptr<scalar_t>(),
+            v_colors_c.data_ptr<scalar_t>(),
+            v_coeffs.data_ptr<scalar_t>()
+        );
+    });
+    return v_coeffs;
+}
+
+
+std::tuple<
+    torch::Tensor,
+    torch::Tensor,
+    torch::Tensor,
+    torch::Tensor,
+    torch::Tensor,
+    torch::Tensor>
+project_gaussians_forward_tensor(
+    const int num_points,
+    torch::Tensor &means3d,
+    torch::Tensor &scales,
+    const float glob_scale,
+    torch::Tensor &quats,
+    torch::Tensor &viewmat,
+    torch::Tensor &projmat,
+    const float fx,
+    const float fy,
+    const float cx,
+    const float cy,
+    const unsigned img_height,
+    const unsigned img_width,
+    const std::tuple<int, int, int> tile_bounds,
+    const float clip_thresh
+) {
+    CHECK_CPU(means3d);
+    const auto dtype = means3d.scalar_type();
+    const int img_size[2] = {(int)img_width, (int)img_height};
+    const int tile_bounds_[2] = {std::get<0>(tile_bounds), std::get<1>(tile_bounds)};
+
+    torch::Tensor means3d_c = means3d.contiguous();
+    torch::Tensor scales_c = scales.to(dtype).contiguous();
+    torch::Tensor quats_c = quats.to(dtype).contiguous();
+    torch::Tensor viewmat_c = viewmat.to(dtype).contiguous();
+    torch::Tensor projmat_c = projmat.to(dtype).contiguous();
+
+    // Triangular covariance.
+    torch::Tensor cov3d_d = torch::zeros({num_points, 6}, means3d.options());
+    torch::Tensor xys_d = torch::zeros({num_points, 2}, means3d.options());
+    torch::Tensor depths_d = torch::zeros({num_points}, means3d.options());
+    torch::Tensor radii_d =
+        torch::zeros({num_points}, means3d.options().dtype(torch::kInt32));
+    torch::Tensor conics_d = torch::zeros({num_points, 3}, means3d.options());
+    torch::Tensor num_tiles_hit_d =
+        torch::zeros({num_points}, means3d.options().dtype(torch::kInt32));
+
+    AT_DISPATCH_FLOATING_TYPES(dtype, "project_gaussians_forward", [&] {
+        const scalar_t intrins[4] = {fx, fy, cx, cy};
+        project_gaussians_forward_kernel<scalar_t>(
+            num_points,
+            means3d_c.data_ptr<scalar_t>(),
+            scales_c.data_ptr<scalar_t>(),
+            glob_scale,
+            quats_c.data_ptr<scalar_t>(),
+            viewmat_c.data_ptr<scalar_t>(),
+            projmat_c.data_ptr<scalar_t>(),
+            intrins,
+            img_size,
+            tile_bounds_,
+            clip_thresh,
+            // Outputs.
+            cov3d_d.data_ptr<scalar_t>(),
+            xys_d.data_ptr<scalar_t>(),
+            depths_d.data_ptr<scalar_t>(),
+            radii_d.data_ptr<int>(),
+            conics_d.data_ptr<scalar_t>(),
+            num_tiles_hit_d.data_ptr<int32_t>()
+        );
+    });
+
+    return std::make_tuple(
+        cov3d_d, xys_d, depths_d, radii_d, conics_d, num_tiles_hit_d
+    );
+}
+
+std::tuple<
+    torch::Tensor,
+    torch::Tensor,
+    torch::Tensor,
+    torch::Tensor,
+    torch::Tensor>
+project_gaussians_backward_tensor(
+    const int num_points,
+    torch::Tensor &means3d,
+    torch::Tensor &scales,
+    const float glob_scale,
+    torch::Tensor &quats,
+    torch::Tensor &viewmat,
+    torch::Tensor &projmat,
+    const float fx,
+    const float fy,
+    const float cx,
+    const float cy,
+    const unsigned img_height,
+    const unsigned img_width,
+    torch::Tensor &cov3d,
+    torch::Tensor &radii,
+    torch::Tensor &conics,
+    torch::Tensor &v_xy,
+    torch::Tensor &v_depth,
+    torch::Tensor &v_conic
+) {
+    CHECK_CPU(means3d);
+    const auto dtype = means3d.scalar_type();
+    const int img_size[2] = {(int)img_width, (int)img_height};
+
+    torch::Tensor means3d_c = means3d.contiguous();
+    torch::Tensor scales_c = scales.to(dtype).contiguous();
+    torch::Tensor quats_c = quats.to(dtype).contiguous();
+    torch::Tensor viewmat_c = viewmat.to(dtype).contiguous();
+    torch::Tensor projmat_c = projmat.to(dtype).contiguous();
+    torch::Tensor cov3d_c = cov3d.to(dtype).contiguous();
+    torch::Tensor radii_c = radii.to(torch::kInt32).contiguous();
+    torch::Tensor conics_c = conics.to(dtype).contiguous();
+    torch::Tensor v_xy_c = v_xy.to(dtype).contiguous();
+    torch::Tensor v_depth_c = v_depth.to(dtype).contiguous();
+    torch::Tensor v_conic_c = v_conic.to(dtype).contiguous();
+
+    // Triangular covariance.
+    torch::Tensor v_cov2d = torch::zeros({num_points, 3}, means3d.options());
+    torch::Tensor v_cov3d = torch::zeros({num_points, 6}, means3d.options());
+    torch::Tensor v_mean3d = torch::zeros({num_points, 3}, means3d.options());
+    torch::Tensor v_scale = torch::zeros({num_points, 3}, means3d.options());
+    torch::Tensor v_quat = torch::zeros({num_points, 4}, means3d.options());
+
+    AT_DISPATCH_FLOATING_TYPES(dtype, "project_gaussians_backward", [&] {
+        const scalar_t intrins[4] = {fx, fy, cx, cy};
+        project_gaussians_backward_kernel<scalar_t>(
+            num_points,
+            means3d_c.data_ptr<scalar_t>(),
+            scales_c.data_ptr<scalar_t>(),
+            glob_scale,
+            quats_c.data_ptr<scalar_t>(),
+            viewmat_c.data_ptr<scalar_t>(),
+            projmat_c.data_ptr<scalar_t>(),
+            intrins,
+            img_size,
+            cov3d_c.data_ptr<scalar_t>(),
+            radii_c.data_ptr<int>(),
+            conics_c.data_ptr<scalar_t>(),
+            v_xy_c.data_ptr<scalar_t>(),
+            v_depth_c.data_ptr<scalar_t>(),
+            v_conic_c.data_ptr<scalar_t>(),
+            // Outputs.
+            v_cov2d.data_ptr<scalar_t>(),
+            v_cov3d.data_ptr<scalar_t>(),
+            v_mean3d.data_ptr<scalar_t>(),
+            v_scale.data_ptr<scalar_t>(),
+            v_quat.data_ptr<scalar_t>()
+        );
+    });
+
+    return std::make_tuple(v_cov2d, v_cov3d, v_mean3d, v_scale, v_quat);
+}
+
+std::tuple<torch::Tensor, torch::Tensor> map_gaussian_to_intersects_tensor(
+    const int num_points,
+    const int num_intersects,
+    const torch::Tensor &xys,
+    const torch::Tensor &depths,
+    const torch::Tensor &radii,
+    const torch::Tensor &cum_tiles_hit,
+    const std::tuple<int, int, int> tile_bounds
+) {
+    CHECK_CPU(xys);
+    CHECK_CPU(depths);
+    CHECK_CPU(radii);
+    CHECK_CPU(cum_tiles_hit);
+    const int tile_bounds_[2] = {std::get<0>(tile_bounds), std::get<1>(tile_bounds)};
+
+    torch::Tensor xys_c = xys.contiguous();
+    // the depth bits of the sort keys are always those of the float32 depth
+    torch::Tensor depths_c = depths.to(torch::kFloat32).contiguous();
+    torch::Tensor radii_c = radii.to(torch::kInt32).contiguous();
+    torch::Tensor cum_tiles_hit_c = cum_tiles_hit.to(torch::kInt32).contiguous();
+
+    torch::Tensor gaussian_ids_unsorted =
+        torch::zeros({num_intersects}, xys.options().dtype(torch::kInt32));
+    torch::Tensor isect_ids_unsorted =
+        torch::zeros({num_intersects}, xys.options().dtype(torch::kInt64));
+
+    AT_DISPATCH_FLOATING_TYPES(xys.scalar_type(), "map_gaussian_to_intersects", [&] {
+        map_gaussian_to_intersects_kernel<scalar_t>(
+            num_points,
+            xys_c.data_ptr<scalar_t>(),
+            depths_c.data_ptr<float>(),
+            radii_c.data_ptr<int>(),
+            cum_tiles_hit_c.data_ptr<int32_t>(),
+            tile_bounds_,
+            // Outputs.
+            isect_ids_unsorted.data_ptr<int64_t>(),
+            gaussian_ids_unsorted.data_ptr<int32_t>()
+        );
+    });
+
+    return std::make_tuple(isect_ids_unsorted, gaussian_ids_unsorted);
+}
+
+torch::Tensor get_tile_bin_edges_tensor(
+    int num_intersects, const torch::Tensor &isect_ids_sorted
+) {
+    CHECK_INPUT(isect_ids_sorted);
+    // one bin per tile up to the last tile with an intersection
+    const int num_tiles =
+        num_intersects > 0
+            ? (int)(isect_ids_sorted[num_intersects - 1].item<int64_t>() >> 32) + 1
+            : 0;
+    torch::Tensor tile_bins = torch::zeros(
+        {num_tiles, 2}, isect_ids_sorted.options().dtype(torch::kInt32)
+    );
+    get_tile_bin_edges_kernel(
+        num_intersects,
+        isect_ids_sorted.data_ptr<int64_t>(),
+        tile_bins.data_ptr<int32_t>()
+    );
+    return tile_bins;
+}
+
+std::tuple<torch::Tensor, torch::Tensor, torch::Tensor>
+nd_rasterize_forward_tensor(
+    const std::tuple<int, int, int> tile_bounds,
+    const std::tuple<int, int, int> block,
+    const std::tuple<int, int, int> img_size,
+    const torch::Tensor &gaussian_ids_sorted,
+    const torch::Tensor &tile_bins,
+    const torch::Tensor &xys,
+    const torch::Tensor &conics,
+    const torch::Tensor &colors,
+    const torch::Tensor &opacities,
+    const torch::Tensor &background
+) {
+    CHECK_CPU(xys);
+    TORCH_CHECK(
+        std::get<0>(block) == BLOCK_X && std::get<1>(block) == BLOCK_Y,
+        "block must be (",
+        BLOCK_X,
+        ", ",
+        BLOCK_Y,
+        ", 1)"
+    );
+    const auto dtype = xys.scalar_type();
+    const int tile_bounds_[2] = {std::get<0>(tile_bounds), std::get<1>(tile_bounds)};
+    const int img_size_[2] = {std::get<0>(img_size), std::get<1>(img_size)};
+    const int channels = colors.size(1);
+
+    torch::Tensor gaussian_ids_c = gaussian_ids_sorted.to(torch::kInt32).contiguous();
+    torch::Tensor tile_bins_c = tile_bins.to(torch::kInt32).contiguous();
+    torch::Tensor xys_c = xys.contiguous();
+    torch::Tensor conics_c = conics.to(dtype).contiguous();
+    torch::Tensor colors_c = colors.to(dtype).contiguous();
+    torch::Tensor opacities_c = opacities.to(dtype).contiguous();
+    torch::Tensor background_c = background.to(dtype).contiguous();
+
+    torch::Tensor out_img =
+        torch::zeros({img_size_[1], img_size_[0], channels}, xys.options());
+    torch::Tensor final_Ts = torch::zeros({img_size_[1], img_size_[0]}, xys.options());
+    torch::Tensor final_idx = torch::zeros(
+        {img_size_[1], img_size_[0]}, xys.options().dtype(torch::kInt32)
+    );
+
+    AT_DISPATCH_FLOATING_TYPES(dtype, "rasterize_forward", [&] {
+        rasterize_forward_kernel<scalar_t>(
+            tile_bounds_,
+            img_size_,
+            channels,
+            tile_bins_c.size(0),
+            colors_c.size(0),
+            opacities_c.size(0),
+            gaussian_ids_c.data_ptr<int32_t>(),
+            tile_bins_c.data_ptr<int32_t>(),
+            xys_c.data_ptr<scalar_t>(),
+            conics_c.data_ptr<scalar_t>(),
+            colors_c.data_ptr<scalar_t>(),
+            opacities_c.data_ptr<scalar_t>(),
+            final_Ts.data_ptr<scalar_t>(),
+            final_idx.data_ptr<int>(),
+            out_img.data_ptr<scalar_t>(),
+            background_c.data_ptr<scalar_t>()
+        );
+    });
+
+    return std::make_tuple(out_img, final_Ts, final_idx);
+}
+
+// the kernel handles any number of channels and final_idx always holds the
+// last contributing gaussian, so both entry points are the same
+std::tuple<torch::Tensor, torch::Tensor, torch::Tensor>
+rasterize_forward_tensor(
+    const std::tuple<int, int, int> tile_bounds,
+    const std::tuple<int, int, int> block,
+    const std::tuple<int, int, int> img_size,
+    const torch::Tensor &gaussian_ids_sorted,
+    const torch::Tensor &tile_bins,
+    const torch::Tensor &xys,
+    const torch::Tensor &conics,
+    const torch::Tensor &colors,
+    const torch::Tensor &opacities,
+    const torch::Tensor &background
+) {
+    return nd_rasterize_forward_tensor(
+        tile_bounds,
+        block,
+        img_size,
+        gaussian_ids_sorted,
+        tile_bins,
+        xys,
+        conics,
+        colors,
+        opacities,
+        background
+    );
+}
+
+std::
+    tuple<
+        torch::Tensor, // dL_dxy
+        torch::Tensor, // dL_dconic
+        torch::Tensor, // dL_dcolors
+        torch::Tensor  // dL_dopacity
+        >
+    nd_rasterize_backward_tensor(
+        const unsigned img_height,
+        const unsigned img_width,
+        const torch::Tensor &gaussians_ids_sorted,
+        const torch::Tensor &tile_bins,
+        const torch::Tensor &xys,
+        const torch::Tensor &conics,
+        const torch::Tensor &colors,
+        const torch::Tensor &opacities,
+        const torch::Tensor &background,
+        const torch::Tensor &final_Ts,
+        const torch::Tensor &final_idx,
+        const torch::Tensor &v_output, // dL_dout_color
+        const torch::Tensor &v_output_alpha // dL_dout_alpha
+    ) {
+
+    CHECK_CPU(xys);
+    CHECK_CPU(colors);
+
+    if (xys.ndimension() != 2 || xys.size(1) != 2) {
+        AT_ERROR("xys must have dimensions (num_points, 2)");
+    }
+
+    if (colors.ndimension() != 2) {
+        AT_ERROR("colors must have 2 dimensions");
+    }
+
+    const auto dtype = xys.scalar_type();
+    const int num_points = xys.size(0);
+    const int tile_bounds[2] = {
+        (int)(img_width + BLOCK_X - 1) / BLOCK_X,
+        (int)(img_height + BLOCK_Y - 1) / BLOCK_Y
+    };
+    const int img_size[2] = {(int)img_width, (int)img_height};
+    const int channels = colors.size(1);
+
+    torch::Tensor gaussian_ids_c = gaussians_ids_sorted.to(torch::kInt32).contiguous();
+    torch::Tensor tile_bins_c = tile_bins.to(torch::kInt32).contiguous();
+    torch::Tensor xys_c = xys.contiguous();
+    torch::Tensor conics_c = conics.to(dtype).contiguous();
+    torch::Tensor colors_c = colors.to(dtype).contiguous();
+    torch::Tensor opacities_c = opacities.to(dtype).contiguous();
+    torch::Tensor background_c = background.to(dtype).contiguous();
+    torch::Tensor final_Ts_c = final_Ts.to(dtype).contiguous();
+    torch::Tensor final_idx_c = final_idx.to(torch::kInt32).contiguous();
+    torch::Tensor v_output_c = v_output.to(dtype).contiguous();
+    torch::Tensor v_output_alpha_c = v_output_alpha.to(dtype).contiguous();
+
+    torch::Tensor v_xy = torch::zeros({num_points, 2}, xys.options());
+    torch::Tensor v_conic = torch::zeros({num_points, 3}, xys.options());
+    // shared colors and opacities keep their rows, see rasterize_forward_kernel
+    torch::Tensor v_colors =
+        torch::zeros({colors.size(0), channels}, xys.options());
+    torch::Tensor v_opacity =
+        torch::zeros({opacities.size(0), 1}, xys.options());
+
+    AT_DISPATCH_FLOATING_TYPES(dtype, "rasterize_backward", [&] {
+        rasterize_backward_kernel<scalar_t>(
+            tile_bounds,
+            img_size,
+            channels,
+            tile_bins_c.size(0),
+            colors_c.size(0),
+            opacities_c.size(0),
+            gaussian_ids_c.data_ptr<int32_t>(),
+            tile_bins_c.data_ptr<int32_t>(),
+            xys_c.data_ptr<scalar_t>(),
+            conics_c.data_ptr<scalar_t>(),
+            colors_c.data_ptr<scalar_t>(),
+            opacities_c.data_ptr<scalar_t>(),
+            background_c.data_ptr<scalar_t>(),
+            final_Ts_c.data_ptr<scalar_t>(),
+            final_idx_c.data_ptr<int>(),
+            v_output_c.data_ptr<scalar_t>(),
+            v_output_alpha_c.data_ptr<scalar_t>(),
+            v_xy.data_ptr<scalar_t>(),
+            v_conic.data_ptr<scalar_t>(),
+            v_colors.data_ptr<scalar_t>(),
+            v_opacity.data_ptr<scalar_t>()
+        );
+    });
+
+    return std::make_tuple(v_xy, v_conic, v_colors, v_opacity);
+}
+
+std::
+    tuple<
+        torch::Tensor, // dL_dxy
+        torch::Tensor, // dL_dconic
+        torch::Tensor, // dL_dcolors
+        torch::Tensor  // dL_dopacity
+        >
+    rasterize_backward_tensor(
+        const unsigned img_height,
+        const unsigned img_width,
+        const torch::Tensor &gaussians_ids_sorted,
+        const torch::Tensor &tile_bins,
+        const torch::Tensor &xys,
+        const torch::Tensor &conics,
+        const torch::Tensor &colors,
+        const torch::Tensor &opacities,
+        const torch::Tensor &background,
+        const torch::Tensor &final_Ts,
+        const torch::Tensor &final_idx,
+        const torch::Tensor &v_output, // dL_dout_color
+        const torch::Tensor &v_output_alpha // dL_dout_alpha
+    ) {
+    return nd_rasterize_backward_tensor(
+        img_height,
+        img_width,
+        gaussians_ids_sorted,
+        tile_bins,
+        xys,
+        conics,
+        colors,
+        opacities,
+        background,
+        final_Ts,
+        final_idx,
+        v_output,
+        v_output_alpha
+    );
+}
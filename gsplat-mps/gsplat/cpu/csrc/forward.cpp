@@ -0,0 +1,351 @@
+#include "forward.h"
+#include "helpers.h"
+#include <vector>
+
+// project each gaussian, one iteration per gaussian
+template <typename T>
+void project_gaussians_forward_kernel(
+    const int num_points,
+    const T *__restrict__ means3d,
+    const T *__restrict__ scales,
+    const T glob_scale,
+    const T *__restrict__ quats,
+    const T *__restrict__ viewmat,
+    const T *__restrict__ projmat,
+    const T *intrins,
+    const int *img_size,
+    const int *tile_bounds,
+    const T clip_thresh,
+    T *__restrict__ covs3d,
+    T *__restrict__ xys,
+    T *__restrict__ depths,
+    int *__restrict__ radii,
+    T *__restrict__ conics,
+    int32_t *__restrict__ num_tiles_hit
+) {
+    const T fx = intrins[0];
+    const T fy = intrins[1];
+    const T cx = intrins[2];
+    const T cy = intrins[3];
+    const T tan_fovx = T(0.5) * img_size[0] / fx;
+    const T tan_fovy = T(0.5) * img_size[1] / fy;
+    const T lim_x = T(1.3) * tan_fovx;
+    const T lim_y = T(1.3) * tan_fovy;
+
+#pragma omp parallel for schedule(static) num_threads(gsplat_num_threads())
+    for (int idx = 0; idx < num_points; ++idx) {
+        // outputs are zero initialized, culled gaussians are left untouched
+        const T *p_world = &means3d[3 * idx];
+        T p_view[3];
+        if (clip_near_plane(p_world, viewmat, p_view, clip_thresh)) {
+            continue;
+        }
+
+        // 3d covariance from scale and rotation, M = R * S
+        T R[9];
+        quat_to_rotmat(&quats[4 * idx], R);
+        const T *scale = &scales[3 * idx];
+        T M[9];
+        for (int i = 0; i < 3; ++i) {
+            for (int j = 0; j < 3; ++j) {
+                M[3 * i + j] = R[3 * i + j] * glob_scale * scale[j];
+            }
+        }
+        T V[9];
+        matmul_nt(M, M, V, 3, 3, 3);
+        // save upper right because symmetric
+        T *cov3d = &covs3d[6 * idx];
+        cov3d[0] = V[0];
+        cov3d[1] = V[1];
+        cov3d[2] = V[2];
+        cov3d[3] = V[4];
+        cov3d[4] = V[5];
+        cov3d[5] = V[8];
+
+        // project to 2d with ewa approximation, clipping t to the fov
+        T t[3] = {p_view[0], p_view[1], p_view[2]};
+        t[0] = t[2] * std::min(lim_x, std::max(-lim_x, t[0] / t[2]));
+        t[1] = t[2] * std::min(lim_y, std::max(-lim_y, t[1] / t[2]));
+        T rz = T(1) / t[2];
+        T rz2 = rz * rz;
+        // top 2 rows of the jacobian, times the rotation of the view
+        const T J[6] = {fx * rz, 0, -fx * t[0] * rz2, 0, fy * rz, -fy * t[1] * rz2};
+        const T W[9] = {
+            viewmat[0],
+            viewmat[1],
+            viewmat[2],
+            viewmat[4],
+            viewmat[5],
+            viewmat[6],
+            viewmat[8],
+            viewmat[9],
+            viewmat[10]
+        };
+        T JW[6], JWV[6], cov[4];
+        matmul(J, W, JW, 2, 3, 3);
+        matmul(JW, V, JWV, 2, 3, 3);
+        matmul_nt(JWV, JW, cov, 2, 3, 2);
+        // add a little blur along axes and save upper triangular elements
+        const T cov2d[3] = {cov[0] + T(0.3), cov[1], cov[3] + T(0.3)};
+
+        T conic[3];
+        T radius;
+        if (!compute_cov2d_bounds(cov2d, conic, radius)) {
+            continue; // zero determinant
+        }
+        conics[3 * idx] = conic[0];
+        conics[3 * idx + 1] = conic[1];
+        conics[3 * idx + 2] = conic[2];
+
+        // compute the projected mean
+        T center[2];
+        project_pix(projmat, p_world, T(img_size[0]), T(img_size[1]), cx, cy, center);
+        int tile_min[2], tile_max[2];
+        get_tile_bbox(center, radius, tile_bounds, tile_min, tile_max);
+        int32_t tile_area =
+            (tile_max[0] - tile_min[0]) * (tile_max[1] - tile_min[1]);
+        if (tile_area <= 0) {
+            continue;
+        }
+
+        num_tiles_hit[idx] = tile_area;
+        depths[idx] = p_view[2];
+        radii[idx] = (int)radius;
+        xys[2 * idx] = center[0];
+        xys[2 * idx + 1] = center[1];
+    }
+}
+
+template <typename T>
+void compute_cov2d_bounds_kernel(
+    const int num_pts,
+    const T *__restrict__ covs2d,
+    T *__restrict__ conics,
+    T *__restrict__ radii
+) {
+#pragma omp parallel for schedule(static) num_threads(gsplat_num_threads())
+    for (int row = 0; row < num_pts; ++row) {
+        T radius;
+        if (compute_cov2d_bounds(&covs2d[3 * row], &conics[3 * row], radius)) {
+            radii[row] = radius;
+        }
+    }
+}
+
+template <typename T>
+void map_gaussian_to_intersects_kernel(
+    const int num_points,
+    const T *__restrict__ xys,
+    const float *__restrict__ depths,
+    const int *__restrict__ radii,
+    const int32_t *__restrict__ cum_tiles_hit,
+    const int *tile_bounds,
+    int64_t *__restrict__ isect_ids,
+    int32_t *__restrict__ gaussian_ids
+) {
+#pragma omp parallel for schedule(static) num_threads(gsplat_num_threads())
+    for (int idx = 0; idx < num_points; ++idx) {
+        if (radii[idx] <= 0) {
+            continue;
+        }
+        // get the tile bbox for gaussian
+        int tile_min[2], tile_max[2];
+        get_tile_bbox(&xys[2 * idx], T(radii[idx]), tile_bounds, tile_min, tile_max);
+
+        // update the intersection info for all tiles this gaussian hits
+        int32_t cur_idx = (idx == 0) ? 0 : cum_tiles_hit[idx - 1];
+        // isect_id is tile ID and depth as int32
+        int64_t depth_id = (int64_t) * (const int32_t *)&(depths[idx]);
+        for (int i = tile_min[1]; i < tile_max[1]; ++i) {
+            for (int j = tile_min[0]; j < tile_max[0]; ++j) {
+                int64_t tile_id = i * tile_bounds[0] + j;
+                isect_ids[cur_idx] = (tile_id << 32) | depth_id;
+                gaussian_ids[cur_idx] = idx;
+                ++cur_idx;
+            }
+        }
+    }
+}
+
+void get_tile_bin_edges_kernel(
+    const int num_intersects,
+    const int64_t *__restrict__ isect_ids_sorted,
+    int32_t *__restrict__ tile_bins
+) {
+    // save the indices where the tile_id changes, empty tiles stay (0, 0)
+#pragma omp parallel for schedule(static) num_threads(gsplat_num_threads())
+    for (int idx = 0; idx < num_intersects; ++idx) {
+        int32_t cur_tile_idx = (int32_t)(isect_ids_sorted[idx] >> 32);
+        if (idx == 0 ||
+            (int32_t)(isect_ids_sorted[idx - 1] >> 32) != cur_tile_idx) {
+            tile_bins[2 * cur_tile_idx] = idx;
+        }
+        if (idx == num_intersects - 1 ||
+            (int32_t)(isect_ids_sorted[idx + 1] >> 32) != cur_tile_idx) {
+            tile_bins[2 * cur_tile_idx + 1] = idx + 1;
+        }
+    }
+}
+
+// rasterize one tile per iteration; the gaussians of the tile are gathered
+// once into contiguous buffers (the shared memory batches of the cuda kernel)
+// and every pixel composites them front to back. colors and opacities may have
+// fewer rows than xys, shared by the views of a batch: gaussian g reads row
+// g % num_colors
+template <typename T>
+void rasterize_forward_kernel(
+    const int *tile_bounds,
+    const int *img_size,
+    const int channels,
+    const int num_bins,
+    const int num_colors,
+    const int num_opacities,
+    const int32_t *__restrict__ gaussian_ids_sorted,
+    const int32_t *__restrict__ tile_bins,
+    const T *__restrict__ xys,
+    const T *__restrict__ conics,
+    const T *__restrict__ colors,
+    const T *__restrict__ opacities,
+    T *__restrict__ final_Ts,
+    int *__restrict__ final_index,
+    T *__restrict__ out_img,
+    const T *__restrict__ background
+) {
+    const int num_tiles = tile_bounds[0] * tile_bounds[1];
+
+#pragma omp parallel num_threads(gsplat_num_threads())
+    {
+        std::vector<T> xy_opacity_batch;
+        std::vector<T> conic_batch;
+        std::vector<T> pix_out(channels);
+
+        // tiles differ a lot in cost, hand them out one at a time
+#pragma omp for schedule(dynamic, 1)
+        for (int tile_id = 0; tile_id < num_tiles; ++tile_id) {
+            const int tile_y = tile_id / tile_bounds[0];
+            const int tile_x = tile_id % tile_bounds[0];
+            const int i0 = tile_y * BLOCK_Y;
+            const int j0 = tile_x * BLOCK_X;
+            const int i1 = std::min(i0 + BLOCK_Y, img_size[1]);
+            const int j1 = std::min(j0 + BLOCK_X, img_size[0]);
+
+            int range_start = 0, range_end = 0;
+            if (tile_id < num_bins) {
+                range_start = tile_bins[2 * tile_id];
+                range_end = tile_bins[2 * tile_id + 1];
+            }
+            const int count = range_end - range_start;
+            xy_opacity_batch.resize(3 * count);
+            conic_batch.resize(3 * count);
+            for (int t = 0; t < count; ++t) {
+                const int32_t g = gaussian_ids_sorted[range_start + t];
+                xy_opacity_batch[3 * t] = xys[2 * g];
+                xy_opacity_batch[3 * t + 1] = xys[2 * g + 1];
+                xy_opacity_batch[3 * t + 2] = opacities[g % num_opacities];
+                conic_batch[3 * t] = conics[3 * g];
+                conic_batch[3 * t + 1] = conics[3 * g + 1];
+                conic_batch[3 * t + 2] = conics[3 * g + 2];
+            }
+
+            for (int i = i0; i < i1; ++i) {
+                for (int j = j0; j < j1; ++j) {
+                    const T px = (T)j;
+                    const T py = (T)i;
+                    const int pix_id = i * img_size[0] + j;
+                    // current visibility left to render
+                    T T_ = T(1);
+                    // index of most recent gaussian to write to this pixel
+                    int cur_idx = 0;
+                    std::fill(pix_out.begin(), pix_out.end(), T(0));
+                    for (int t = 0; t < count; ++t) {
+                        const T *conic = &conic_batch[3 * t];
+                        const T *xy_opac = &xy_opacity_batch[3 * t];
+                        const T dx = xy_opac[0] - px;
+                        const T dy = xy_opac[1] - py;
+                        const T sigma =
+                            T(0.5) * (conic[0] * dx * dx + conic[2] * dy * dy) +
+                            conic[1] * dx * dy;
+                        const T alpha =
+                            std::min(T(0.999), xy_opac[2] * std::exp(-sigma));
+                        if (sigma < T(0) || alpha < T(1) / T(255)) {
+                            continue;
+                        }
+                        const T next_T = T_ * (T(1) - alpha);
+                        if (next_T <= T(1e-4)) { // this pixel is done
+                            break;
+                        }
+                        const T vis = alpha * T_;
+                        const int32_t g =
+                            gaussian_ids_sorted[range_start + t] % num_colors;
+                        for (int c = 0; c < channels; ++c) {
+                            pix_out[c] += colors[channels * g + c] * vis;
+                        }
+                        T_ = next_T;
+                        cur_idx = range_start + t;
+                    }
+                    final_Ts[pix_id] = T_;
+                    final_index[pix_id] = cur_idx;
+                    for (int c = 0; c < channels; ++c) {
+                        out_img[channels * pix_id + c] =
+                            pix_out[c] + T_ * background[c];
+                    }
+                }
+            }
+        }
+    }
+}
+
+#define INSTANTIATE_FORWARD(T)                                                 \
+    template void project_gaussians_forward_kernel<T>(                         \
+        const int,                                                             \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T,                                                               \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *,                                                             \
+        const int *,                                                           \
+        const int *,                                                           \
+        const T,                                                               \
+        T *__restrict__,                                                       \
+        T *__restrict__,                                                       \
+        T *__restrict__,                                                       \
+        int *__restrict__,                                                     \
+        T *__restrict__,                                                       \
+        int32_t *__restrict__                                                  \
+    );                                                                         \
+    template void compute_cov2d_bounds_kernel<T>(                              \
+        const int, const T *__restrict__, T *__restrict__, T *__restrict__     \
+    );                                                                         \
+    template void map_gaussian_to_intersects_kernel<T>(                        \
+        const int,                                                             \
+        const T *__restrict__,                                                 \
+        const float *__restrict__,                                             \
+        const int *__restrict__,                                               \
+        const int32_t *__restrict__,                                           \
+        const int *,                                                           \
+        int64_t *__restrict__,                                                 \
+        int32_t *__restrict__                                                  \
+    );                                                                         \
+    template void rasterize_forward_kernel<T>(                                 \
+        const int *,                                                           \
+        const int *,                                                           \
+        const int,                                                             \
+        const int,                                                             \
+        const int,                                                             \
+        const int,                                                             \
+        const int32_t *__restrict__,                                           \
+        const int32_t *__restrict__,                                           \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        const T *__restrict__,                                                 \
+        T *__restrict__,                                                       \
+        int *__restrict__,                                                     \
+        T *__restrict__,                                                       \
+        const T *__restrict__                                                  \
+    );
+
+INSTANTIATE_FORWARD(float)
+INSTANTIATE_FORWARD(double)
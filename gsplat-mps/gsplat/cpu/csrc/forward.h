@@ -0,0 +1,75 @@
+#pragma once
+#include <cstdint>
+
+// compute the 2d gaussian parameters from 3d gaussian parameters
+template <typename T>
+void project_gaussians_forward_kernel(
+    const int num_points,
+    const T *__restrict__ means3d,
+    const T *__restrict__ scales,
+    const T glob_scale,
+    const T *__restrict__ quats,
+    const T *__restrict__ viewmat,
+    const T *__restrict__ projmat,
+    const T *intrins,
+    const int *img_size,
+    const int *tile_bounds,
+    const T clip_thresh,
+    T *__restrict__ covs3d,
+    T *__restrict__ xys,
+    T *__restrict__ depths,
+    int *__restrict__ radii,
+    T *__restrict__ conics,
+    int32_t *__restrict__ num_tiles_hit
+);
+
+// conic and radius of each 2d covariance
+template <typename T>
+void compute_cov2d_bounds_kernel(
+    const int num_pts,
+    const T *__restrict__ covs2d,
+    T *__restrict__ conics,
+    T *__restrict__ radii
+);
+
+// map each intersection from tile ID and depth to a gaussian
+template <typename T>
+void map_gaussian_to_intersects_kernel(
+    const int num_points,
+    const T *__restrict__ xys,
+    const float *__restrict__ depths,
+    const int *__restrict__ radii,
+    const int32_t *__restrict__ cum_tiles_hit,
+    const int *tile_bounds,
+    int64_t *__restrict__ isect_ids,
+    int32_t *__restrict__ gaussian_ids
+);
+
+// map sorted intersection IDs to tile bins
+void get_tile_bin_edges_kernel(
+    const int num_intersects,
+    const int64_t *__restrict__ isect_ids_sorted,
+    int32_t *__restrict__ tile_bins
+);
+
+// compute output image with any number of channels from binned and sorted
+// gaussians
+template <typename T>
+void rasterize_forward_kernel(
+    const int *tile_bounds,
+    const int *img_size,
+    const int channels,
+    const int num_bins,
+    const int num_colors,
+    const int num_opacities,
+    const int32_t *__restrict__ gaussian_ids_sorted,
+    const int32_t *__restrict__ tile_bins,
+    const T *__restrict__ xys,
+    const T *__restrict__ conics,
+    const T *__restrict__ colors,
+    const T *__restrict__ opacities,
+    T *__restrict__ final_Ts,
+    int *__restrict__ final_index,
+    T *__restrict__ out_img,
+    const T *__restrict__ background
+);
@@ -0,0 +1,232 @@
+#pragma once
+#include "config.h"
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+// number of threads for the parallel loops, see set_num_threads()
+int gsplat_num_threads();
+
+// All matrices are ROW MAJOR, 3x3 matrices are T[9], upper triangular
+// symmetric 3x3 matrices are T[6] and symmetric 2x2 matrices T[3], as in the
+// cuda kernels. Everything is templated on the scalar type so that double
+// precision inputs (e.g. gradcheck) stay in double precision.
+
+template <typename T> inline T ndc2pix(const T x, const T W, const T cx) {
+    return T(0.5) * W * x + cx - T(0.5);
+}
+
+template <typename T>
+inline void get_tile_bbox(
+    const T *pix_center,
+    const T pix_radius,
+    const int *tile_bounds,
+    int *tile_min,
+    int *tile_max
+) {
+    // gets gaussian dimensions in tile space, i.e. the span of a gaussian in
+    // tile_grid (image divided into tiles), inclusive min, exclusive max
+    const T block[2] = {T(BLOCK_X), T(BLOCK_Y)};
+    for (int k = 0; k < 2; ++k) {
+        T center = pix_center[k] / block[k];
+        T radius = pix_radius / block[k];
+        tile_min[k] = std::min(std::max(0, (int)(center - radius)), tile_bounds[k]);
+        tile_max[k] =
+            std::min(std::max(0, (int)(center + radius + 1)), tile_bounds[k]);
+    }
+}
+
+template <typename T>
+inline bool compute_cov2d_bounds(const T *cov2d, T *conic, T &radius) {
+    // find eigenvalues of 2d covariance matrix, then compute the radius and the
+    // conic (inverse cov2d), both as upper triangular values
+    T det = cov2d[0] * cov2d[2] - cov2d[1] * cov2d[1];
+    if (det <= T(1e-6))
+        return false;
+    T inv_det = T(1) / det;
+    conic[0] = cov2d[2] * inv_det;
+    conic[1] = -cov2d[1] * inv_det;
+    conic[2] = cov2d[0] * inv_det;
+
+    T b = T(0.5) * (cov2d[0] + cov2d[2]);
+    T v1 = b + std::sqrt(std::max(T(0.1), b * b - det));
+    T v2 = b - std::sqrt(std::max(T(0.1), b * b - det));
+    // take 3 sigma of covariance
+    radius = std::ceil(T(3) * std::sqrt(std::max(v1, v2)));
+    return true;
+}
+
+// helper for applying R * p + T of a row major 4x4 matrix
+template <typename T>
+inline void transform_4x3(const T *mat, const T *p, T *out) {
+    for (int i = 0; i < 3; ++i) {
+        out[i] = mat[4 * i] * p[0] + mat[4 * i + 1] * p[1] +
+                 mat[4 * i + 2] * p[2] + mat[4 * i + 3];
+    }
+}
+
+// helper to apply a row major 4x4 transform to 3d vector, returns homo coords
+template <typename T>
+inline void transform_4x4(const T *mat, const T *p, T *out) {
+    for (int i = 0; i < 4; ++i) {
+        out[i] = mat[4 * i] * p[0] + mat[4 * i + 1] * p[1] +
+                 mat[4 * i + 2] * p[2] + mat[4 * i + 3];
+    }
+}
+
+template <typename T>
+inline void project_pix(
+    const T *mat, const T *p, const T W, const T H, const T cx, const T cy, T *xy
+) {
+    T p_hom[4];
+    transform_4x4(mat, p, p_hom);
+    T rw = T(1) / (p_hom[3] + T(1e-6));
+    xy[0] = ndc2pix(p_hom[0] * rw, W, cx);
+    xy[1] = ndc2pix(p_hom[1] * rw, H, cy);
+}
+
+// given v_xy_pix, get v_xyz
+template <typename T>
+inline void project_pix_vjp(
+    const T *mat, const T *p, const T W, const T H, const T *v_xy, T *v_p
+) {
+    T p_hom[4];
+    transform_4x4(mat, p, p_hom);
+    T rw = T(1) / (p_hom[3] + T(1e-6));
+    T v_ndc_x = T(0.5) * W * v_xy[0];
+    T v_ndc_y = T(0.5) * H * v_xy[1];
+    T v_proj[4] = {
+        v_ndc_x * rw,
+        v_ndc_y * rw,
+        T(0),
+        -(v_ndc_x * p_hom[0] + v_ndc_y * p_hom[1]) * rw * rw
+    };
+    // df / d_world = v_proj * P[:, :3]
+    for (int j = 0; j < 3; ++j) {
+        v_p[j] = mat[j] * v_proj[0] + mat[4 + j] * v_proj[1] +
+                 mat[8 + j] * v_proj[2] + mat[12 + j] * v_proj[3];
+    }
+}
+
+template <typename T> inline void quat_to_rotmat(const T *quat, T *R) {
+    // quat is (w, x, y, z)
+    T s = T(1) / std::sqrt(
+                     quat[0] * quat[0] + quat[1] * quat[1] + quat[2] * quat[2] +
+                     quat[3] * quat[3]
+                 );
+    T w = quat[0] * s;
+    T x = quat[1] * s;
+    T y = quat[2] * s;
+    T z = quat[3] * s;
+    R[0] = T(1) - T(2) * (y * y + z * z);
+    R[1] = T(2) * (x * y - w * z);
+    R[2] = T(2) * (x * z + w * y);
+    R[3] = T(2) * (x * y + w * z);
+    R[4] = T(1) - T(2) * (x * x + z * z);
+    R[5] = T(2) * (y * z - w * x);
+    R[6] = T(2) * (x * z - w * y);
+    R[7] = T(2) * (y * z + w * x);
+    R[8] = T(1) - T(2) * (x * x + y * y);
+}
+
+// vjp of quat_to_rotmat, including the normalization of the quaternion
+template <typename T>
+inline void quat_to_rotmat_vjp(const T *quat, const T *G, T *v_quat) {
+    T norm = std::sqrt(
+        quat[0] * quat[0] + quat[1] * quat[1] + quat[2] * quat[2] +
+        quat[3] * quat[3]
+    );
+    T w = quat[0] / norm;
+    T x = quat[1] / norm;
+    T y = quat[2] / norm;
+    T z = quat[3] / norm;
+    T v[4];
+    v[0] = T(2) * (x * (G[7] - G[5]) + y * (G[2] - G[6]) + z * (G[3] - G[1]));
+    v[1] = T(2) * (-T(2) * x * (G[4] + G[8]) + y * (G[1] + G[3]) +
+                   z * (G[2] + G[6]) + w * (G[7] - G[5]));
+    v[2] = T(2) * (x * (G[1] + G[3]) - T(2) * y * (G[0] + G[8]) +
+                   z * (G[5] + G[7]) + w * (G[2] - G[6]));
+    v[3] = T(2) * (x * (G[2] + G[6]) + y * (G[5] + G[7]) -
+                   T(2) * z * (G[0] + G[4]) + w * (G[3] - G[1]));
+    T dot = w * v[0] + x * v[1] + y * v[2] + z * v[3];
+    v_quat[0] = (v[0] - w * dot) / norm;
+    v_quat[1] = (v[1] - x * dot) / norm;
+    v_quat[2] = (v[2] - y * dot) / norm;
+    v_quat[3] = (v[3] - z * dot) / norm;
+}
+
+// cull points in front of the near plane
+template <typename T>
+inline bool
+clip_near_plane(const T *p, const T *viewmat, T *p_view, const T thresh) {
+    transform_4x3(viewmat, p, p_view);
+    return p_view[2] <= thresh;
+}
+
+// upper triangular cov3d (6) <-> full symmetric 3x3
+template <typename T> inline void unpack_cov3d(const T *c, T *V) {
+    V[0] = c[0];
+    V[1] = c[1];
+    V[2] = c[2];
+    V[3] = c[1];
+    V[4] = c[3];
+    V[5] = c[4];
+    V[6] = c[2];
+    V[7] = c[4];
+    V[8] = c[5];
+}
+
+// A (m x k) @ B (k x n), row major
+template <typename T>
+inline void
+matmul(const T *A, const T *B, T *C, const int m, const int k, const int n) {
+    for (int i = 0; i < m; ++i) {
+        for (int j = 0; j < n; ++j) {
+            T acc = T(0);
+            for (int l = 0; l < k; ++l) {
+                acc += A[i * k + l] * B[l * n + j];
+            }
+            C[i * n + j] = acc;
+        }
+    }
+}
+
+// A (m x k) @ B.T with B (n x k), row major
+template <typename T>
+inline void
+matmul_nt(const T *A, const T *B, T *C, const int m, const int k, const int n) {
+    for (int i = 0; i < m; ++i) {
+        for (int j = 0; j < n; ++j) {
+            T acc = T(0);
+            for (int l = 0; l < k; ++l) {
+                acc += A[i * k + l] * B[j * k + l];
+            }
+            C[i * n + j] = acc;
+        }
+    }
+}
+
+// A.T @ B with A (k x m) and B (k x n), row major
+template <typename T>
+inline void
+matmul_tn(const T *A, const T *B, T *C, const int m, const int k, const int n) {
+    for (int i = 0; i < m; ++i) {
+        for (int j = 0; j < n; ++j) {
+            T acc = T(0);
+            for (int l = 0; l < k; ++l) {
+                acc += A[l * m + i] * B[l * n + j];
+            }
+            C[i * n + j] = acc;
+        }
+    }
+}
+
+template <typename T>
+inline void atomic_add(T *addr, const T value) {
+#pragma omp atomic
+    *addr += value;
+}
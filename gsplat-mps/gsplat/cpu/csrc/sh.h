@@ -0,0 +1,231 @@
+#pragma once
+#include "helpers.h"
+#include <algorithm>
+#include <cmath>
+
+static const double SH_C0 = 0.28209479177387814;
+static const double SH_C1 = 0.4886025119029199;
+static const double SH_C2[] = {
+    1.0925484305920792,
+    -1.0925484305920792,
+    0.31539156525252005,
+    -1.0925484305920792,
+    0.5462742152960396};
+static const double SH_C3[] = {
+    -0.5900435899266435,
+    2.890611442640554,
+    -0.4570457994644658,
+    0.3731763325901154,
+    -0.4570457994644658,
+    1.445305721320277,
+    -0.5900435899266435};
+static const double SH_C4[] = {
+    2.5033429417967046,
+    -1.7701307697799304,
+    0.9461746957575601,
+    -0.6690465435572892,
+    0.10578554691520431,
+    -0.6690465435572892,
+    0.47308734787878004,
+    -1.7701307697799304,
+    0.6258357354491761};
+
+inline unsigned num_sh_bases(const unsigned degree) {
+    if (degree == 0)
+        return 1;
+    if (degree == 1)
+        return 4;
+    if (degree == 2)
+        return 9;
+    if (degree == 3)
+        return 16;
+    return 25;
+}
+
+// evaluates the num_sh_bases(DEGREE) sh bases along viewdir, the checks on
+// DEGREE are resolved at compile time
+template <unsigned DEGREE, typename T>
+inline void sh_bases(const T *viewdir, T *bases) {
+    bases[0] = T(SH_C0);
+    if (DEGREE < 1) {
+        return;
+    }
+    T norm = std::max(
+        std::sqrt(
+            viewdir[0] * viewdir[0] + viewdir[1] * viewdir[1] +
+            viewdir[2] * viewdir[2]
+        ),
+        T(1e-12)
+    );
+    T x = viewdir[0] / norm;
+    T y = viewdir[1] / norm;
+    T z = viewdir[2] / norm;
+
+    T xx = x * x;
+    T xy = x * y;
+    T xz = x * z;
+    T yy = y * y;
+    T yz = y * z;
+    T zz = z * z;
+    bases[1] = T(-SH_C1) * y;
+    bases[2] = T(SH_C1) * z;
+    bases[3] = T(-SH_C1) * x;
+    if (DEGREE < 2) {
+        return;
+    }
+    bases[4] = T(SH_C2[0]) * xy;
+    bases[5] = T(SH_C2[1]) * yz;
+    bases[6] = T(SH_C2[2]) * (T(2) * zz - xx - yy);
+    bases[7] = T(SH_C2[3]) * xz;
+    bases[8] = T(SH_C2[4]) * (xx - yy);
+    if (DEGREE < 3) {
+        return;
+    }
+    bases[9] = T(SH_C3[0]) * y * (T(3) * xx - yy);
+    bases[10] = T(SH_C3[1]) * xy * z;
+    bases[11] = T(SH_C3[2]) * y * (T(4) * zz - xx - yy);
+    bases[12] = T(SH_C3[3]) * z * (T(2) * zz - T(3) * xx - T(3) * yy);
+    bases[13] = T(SH_C3[4]) * x * (T(4) * zz - xx - yy);
+    bases[14] = T(SH_C3[5]) * z * (xx - yy);
+    bases[15] = T(SH_C3[6]) * x * (xx - T(3) * yy);
+    if (DEGREE < 4) {
+        return;
+    }
+    bases[16] = T(SH_C4[0]) * xy * (xx - yy);
+    bases[17] = T(SH_C4[1]) * yz * (T(3) * xx - yy);
+    bases[18] = T(SH_C4[2]) * xy * (T(7) * zz - T(1));
+    bases[19] = T(SH_C4[3]) * yz * (T(7) * zz - T(3));
+    bases[20] = T(SH_C4[4]) * (zz * (T(35) * zz - T(30)) + T(3));
+    bases[21] = T(SH_C4[5]) * xz * (T(7) * zz - T(3));
+    bases[22] = T(SH_C4[6]) * (xx - yy) * (T(7) * zz - T(1));
+    bases[23] = T(SH_C4[7]) * xz * (xx - T(3) * yy);
+    bases[24] = T(SH_C4[8]) * (xx * (xx - T(3) * yy) - yy * (T(3) * xx - yy));
+}
+
+// forward and backward over all points for one degree, one iteration per
+// point. coeffs and v_coeffs hold num_bases x channels values per point, of
+// which the first (DEGREE + 1)^2 bases are used
+template <unsigned DEGREE, typename T>
+void compute_sh_forward_points(
+    const unsigned num_points,
+    const unsigned num_bases,
+    const unsigned channels,
+    const T *__restrict__ viewdirs,
+    const T *__restrict__ coeffs,
+    T *__restrict__ colors
+) {
+    constexpr unsigned NUM_BASES = (DEGREE + 1) * (DEGREE + 1);
+#pragma omp parallel for schedule(static) num_threads(gsplat_num_threads())
+    for (int idx = 0; idx < (int)num_points; ++idx) {
+        T bases[NUM_BASES];
+        sh_bases<DEGREE>(&viewdirs[3 * idx], bases);
+        const T *point_coeffs = &coeffs[num_bases * channels * idx];
+        for (unsigned c = 0; c < channels; ++c) {
+            T color = T(0);
+            for (unsigned b = 0; b < NUM_BASES; ++b) {
+                color += bases[b] * point_coeffs[b * channels + c];
+            }
+            colors[channels * idx + c] = color;
+        }
+    }
+}
+
+template <unsigned DEGREE, typename T>
+void compute_sh_backward_points(
+    const unsigned num_points,
+    const unsigned num_bases,
+    const unsigned channels,
+    const T *__restrict__ viewdirs,
+    const T *__restrict__ v_colors,
+    T *__restrict__ v_coeffs
+) {
+    constexpr unsigned NUM_BASES = (DEGREE + 1) * (DEGREE + 1);
+#pragma omp parallel for schedule(static) num_threads(gsplat_num_threads())
+    for (int idx = 0; idx < (int)num_points; ++idx) {
+        T bases[NUM_BASES];
+        sh_bases<DEGREE>(&viewdirs[3 * idx], bases);
+        const T *v_color = &v_colors[channels * idx];
+        T *point_v_coeffs = &v_coeffs[num_bases * channels * idx];
+        for (unsigned b = 0; b < NUM_BASES; ++b) {
+            for (unsigned c = 0; c < channels; ++c) {
+                point_v_coeffs[b * channels + c] = bases[b] * v_color[c];
+            }
+        }
+        // bases above the degree in use get no gradient
+        std::fill(
+            point_v_coeffs + NUM_BASES * channels,
+            point_v_coeffs + num_bases * channels,
+            T(0)
+        );
+    }
+}
+
+template <typename T>
+void compute_sh_forward_kernel(
+    const unsigned num_points,
+    const unsigned degree,
+    const unsigned degrees_to_use,
+    const unsigned channels,
+    const T *__restrict__ viewdirs,
+    const T *__restrict__ coeffs,
+    T *__restrict__ colors
+) {
+    const unsigned num_bases = num_sh_bases(degree);
+    switch (std::min(degrees_to_use, degree)) {
+    case 0:
+        return compute_sh_forward_points<0>(
+            num_points, num_bases, channels, viewdirs, coeffs, colors
+        );
+    case 1:
+        return compute_sh_forward_points<1>(
+            num_points, num_bases, channels, viewdirs, coeffs, colors
+        );
+    case 2:
+        return compute_sh_forward_points<2>(
+            num_points, num_bases, channels, viewdirs, coeffs, colors
+        );
+    case 3:
+        return compute_sh_forward_points<3>(
+            num_points, num_bases, channels, viewdirs, coeffs, colors
+        );
+    default:
+        return compute_sh_forward_points<4>(
+            num_points, num_bases, channels, viewdirs, coeffs, colors
+        );
+    }
+}
+
+template <typename T>
+void compute_sh_backward_kernel(
+    const unsigned num_points,
+    const unsigned degree,
+    const unsigned degrees_to_use,
+    const unsigned channels,
+    const T *__restrict__ viewdirs,
+    const T *__restrict__ v_colors,
+    T *__restrict__ v_coeffs
+) {
+    const unsigned num_bases = num_sh_bases(degree);
+    switch (std::min(degrees_to_use, degree)) {
+    case 0:
+        return compute_sh_backward_points<0>(
+            num_points, num_bases, channels, viewdirs, v_colors, v_coeffs
+        );
+    case 1:
+        return compute_sh_backward_points<1>(
+            num_points, num_bases, channels, viewdirs, v_colors, v_coeffs
+        );
+    case 2:
+        return compute_sh_backward_points<2>(
+            num_points, num_bases, channels, viewdirs, v_colors, v_coeffs
+        );
+    case 3:
+        return compute_sh_backward_points<3>(
+            num_points, num_bases, channels, viewdirs, v_colors, v_coeffs
+        );
+    default:
+        return compute_sh_backward_points<4>(
+            num_points, num_bases, channels, viewdirs, v_colors, v_coeffs
+        );
+    }
+}
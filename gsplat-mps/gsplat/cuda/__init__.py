@@ -11,6 +11,14 @@ def _make_lazy_cuda_func(name: str) -> Callable:
     return call_cuda
 
 
+def warmup() -> None:
+    """Loads the cuda extension now, building it if needed, instead of on first use."""
+    # pylint: disable=import-outside-toplevel
+    from ._backend import load_extension
+
+    load_extension()
+
+
 nd_rasterize_forward = _make_lazy_cuda_func("nd_rasterize_forward")
 nd_rasterize_backward = _make_lazy_cuda_func("nd_rasterize_backward")
 rasterize_forward = _make_lazy_cuda_func("rasterize_forward")
@@ -1,11 +1,21 @@
 import glob
+import hashlib
+import importlib.machinery
 import json
 import os
 import shutil
+import threading
 from subprocess import DEVNULL, call
+from types import ModuleType
+from typing import Optional
 
+import torch
 from rich.console import Console
-from torch.utils.cpp_extension import _get_build_directory, load
+from torch.utils.cpp_extension import (
+    _get_build_directory,
+    _import_module_from_library,
+    load,
+)
 
 PATH = os.path.dirname(os.path.abspath(__file__))
 
@@ -34,12 +44,10 @@ def cuda_toolkit_version():
 
 
 name = "gsplat_cuda"
-build_dir = _get_build_directory(name, verbose=False)
 extra_include_paths = [os.path.join(PATH, "csrc/third_party/glm")]
 extra_cflags = ["-O3"]
 extra_cuda_cflags = ["-O3"]
 
-_C = None
 sources = list(glob.glob(os.path.join(PATH, "csrc/*.cu"))) + list(
     glob.glob(os.path.join(PATH, "csrc/*.cpp"))
 )
@@ -51,51 +59,87 @@ sources = list(glob.glob(os.path.join(PATH, "csrc/*.cu"))) + list(
 #     os.path.join(PATH, "csrc/backward.cu"),
 # ]
 
-try:
-    # try to import the compiled module (via setup.py)
-    from gsplat import csrc as _C
-except ImportError:
-    # if failed, try with JIT compilation
-    if cuda_toolkit_available():
-        # If JIT is interrupted it might leave a lock in the build directory.
-        # We dont want it to exist in any case.
-        try:
-            os.remove(os.path.join(build_dir, "lock"))
-        except OSError:
-            pass
-
-        if os.path.exists(os.path.join(build_dir, "gsplat_cuda.so")) or os.path.exists(
-            os.path.join(build_dir, "gsplat_cuda.lib")
-        ):
-            # If the build exists, we assume the extension has been built
-            # and we can load it.
-
-            _C = load(
-                name=name,
-                sources=sources,
-                extra_cflags=extra_cflags,
-                extra_cuda_cflags=extra_cuda_cflags,
-                extra_include_paths=extra_include_paths,
-            )
-        else:
-            # Build from scratch. Remove the build directory just to be safe: pytorch jit might stuck
-            # if the build directory exists with a lock file in it.
-            shutil.rmtree(build_dir)
-            with Console().status(
-                "[bold yellow]gsplat: Setting up CUDA (This may take a few minutes the first time)",
-                spinner="bouncingBall",
-            ):
-                _C = load(
-                    name=name,
-                    sources=sources,
-                    extra_cflags=extra_cflags,
-                    extra_cuda_cflags=extra_cuda_cflags,
-                    extra_include_paths=extra_include_paths,
-                )
-    else:
+# The extension is only loaded (and built if needed) on first use of a kernel,
+# so that importing gsplat stays cheap. `_C` is resolved by __getattr__ below.
+_ext: Optional[ModuleType] = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def source_hash() -> str:
+    """Hash of everything the compiled extension depends on."""
+    h = hashlib.sha256()
+    h.update(torch.__version__.encode())
+    h.update(" ".join(extra_cflags + extra_cuda_cflags).encode())
+    headers = glob.glob(os.path.join(PATH, "csrc/*.h")) + glob.glob(
+        os.path.join(PATH, "csrc/*.cuh")
+    )
+    for path in sorted(sources + headers):
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def _load() -> Optional[ModuleType]:
+    try:
+        # try to import the compiled module (via setup.py)
+        from gsplat import csrc
+
+        return csrc
+    except ImportError:
+        pass
+
+    # if failed, try with JIT compilation. Builds are cached per source hash and
+    # torch version, so an artifact that exists is always up to date.
+    build_name = f"{name}_{source_hash()}"
+    build_dir = _get_build_directory(build_name, verbose=False)
+    # the library has the extension suffix of the platform, .so or .pyd
+    if any(
+        os.path.exists(os.path.join(build_dir, build_name + suffix))
+        for suffix in importlib.machinery.EXTENSION_SUFFIXES
+    ):
+        return _import_module_from_library(build_name, build_dir, True)
+
+    if not cuda_toolkit_available():
         Console().print(
             "[yellow]gsplat: No CUDA toolkit found. gsplat will be disabled.[/yellow]"
         )
+        return None
+
+    # Build from scratch. Remove the build directory just to be safe: pytorch jit might stuck
+    # if the build directory exists with a lock file in it.
+    shutil.rmtree(build_dir, ignore_errors=True)
+    with Console().status(
+        "[bold yellow]gsplat: Setting up CUDA (This may take a few minutes the first time)",
+        spinner="bouncingBall",
+    ):
+        return load(
+            name=build_name,
+            sources=sources,
+            extra_cflags=extra_cflags,
+            extra_cuda_cflags=extra_cuda_cflags,
+            extra_include_paths=extra_include_paths,
+        )
+
+
+def load_extension() -> Optional[ModuleType]:
+    """Loads the extension, building it on first use. Safe to call from several threads."""
+    global _ext, _loaded
+    if _loaded:
+        return _ext
+    with _lock:
+        if not _loaded:
+            _ext = _load()
+            _loaded = True
+    return _ext
+
+
+def __getattr__(attr: str):
+    # `from ._backend import _C` triggers the load on first access
+    if attr == "_C":
+        return load_extension()
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
 
 
-__all__ = ["_C"]
+__all__ = ["_C", "load_extension"]
@@ -0,0 +1,192 @@
+"""Background loading of the frames of a sequence ahead of playback"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import torch
+from torch import Tensor
+
+from .store import GaussianSequence
+
+
+class FrameLoader:
+    """Decodes the frames of a :class:`GaussianSequence` ahead of playback.
+
+    A worker thread decodes the frames predicted to be requested next into
+    reusable buffers, pinned for faster copies to a gpu. The next frames are
+    predicted from the step between the last two requested frames, so that they
+    follow playback in both directions and at any speed, as well as scrubbing.
+    Decoded frames are kept up to ``max_bytes``, evicting the least recently
+    used ones. :meth:`get_frame` does not wait for frames by default::
+
+        with FrameLoader(GaussianSequence("replay.gsplat")) as loader:
+            frame = loader.get_frame(t)
+            if frame is None:
+                ...  # keep showing the previous frame
+            means3d = frame["means3d"].to(device)
+
+    A frame returned by :meth:`get_frame` stays valid until the next call, its
+    buffers may then be reused for another frame. Copies of a frame to a gpu
+    made with ``non_blocking=True`` must therefore be synchronized, e.g. with
+    ``torch.cuda.current_stream().synchronize()``, before calling
+    :meth:`get_frame` again.
+
+    Args:
+        sequence (GaussianSequence): frames to load, decoded on the cpu.
+        max_bytes (int): memory cap of the decoded frames, at least two frames are kept.
+        lookahead (int): number of frames decoded ahead of the last requested one.
+        pin_memory (bool): whether to pin the buffers, by default if cuda is available.
+    """
+
+    def __init__(
+        self,
+        sequence: GaussianSequence,
+        max_bytes: int = 2 * 2**30,
+        lookahead: int = 8,
+        pin_memory: Optional[bool] = None,
+    ):
+        if sequence.device.type != "cpu":
+            raise ValueError(
+                f"Expected a sequence decoded on the cpu, got {sequence.device}"
+            )
+        self.sequence = sequence
+        self.max_bytes = max_bytes
+        self.lookahead = lookahead
+        if pin_memory is None:
+            pin_memory = torch.cuda.is_available()
+        self.pin_memory = pin_memory
+        # requests served from decoded frames, and those not decoded yet
+        self.num_hits = 0
+        self.num_misses = 0
+
+        self._cond = threading.Condition()
+        self._frames = OrderedDict()  # decoded frames, least recently used first
+        self._capacity = None
+        self._window = []  # last requested frame and the next predicted ones
+        self._queue = []  # frames of the window to decode, most urgent first
+        self._loading = None
+        self._last = None
+        self._step = 1
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __contains__(self, t: int) -> bool:
+        with self._cond:
+            return t in self._frames
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._frames)
+
+    def __enter__(self) -> "FrameLoader":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Stops the worker thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def get_frame(
+        self, t: int, timeout: Optional[float] = 0.0
+    ) -> Optional[Dict[str, Tensor]]:
+        """Returns a frame if it is decoded, and prefetches the next ones.
+
+        Args:
+            t (int): index of the frame.
+            timeout (float): seconds to wait for the frame if it is not decoded yet, None to wait until it is.
+
+        Returns:
+            A Dict[str, Tensor]:
+
+            - **frame** (Dict[str, Tensor]): tensors of the frame by name, None if not decoded in time.
+        """
+        if not 0 <= t < len(self.sequence):
+            raise IndexError(f"Frame {t} out of range for {len(self.sequence)} frames")
+        with self._cond:
+            if self._last is not None and t != self._last:
+                self._step = t - self._last
+            self._last = t
+            self._window = [t + self._step * k for k in range(self.lookahead + 1)]
+            self._window = [s for s in self._window if 0 <= s < len(self.sequence)]
+            self._queue = [
+                s for s in self._window if s not in self._frames and s != self._loading
+            ]
+            self._cond.notify_all()
+            if t in self._frames:
+                self.num_hits += 1
+            else:
+                self.num_misses += 1
+                self._cond.wait_for(
+                    lambda: t in self._frames or self._error is not None,
+                    timeout,
+                )
+            if self._error is not None:
+                raise RuntimeError("Failed to decode a frame") from self._error
+            if t not in self._frames:
+                return None
+            self._frames.move_to_end(t)
+            return dict(self._frames[t][0])
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if self._closed:
+                    return
+                t = self._loading = self._queue.pop(0)
+            try:
+                frame = self.sequence.frame(t)
+                entry = self._buffers(t, frame)
+                if entry is not None:
+                    buffers, sources = entry
+                    for name, tensor in frame.items():
+                        # tensors unchanged since the frame in the buffers are kept
+                        if sources.get(name, lambda: None)() is not tensor:
+                            buffers[name].copy_(tensor)
+                            sources[name] = weakref.ref(tensor)
+            except Exception as error:
+                with self._cond:
+                    self._error = error
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                if entry is not None:
+                    self._frames[t] = entry
+                self._loading = None
+                self._cond.notify_all()
+
+    def _buffers(self, t: int, frame: Dict[str, Tensor]) -> Optional[Tuple[Dict, Dict]]:
+        # new buffers while under the memory cap, then those of an evicted frame,
+        # with the tensors they were copied from
+        with self._cond:
+            if self._capacity is None:
+                frame_bytes = sum(x.numel() * x.element_size() for x in frame.values())
+                self._capacity = max(2, self.max_bytes // max(frame_bytes, 1))
+            if len(self._frames) >= self._capacity:
+                window = self._window
+                evicted = next((s for s in self._frames if s not in window), None)
+                if evicted is None and t in window:
+                    # frames needed later make room for those needed sooner
+                    later = window[window.index(t) + 1 :]
+                    evicted = next(
+                        (s for s in reversed(later) if s in self._frames), None
+                    )
+                if evicted is None:
+                    return None
+                return self._frames.pop(evicted)
+        buffers = {
+            name: torch.empty(
+                tensor.shape, dtype=tensor.dtype, pin_memory=self.pin_memory
+            )
+            for name, tensor in frame.items()
+        }
+        return buffers, {}
@@ -0,0 +1,242 @@
+"""Level of detail hierarchy over gaussians for rendering distant views"""
+
+from typing import Optional
+
+import torch
+from jaxtyping import Float
+from torch import Tensor
+
+from . import _torch_impl
+
+
+def _unpack_cov3d(cov3d: Tensor) -> Tensor:
+    return cov3d[..., [0, 1, 2, 1, 3, 4, 2, 4, 5]].unflatten(-1, (3, 3))
+
+
+def _footprint(cov3d: Tensor) -> Tensor:
+    # area of the two largest axes, which stays meaningful for flat gaussians
+    eigvals = torch.linalg.eigvalsh(cov3d).clamp(min=0)
+    return torch.sqrt(eigvals[..., 1] * eigvals[..., 2])
+
+
+class LODHierarchy:
+    """Hierarchy of merged gaussians, for rendering a cut of it instead of the whole scene.
+
+    The hierarchy is built offline by clustering gaussians on grids of doubling
+    cell size. The nodes sharing a cell are merged into a parent that matches
+    their first and second moments: the mean and covariance of the mixture
+    weighted by opacity times footprint, the product of the two largest standard
+    deviations of a gaussian. Colors are averaged with the same weights, and
+    opacities are chosen so that the footprint covered by the parent matches the
+    one covered by its children. Nodes alone in their cell move up a level unchanged.
+
+    Nodes are stored in single tensors: the ``N`` input gaussians are the
+    leaves, followed by the parents level after level. :meth:`cut` selects the
+    nodes to render for a view, and they plug in ahead of :func:`project_gaussians`::
+
+        lod = LODHierarchy(means3d, scales, quats, colors, opacities, glob_scale)
+        ids = lod.cut(viewmat, fx, fy, max_primitives=200_000)
+        xys, depths, radii, conics, num_tiles_hit, cov3d = project_gaussians(
+            lod.means3d[ids], lod.scales[ids], glob_scale, lod.quats[ids], viewmat, ...
+        )
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians.
+        quats (Tensor): rotations in quaternion [w,x,y,z] format.
+        colors (Tensor): features of the gaussians, of shape (N, ...), e.g. rgb or sh coefficients.
+        opacities (Tensor): opacities of the gaussians, in [0, 1].
+        glob_scale (float): A global scaling factor applied to the scene.
+        leaf_size (int): average number of gaussians per cell of the finest grid.
+    """
+
+    def __init__(
+        self,
+        means3d: Float[Tensor, "*batch 3"],
+        scales: Float[Tensor, "*batch 3"],
+        quats: Float[Tensor, "*batch 4"],
+        colors: Tensor,
+        opacities: Float[Tensor, "*batch 1"],
+        glob_scale: float = 1.0,
+        leaf_size: int = 4,
+    ):
+        with torch.no_grad():
+            self._build(
+                means3d.detach(),
+                scales.detach(),
+                quats.detach(),
+                colors.detach(),
+                opacities.detach().reshape(-1),
+                glob_scale,
+                leaf_size,
+            )
+
+    def _build(self, means3d, scales, quats, colors, opacities, glob_scale, leaf_size):
+        num_points = means3d.shape[0]
+        device = means3d.device
+        self.num_leaves = num_points
+        self.glob_scale = glob_scale
+        cov3d = _unpack_cov3d(_torch_impl.scale_rot_to_cov3d(scales, glob_scale, quats))
+        covs, means, feats, alphas = [cov3d], [means3d], [colors], [opacities]
+        parents = [torch.full((num_points,), -1, dtype=torch.long, device=device)]
+        levels = [torch.zeros(num_points, dtype=torch.long, device=device)]
+        radii = [3.0 * glob_scale * scales.amax(dim=-1)]
+
+        lower = means3d.amin(dim=0)
+        extent = float((means3d.amax(dim=0) - lower).max().clamp(min=1e-6))
+        cell_size = extent / max(1.0, (num_points / leaf_size) ** (1 / 3))
+
+        # ids of the nodes not merged into a parent yet
+        active = torch.arange(num_points, device=device)
+        num_nodes, level = num_points, 0
+        while len(active) > 1:
+            level += 1
+            node_means = torch.cat(means)[active]
+            cells = torch.floor((node_means - lower) / cell_size).long()
+            _, group, counts = torch.unique(
+                cells, dim=0, return_inverse=True, return_counts=True
+            )
+            cell_size *= 2
+            merged = counts[group] > 1
+            if not torch.any(merged):
+                continue
+
+            # groups of two or more nodes get a new parent, others move up as is
+            children = active[merged]
+            _, group = torch.unique(group[merged], return_inverse=True)
+            num_parents = int(group.max()) + 1
+            all_covs, all_means = torch.cat(covs), torch.cat(means)
+            all_alphas, all_radii = torch.cat(alphas), torch.cat(radii)
+            child_means = all_means[children]
+            child_covs = all_covs[children]
+            weights = all_alphas[children] * _footprint(child_covs) + 1e-12
+
+            def weighted_sum(values):
+                out = values.new_zeros((num_parents,) + values.shape[1:])
+                w = weights.view((-1,) + (1,) * (values.dim() - 1))
+                return out.index_add_(0, group, values * w)
+
+            total = weighted_sum(torch.ones_like(weights))
+            parent_means = weighted_sum(child_means) / total[:, None]
+            offsets = child_means - parent_means[group]
+            spread = child_covs + offsets[:, :, None] * offsets[:, None, :]
+            parent_covs = weighted_sum(spread) / total[:, None, None]
+            parent_feats = weighted_sum(torch.cat(feats)[children]) / total.view(
+                (-1,) + (1,) * (colors.dim() - 1)
+            )
+            parent_alphas = torch.clamp(
+                total / _footprint(parent_covs).clamp(min=1e-30), max=0.99
+            )
+            # bounding radius of the subtree, at least the 3-sigma extent of the parent
+            child_extent = offsets.norm(dim=-1) + all_radii[children]
+            parent_radii = child_extent.new_zeros(num_parents).scatter_reduce_(
+                0, group, child_extent, reduce="amax"
+            )
+            parent_radii = torch.maximum(
+                parent_radii, 3.0 * torch.linalg.eigvalsh(parent_covs)[:, -1].sqrt()
+            )
+
+            parent_ids = torch.arange(num_nodes, num_nodes + num_parents, device=device)
+            all_parents = torch.cat(parents)
+            all_parents[children] = parent_ids[group]
+            parents = [all_parents, torch.full_like(parent_ids, -1)]
+            covs.append(parent_covs)
+            means.append(parent_means)
+            feats.append(parent_feats)
+            alphas.append(parent_alphas)
+            radii.append(parent_radii)
+            levels.append(torch.full_like(parent_ids, level))
+            active = torch.cat([active[~merged], parent_ids])
+            num_nodes += num_parents
+
+        # scales and rotations of the parents from their covariances
+        eigvals, eigvecs = torch.linalg.eigh(torch.cat(covs[1:]))
+        flip = torch.linalg.det(eigvecs) < 0
+        eigvecs[flip, :, 2] = -eigvecs[flip, :, 2]
+        parent_scales = torch.sqrt(eigvals.clamp(min=1e-12)) / glob_scale
+        parent_quats = _torch_impl.rotmat_to_quat(eigvecs)
+        self.means3d = torch.cat(means)
+        self.scales = torch.cat([scales, parent_scales])
+        self.quats = torch.cat([quats, parent_quats])
+        self.colors = torch.cat(feats)
+        self.opacities = torch.cat(alphas)[:, None]
+        self.radii = torch.cat(radii)
+        self.levels = torch.cat(levels)
+        self.parents = torch.cat(parents)
+        self.roots = torch.nonzero(self.parents < 0)[:, 0]
+
+        # children of node n are children[child_offsets[n]:child_offsets[n + 1]]
+        has_parent = torch.nonzero(self.parents >= 0)[:, 0]
+        order = torch.argsort(self.parents[has_parent], stable=True)
+        self.children = has_parent[order]
+        counts = torch.bincount(self.parents[has_parent], minlength=num_nodes)
+        self.child_offsets = torch.cat([counts.new_zeros(1), torch.cumsum(counts, 0)])
+
+    @property
+    def num_nodes(self) -> int:
+        return self.means3d.shape[0]
+
+    def cut(
+        self,
+        viewmat: Float[Tensor, "4 4"],
+        fx: float,
+        fy: float,
+        pixel_size: float = 1.0,
+        max_primitives: Optional[int] = None,
+        clip_thresh: float = 0.01,
+    ) -> Tensor:
+        """Selects the nodes to render for a view.
+
+        Starting from the roots, nodes whose bounding sphere projects to more than
+        ``pixel_size`` pixels are replaced by their children, level after level.
+        Nodes reaching into the near plane are always refined, nodes entirely
+        behind it never are. Every leaf is covered by exactly one selected node.
+
+        Args:
+            viewmat (Tensor): view matrix for rendering.
+            fx (float): focal length x.
+            fy (float): focal length y.
+            pixel_size (float): largest projected radius, in pixels, of a node rendered in place of its children.
+            max_primitives (int): if given, nodes are refined largest first only while the cut stays within this many nodes.
+            clip_thresh (float): minimum z depth threshold.
+
+        Returns:
+            A Tensor:
+
+            - **ids** (Tensor): indices of the selected nodes.
+        """
+        viewmat = viewmat.to(self.means3d)
+        focal = max(fx, fy)
+        frontier = self.roots
+        selected = []
+        num_selected = 0
+        while len(frontier) > 0:
+            depths = self.means3d[frontier] @ viewmat[2, :3] + viewmat[2, 3]
+            nearest = depths - self.radii[frontier]
+            size = focal * self.radii[frontier] / nearest.clamp(min=clip_thresh)
+            size = torch.where(nearest > clip_thresh, size, float("inf"))
+            # nodes entirely behind the camera are culled by the projection anyway
+            size = torch.where(depths + self.radii[frontier] > clip_thresh, size, 0.0)
+            num_children = (
+                self.child_offsets[frontier + 1] - self.child_offsets[frontier]
+            )
+            refine = (size > pixel_size) & (num_children > 0)
+
+            if max_primitives is not None:
+                # refining a node replaces it by its children
+                budget = max_primitives - num_selected - len(frontier)
+                order = torch.argsort(size.masked_fill(~refine, -1), descending=True)
+                extra = torch.cumsum((num_children[order] - 1) * refine[order], 0)
+                refine[order] &= extra <= budget
+
+            selected.append(frontier[~refine])
+            num_selected += len(selected[-1])
+            nodes = frontier[refine]
+            starts = self.child_offsets[nodes]
+            counts = self.child_offsets[nodes + 1] - starts
+            ends = torch.cumsum(counts, dim=0)
+            total = int(ends[-1]) if len(ends) > 0 else 0
+            positions = torch.arange(total, device=counts.device)
+            positions += torch.repeat_interleave(starts - (ends - counts), counts)
+            frontier = self.children[positions]
+        return torch.cat(selected)
@@ -11,6 +11,14 @@ def _make_lazy_mps_func(name: str) -> Callable:
     return call_mps
 
 
+def warmup() -> None:
+    """Loads the mps extension now, building it if needed, instead of on first use."""
+    # pylint: disable=import-outside-toplevel
+    from ._backend import load_extension
+
+    load_extension()
+
+
 nd_rasterize_forward = _make_lazy_mps_func("nd_rasterize_forward")
 nd_rasterize_backward = _make_lazy_mps_func("nd_rasterize_backward")
 rasterize_forward = _make_lazy_mps_func("rasterize_forward")
@@ -1,12 +1,16 @@
 """Python bindings for 3D gaussian projection"""
 
-from typing import Tuple
+from typing import Sequence, Tuple, Union
 
+import torch
 from jaxtyping import Float
 from torch import Tensor
 from torch.autograd import Function
 
-import gsplat.mps as _C
+from .backends import get_backend
+
+# a value shared by all cameras, or one value per camera
+Intrinsic = Union[float, Sequence[float], Tensor]
 
 
 def project_gaussians(
@@ -99,6 +103,7 @@ class _ProjectGaussians(Function):
         if num_points < 1 or means3d.shape[-1] != 3:
             raise ValueError(f"Invalid shape for means3d: {means3d.shape}")
 
+        _C = get_backend(means3d.device)
         (
             cov3d,
             xys,
@@ -161,6 +166,7 @@ class _ProjectGaussians(Function):
             conics,
         ) = ctx.saved_tensors
 
+        _C = get_backend(means3d.device)
         (v_cov2d, v_cov3d, v_mean3d, v_scale, v_quat) = _C.project_gaussians_backward(
             ctx.num_points,
             means3d,
@@ -214,3 +220,281 @@ class _ProjectGaussians(Function):
             # clip_thresh,
             None,
         )
+
+
+def project_gaussians_batched(
+    means3d: Float[Tensor, "*batch 3"],
+    scales: Float[Tensor, "*batch 3"],
+    glob_scale: float,
+    quats: Float[Tensor, "*batch 4"],
+    viewmats: Float[Tensor, "cameras 4 4"],
+    projmats: Float[Tensor, "cameras 4 4"],
+    fx: Intrinsic,
+    fy: Intrinsic,
+    cx: Intrinsic,
+    cy: Intrinsic,
+    img_height: int,
+    img_width: int,
+    tile_bounds: Tuple[int, int, int],
+    clip_thresh: float = 0.01,
+) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor, Tensor]:
+    """Projects 3D gaussians to 2D in several cameras at once, see :func:`project_gaussians`.
+
+    On the cpu backend, the 3D covariances are computed once and projected into
+    every camera. The cuda and mps kernels project one camera at a time and
+    compute them again for each camera, so batching there only saves the
+    Python overhead of separate calls. All cameras render images of the same
+    size.
+
+    Note:
+        This function is differentiable w.r.t the means3d, scales and quats inputs,
+        the gradients of all cameras are summed.
+
+    Args:
+       means3d (Tensor): xyzs of gaussians.
+       scales (Tensor): scales of the gaussians.
+       glob_scale (float): A global scaling factor applied to the scene.
+       quats (Tensor): rotations in quaternion [w,x,y,z] format.
+       viewmats (Tensor): view matrices of the cameras, of shape (cameras, 4, 4).
+       projmats (Tensor): projection matrices of the cameras, of shape (cameras, 4, 4).
+       fx (float or Tensor): focal length x, shared or one per camera.
+       fy (float or Tensor): focal length y, shared or one per camera.
+       cx (float or Tensor): principal point x, shared or one per camera.
+       cy (float or Tensor): principal point y, shared or one per camera.
+       img_height (int): height of the rendered images.
+       img_width (int): width of the rendered images.
+       tile_bounds (Tuple): tile dimensions as a len 3 tuple (tiles.x , tiles.y, 1).
+       clip_thresh (float): minimum z depth threshold.
+
+    Returns:
+        A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor, Tensor}:
+
+        - **xys** (Tensor): x,y locations of 2D gaussian projections, of shape (cameras, N, 2).
+        - **depths** (Tensor): z depth of gaussians, of shape (cameras, N).
+        - **radii** (Tensor): radii of 2D gaussian projections, of shape (cameras, N).
+        - **conics** (Tensor): conic parameters for 2D gaussian, of shape (cameras, N, 3).
+        - **num_tiles_hit** (Tensor): number of tiles hit per gaussian, of shape (cameras, N).
+        - **cov3d** (Tensor): 3D covariances, shared by all cameras.
+    """
+    if viewmats.dim() != 3 or viewmats.shape[-2:] != (4, 4):
+        raise ValueError(f"Invalid shape for viewmats: {viewmats.shape}")
+    if projmats.shape != viewmats.shape:
+        raise ValueError(
+            f"projmats {projmats.shape} does not match viewmats {viewmats.shape}"
+        )
+    num_cameras = viewmats.shape[0]
+    intrins = torch.stack(
+        [
+            torch.as_tensor(v, dtype=means3d.dtype, device=means3d.device).expand(
+                num_cameras
+            )
+            for v in (fx, fy, cx, cy)
+        ],
+        dim=-1,
+    )  # (cameras, 4)
+    return _ProjectGaussiansBatched.apply(
+        means3d.contiguous(),
+        scales.contiguous(),
+        glob_scale,
+        quats.contiguous(),
+        viewmats.contiguous(),
+        projmats.contiguous(),
+        intrins,
+        img_height,
+        img_width,
+        tile_bounds,
+        clip_thresh,
+    )
+
+
+def _project_per_camera_forward(
+    _C,
+    num_points,
+    means3d,
+    scales,
+    glob_scale,
+    quats,
+    viewmats,
+    projmats,
+    intrins,
+    img_height,
+    img_width,
+    tile_bounds,
+    clip_thresh,
+):
+    # backends without a batched kernel project one camera at a time, each call
+    # computing the same 3D covariances again
+    outputs = [
+        _C.project_gaussians_forward(
+            num_points,
+            means3d,
+            scales,
+            glob_scale,
+            quats,
+            viewmat,
+            projmat,
+            *camera_intrins,
+            img_height,
+            img_width,
+            tile_bounds,
+            clip_thresh,
+        )
+        for viewmat, projmat, camera_intrins in zip(
+            viewmats, projmats, intrins.tolist()
+        )
+    ]
+    cov3d = outputs[0][0]
+    return (cov3d,) + tuple(torch.stack(output) for output in zip(*outputs))[1:]
+
+
+def _project_per_camera_backward(
+    _C,
+    num_points,
+    means3d,
+    scales,
+    glob_scale,
+    quats,
+    viewmats,
+    projmats,
+    intrins,
+    img_height,
+    img_width,
+    cov3d,
+    radii,
+    conics,
+    v_xy,
+    v_depth,
+    v_conic,
+):
+    grads = [
+        _C.project_gaussians_backward(
+            num_points,
+            means3d,
+            scales,
+            glob_scale,
+            quats,
+            viewmats[i],
+            projmats[i],
+            *intrins[i].tolist(),
+            img_height,
+            img_width,
+            cov3d,
+            radii[i],
+            conics[i],
+            v_xy[i],
+            v_depth[i],
+            v_conic[i],
+        )
+        for i in range(viewmats.shape[0])
+    ]
+    v_cov2d, v_cov3d, v_mean3d, v_scale, v_quat = zip(*grads)
+    return (
+        torch.stack(v_cov2d),
+        sum(v_cov3d),
+        sum(v_mean3d),
+        sum(v_scale),
+        sum(v_quat),
+    )
+
+
+class _ProjectGaussiansBatched(Function):
+    """Project 3D gaussians to 2D in several cameras."""
+
+    @staticmethod
+    def forward(
+        ctx,
+        means3d: Float[Tensor, "*batch 3"],
+        scales: Float[Tensor, "*batch 3"],
+        glob_scale: float,
+        quats: Float[Tensor, "*batch 4"],
+        viewmats: Float[Tensor, "cameras 4 4"],
+        projmats: Float[Tensor, "cameras 4 4"],
+        intrins: Float[Tensor, "cameras 4"],
+        img_height: int,
+        img_width: int,
+        tile_bounds: Tuple[int, int, int],
+        clip_thresh: float = 0.01,
+    ):
+        num_points = means3d.shape[-2]
+        if num_points < 1 or means3d.shape[-1] != 3:
+            raise ValueError(f"Invalid shape for means3d: {means3d.shape}")
+
+        _C = get_backend(means3d.device)
+        args = (num_points, means3d, scales, glob_scale, quats, viewmats, projmats)
+        args += (intrins, img_height, img_width, tile_bounds, clip_thresh)
+        if hasattr(_C, "project_gaussians_batched_forward"):
+            outputs = _C.project_gaussians_batched_forward(*args)
+        else:
+            outputs = _project_per_camera_forward(_C, *args)
+        cov3d, xys, depths, radii, conics, num_tiles_hit = outputs
+
+        # Save non-tensors.
+        ctx.img_height = img_height
+        ctx.img_width = img_width
+        ctx.num_points = num_points
+        ctx.glob_scale = glob_scale
+
+        # Save tensors.
+        ctx.save_for_backward(
+            means3d,
+            scales,
+            quats,
+            viewmats,
+            projmats,
+            intrins,
+            cov3d,
+            radii,
+            conics,
+        )
+
+        return (xys, depths, radii, conics, num_tiles_hit, cov3d)
+
+    @staticmethod
+    def backward(ctx, v_xys, v_depths, v_radii, v_conics, v_num_tiles_hit, v_cov3d):
+        (
+            means3d,
+            scales,
+            quats,
+            viewmats,
+            projmats,
+            intrins,
+            cov3d,
+            radii,
+            conics,
+        ) = ctx.saved_tensors
+
+        _C = get_backend(means3d.device)
+        args = (ctx.num_points, means3d, scales, ctx.glob_scale, quats, viewmats)
+        args += (projmats, intrins, ctx.img_height, ctx.img_width, cov3d, radii)
+        args += (conics, v_xys, v_depths, v_conics)
+        if hasattr(_C, "project_gaussians_batched_backward"):
+            grads = _C.project_gaussians_batched_backward(*args)
+        else:
+            grads = _project_per_camera_backward(_C, *args)
+        v_cov2d, v_cov3d, v_mean3d, v_scale, v_quat = grads
+
+        # Return a gradient for each input.
+        return (
+            # means3d: Float[Tensor, "*batch 3"],
+            v_mean3d,
+            # scales: Float[Tensor, "*batch 3"],
+            v_scale,
+            # glob_scale: float,
+            None,
+            # quats: Float[Tensor, "*batch 4"],
+            v_quat,
+            # viewmats: Float[Tensor, "cameras 4 4"],
+            None,
+            # projmats: Float[Tensor, "cameras 4 4"],
+            None,
+            # intrins: Float[Tensor, "cameras 4"],
+            None,
+            # img_height: int,
+            None,
+            # img_width: int,
+            None,
+            # tile_bounds: Tuple[int, int, int],
+            None,
+            # clip_thresh,
+            None,
+        )
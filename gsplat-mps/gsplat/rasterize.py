@@ -7,8 +7,14 @@ from jaxtyping import Float, Int
 from torch import Tensor
 from torch.autograd import Function
 
-import gsplat.mps as _C
-from .utils import bin_and_sort_gaussians, compute_cumulative_intersects
+from .backends import get_backend
+from .utils import (
+    _bin_and_sort_gaussians,
+    _bin_and_sort_gaussians_batched,
+    compact_gaussians,
+    compute_cumulative_intersects,
+    TileSortCache,
+)
 
 
 def rasterize_gaussians(
@@ -23,6 +29,8 @@ def rasterize_gaussians(
     img_width: int,
     background: Optional[Float[Tensor, "channels"]] = None,
     return_alpha: Optional[bool] = False,
+    sort_cache: Optional[TileSortCache] = None,
+    compact: bool = False,
 ) -> Tensor:
     """Rasterizes 2D gaussians by sorting and binning gaussian intersections for each tile and returns an N-dimensional output using alpha-compositing.
 
@@ -41,6 +49,8 @@ def rasterize_gaussians(
         img_width (int): width of the rendered image.
         background (Tensor): background color
         return_alpha (bool): whether to return alpha channel
+        sort_cache (TileSortCache): sorted intersections of the previous frame, to repair instead of sorting again. Not repaired with ``compact``, which renumbers the gaussians whenever their visibility changes.
+        compact (bool): whether to drop the gaussians hitting no tile first, see :func:`compact_gaussians`. Defeats ``sort_cache``, use one or the other.
 
     Returns:
         A Tensor:
@@ -67,6 +77,20 @@ def rasterize_gaussians(
     if colors.ndimension() != 2:
         raise ValueError("colors must have dimensions (N, D)")
 
+    if compact:
+        (
+            _,
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            colors,
+            opacity,
+        ) = compact_gaussians(
+            num_tiles_hit, xys, depths, radii, conics, num_tiles_hit, colors, opacity
+        )
+
     return _RasterizeGaussians.apply(
         xys.contiguous(),
         depths.contiguous(),
@@ -79,6 +103,7 @@ def rasterize_gaussians(
         img_width,
         background.contiguous(),
         return_alpha,
+        sort_cache,
     )
 
 
@@ -99,6 +124,7 @@ class _RasterizeGaussians(Function):
         img_width: int,
         background: Optional[Float[Tensor, "channels"]] = None,
         return_alpha: Optional[bool] = False,
+        sort_cache: Optional[TileSortCache] = None,
     ) -> Tensor:
         num_points = xys.size(0)
         BLOCK_X, BLOCK_Y = 16, 16
@@ -128,7 +154,8 @@ class _RasterizeGaussians(Function):
                 isect_ids_sorted,
                 gaussian_ids_sorted,
                 tile_bins,
-            ) = bin_and_sort_gaussians(
+                depth_error,
+            ) = _bin_and_sort_gaussians(
                 num_points,
                 num_intersects,
                 xys,
@@ -136,7 +163,9 @@ class _RasterizeGaussians(Function):
                 radii,
                 cum_tiles_hit,
                 tile_bounds,
+                sort_cache,
             )
+            _C = get_backend(xys.device)
             if colors.shape[-1] == 3:
                 rasterize_fn = _C.rasterize_forward
             else:
@@ -204,6 +233,7 @@ class _RasterizeGaussians(Function):
             v_opacity = torch.zeros_like(opacity)
 
         else:
+            _C = get_backend(xys.device)
             if colors.shape[-1] == 3:
                 rasterize_fn = _C.rasterize_backward
             else:
@@ -236,4 +266,287 @@ class _RasterizeGaussians(Function):
             None,  # img_width
             None,  # background
             None,  # return_alpha
+            None,  # sort_cache
+        )
+
+
+def rasterize_gaussians_batched(
+    xys: Float[Tensor, "views batch 2"],
+    depths: Float[Tensor, "views batch"],
+    radii: Float[Tensor, "views batch"],
+    conics: Float[Tensor, "views batch 3"],
+    num_tiles_hit: Int[Tensor, "views batch"],
+    colors: Float[Tensor, "*views batch channels"],
+    opacity: Float[Tensor, "*views batch 1"],
+    img_height: int,
+    img_width: int,
+    background: Optional[Float[Tensor, "channels"]] = None,
+    return_alpha: Optional[bool] = False,
+) -> Tensor:
+    """Rasterizes the 2D gaussians of several views in one call, see :func:`rasterize_gaussians`.
+
+    The projections of the views, e.g. the outputs of :func:`project_gaussians_batched`,
+    are binned and sorted together and all images are rendered by a single
+    call of the rasterization kernel.
+
+    Note:
+        This function is differentiable w.r.t the xys, conics, colors, and opacity inputs.
+
+    Args:
+        xys (Tensor): xy coords of 2D gaussians, of shape (views, N, 2).
+        depths (Tensor): depths of 2D gaussians, of shape (views, N).
+        radii (Tensor): radii of 2D gaussians, of shape (views, N).
+        conics (Tensor): conics (inverse of covariance) of 2D gaussians in upper triangular format, of shape (views, N, 3).
+        num_tiles_hit (Tensor): number of tiles hit per gaussian, of shape (views, N).
+        colors (Tensor): N-dimensional features associated with the gaussians, shared (N, D) or per view (views, N, D).
+            Shared features are read in place on cpu and copied for every view on the other backends.
+        opacity (Tensor): opacity associated with the gaussians, shared (N, 1) or per view (views, N, 1).
+        img_height (int): height of the rendered images.
+        img_width (int): width of the rendered images.
+        background (Tensor): background color
+        return_alpha (bool): whether to return alpha channel
+
+    Returns:
+        A Tensor:
+
+        - **out_img** (Tensor): N-dimensional rendered output images, of shape (views, H, W, D).
+        - **out_alpha** (Optional[Tensor]): Alpha channels of the rendered output images.
+    """
+    if colors.dtype == torch.uint8:
+        # make sure colors are float [0,1]
+        colors = colors.float() / 255
+
+    if background is not None:
+        assert (
+            background.shape[0] == colors.shape[-1]
+        ), f"incorrect shape of background color tensor, expected shape {colors.shape[-1]}"
+    else:
+        background = torch.ones(
+            colors.shape[-1], dtype=torch.float32, device=colors.device
+        )
+
+    if xys.ndimension() != 3 or xys.size(2) != 2:
+        raise ValueError("xys must have dimensions (B, N, 2)")
+
+    if colors.ndimension() not in (2, 3):
+        raise ValueError("colors must have dimensions (N, D) or (B, N, D)")
+
+    num_views, num_points = xys.shape[:2]
+    # shared colors and opacities get the gradients of all views summed
+    if not getattr(get_backend(xys.device), "rasterize_shared_features", False):
+        colors = colors.expand(num_views, num_points, colors.shape[-1])
+        opacity = opacity.expand(num_views, num_points, 1)
+
+    return _RasterizeGaussiansBatched.apply(
+        xys.contiguous(),
+        depths.contiguous(),
+        radii.contiguous(),
+        conics.contiguous(),
+        num_tiles_hit.contiguous(),
+        colors.contiguous(),
+        opacity.contiguous(),
+        img_height,
+        img_width,
+        background.contiguous(),
+        return_alpha,
+    )
+
+
+class _RasterizeGaussiansBatched(Function):
+    """Rasterizes the 2D gaussians of several views
+
+    The views are rendered as one tall image, view ``v`` covering the tile rows
+    ``v * tiles.y`` to ``(v + 1) * tiles.y``, which the tile ids of the combined
+    (view, tile, depth) sort already address. The gaussians of a view are moved
+    down to its rows and the images are cropped back to ``img_height`` at the end.
+    Shared (N, D) colors and (N, 1) opacities are passed to the kernel as they are.
+    """
+
+    @staticmethod
+    def forward(
+        ctx,
+        xys: Float[Tensor, "views batch 2"],
+        depths: Float[Tensor, "views batch"],
+        radii: Float[Tensor, "views batch"],
+        conics: Float[Tensor, "views batch 3"],
+        num_tiles_hit: Int[Tensor, "views batch"],
+        colors: Float[Tensor, "*views batch channels"],
+        opacity: Float[Tensor, "*views batch 1"],
+        img_height: int,
+        img_width: int,
+        background: Optional[Float[Tensor, "channels"]] = None,
+        return_alpha: Optional[bool] = False,
+    ) -> Tensor:
+        num_views, num_points = xys.shape[:2]
+        channels = colors.shape[-1]
+        BLOCK_X, BLOCK_Y = 16, 16
+        tile_bounds = (
+            (img_width + BLOCK_X - 1) // BLOCK_X,
+            (img_height + BLOCK_Y - 1) // BLOCK_Y,
+            1,
+        )
+        view_height = tile_bounds[1] * BLOCK_Y
+        block = (BLOCK_X, BLOCK_Y, 1)
+        img_size = (img_width, num_views * view_height, 1)
+
+        num_intersects, cum_tiles_hit = compute_cumulative_intersects(
+            num_tiles_hit.reshape(-1)
+        )
+
+        xys = xys.reshape(-1, 2)
+        offsets = torch.arange(num_views, device=xys.device) * view_height
+        xys_stacked = xys + torch.stack(
+            [torch.zeros_like(offsets), offsets], dim=-1
+        ).repeat_interleave(num_points, dim=0).to(xys)
+        conics = conics.reshape(-1, 3)
+        colors_shape, opacity_shape = colors.shape, opacity.shape
+        colors = colors.reshape(-1, channels)
+        opacity = opacity.reshape(-1, 1)
+
+        if num_intersects < 1:
+            out_img = (
+                torch.ones(
+                    num_views * view_height, img_width, channels, device=xys.device
+                )
+                * background
+            )
+            gaussian_ids_sorted = torch.zeros(0, 1, device=xys.device)
+            tile_bins = torch.zeros(0, 2, device=xys.device)
+            final_Ts = torch.zeros(
+                num_views * view_height, img_width, device=xys.device
+            )
+            final_idx = torch.zeros(
+                num_views * view_height, img_width, device=xys.device
+            )
+        else:
+            (
+                isect_ids_unsorted,
+                gaussian_ids_unsorted,
+                isect_ids_sorted,
+                gaussian_ids_sorted,
+                tile_bins,
+                depth_error,
+            ) = _bin_and_sort_gaussians_batched(
+                num_views,
+                num_points,
+                num_intersects,
+                xys,
+                depths.reshape(-1),
+                radii.reshape(-1),
+                cum_tiles_hit,
+                tile_bounds,
+            )
+            _C = get_backend(xys.device)
+            if channels == 3:
+                rasterize_fn = _C.rasterize_forward
+            else:
+                rasterize_fn = _C.nd_rasterize_forward
+
+            out_img, final_Ts, final_idx = rasterize_fn(
+                (tile_bounds[0], num_views * tile_bounds[1], 1),
+                block,
+                img_size,
+                gaussian_ids_sorted,
+                tile_bins,
+                xys_stacked,
+                conics,
+                colors,
+                opacity,
+                background,
+            )
+
+        ctx.img_width = img_width
+        ctx.img_height = img_height
+        ctx.num_views = num_views
+        ctx.num_intersects = num_intersects
+        ctx.colors_shape = colors_shape
+        ctx.opacity_shape = opacity_shape
+        ctx.save_for_backward(
+            gaussian_ids_sorted,
+            tile_bins,
+            xys_stacked,
+            conics,
+            colors,
+            opacity,
+            background,
+            final_Ts,
+            final_idx,
+        )
+
+        out_img = out_img.view(num_views, view_height, img_width, channels)
+        out_img = out_img[:, :img_height]
+        if return_alpha:
+            out_alpha = 1 - final_Ts.view(num_views, view_height, img_width)
+            return out_img, out_alpha[:, :img_height]
+        else:
+            return out_img
+
+    @staticmethod
+    def backward(ctx, v_out_img, v_out_alpha=None):
+        img_height = ctx.img_height
+        img_width = ctx.img_width
+        num_views = ctx.num_views
+        num_intersects = ctx.num_intersects
+
+        if v_out_alpha is None:
+            v_out_alpha = torch.zeros_like(v_out_img[..., 0])
+
+        (
+            gaussian_ids_sorted,
+            tile_bins,
+            xys,
+            conics,
+            colors,
+            opacity,
+            background,
+            final_Ts,
+            final_idx,
+        ) = ctx.saved_tensors
+
+        if num_intersects < 1:
+            v_xy = torch.zeros_like(xys)
+            v_conic = torch.zeros_like(conics)
+            v_colors = torch.zeros_like(colors)
+            v_opacity = torch.zeros_like(opacity)
+
+        else:
+            # the padding rows below each view get no gradient
+            view_height = final_Ts.shape[0] // num_views
+            padding = view_height - img_height
+            v_out_img = torch.nn.functional.pad(v_out_img, (0, 0, 0, 0, 0, padding))
+            v_out_alpha = torch.nn.functional.pad(v_out_alpha, (0, 0, 0, padding))
+
+            _C = get_backend(xys.device)
+            if colors.shape[-1] == 3:
+                rasterize_fn = _C.rasterize_backward
+            else:
+                rasterize_fn = _C.nd_rasterize_backward
+            v_xy, v_conic, v_colors, v_opacity = rasterize_fn(
+                num_views * view_height,
+                img_width,
+                gaussian_ids_sorted,
+                tile_bins,
+                xys,
+                conics,
+                colors,
+                opacity,
+                background,
+                final_Ts,
+                final_idx,
+                v_out_img.reshape(num_views * view_height, img_width, -1).contiguous(),
+                v_out_alpha.reshape(num_views * view_height, img_width).contiguous(),
+            )
+
+        return (
+            v_xy.view(num_views, -1, 2),  # xys
+            None,  # depths
+            None,  # radii
+            v_conic.view(num_views, -1, 3),  # conics
+            None,  # num_tiles_hit
+            v_colors.view(ctx.colors_shape),  # colors
+            v_opacity.view(ctx.opacity_shape),  # opacity
+            None,  # img_height
+            None,  # img_width
+            None,  # background
+            None,  # return_alpha
         )
@@ -1,11 +1,15 @@
 """Python bindings for SH"""
 
-import gsplat.mps as _C
+import math
+from typing import Optional
 
+import torch
 from jaxtyping import Float
 from torch import Tensor
 from torch.autograd import Function
 
+from .backends import get_backend
+
 
 def num_sh_bases(degree: int):
     if degree == 0:
@@ -78,7 +82,7 @@ class _SphericalHarmonics(Function):
         degree = deg_from_sh(coeffs.shape[-2])
         ctx.degree = degree
         ctx.save_for_backward(viewdirs)
-        return _C.compute_sh_forward(
+        return get_backend(coeffs.device).compute_sh_forward(
             num_points, degree, degrees_to_use, viewdirs, coeffs
         )
 
@@ -91,7 +95,115 @@ class _SphericalHarmonics(Function):
         return (
             None,
             None,
-            _C.compute_sh_backward(
+            get_backend(v_colors.device).compute_sh_backward(
                 num_points, degree, degrees_to_use, viewdirs, v_colors
             ),
         )
+
+
+class SHColorCache:
+    """Colors of static gaussians reused while the camera barely moves.
+
+    Colors are evaluated exactly and then returned as they are, without any
+    per-gaussian work, for as long as the camera stays close enough to where
+    they were evaluated for no viewing direction to turn by more than
+    ``tolerance``. A camera at distance ``r`` from the nearest gaussian may move
+    by ``r * sin(tolerance)``, so colors differ from those of
+    :func:`spherical_harmonics` by viewing directions at most ``tolerance``
+    radians away. A camera that moves further evaluates every color again, at
+    the cost of :func:`spherical_harmonics` and one norm per gaussian.
+
+    The cache is keyed on the camera rather than on each gaussian: telling
+    which gaussians still see a close direction takes a pass over all of them,
+    and gathering the coefficients of the others costs more than evaluating
+    their harmonics in place.
+
+    The cache assumes that the coefficients of a gaussian do not change, call
+    :meth:`reset` if they do::
+
+        cache = SHColorCache(tolerance=0.01)
+        for viewmat in trajectory:
+            position = camera_position(viewmat)
+            colors = cache(degree, means3d - position, coeffs, position)
+
+    Note:
+        This cache is not differentiable.
+
+    Args:
+        tolerance (float): largest angle, in radians, between a viewing direction and the one its color is evaluated at.
+    """
+
+    def __init__(self, tolerance: float = 0.01):
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self):
+        """Drops the cached colors."""
+        # camera of the last exact evaluation, the distance it may move without
+        # a new one, and the gaussians and colors of that evaluation
+        self._anchor = None
+        self._anchor_degrees = None
+        self._reach = 0.0
+        self._anchor_ids = None
+        self._anchor_colors = None
+        # gaussians of the last call served from the cache, and evaluated
+        self.num_hits = 0
+        self.num_misses = 0
+        # calls served without evaluating any gaussian
+        self.num_skipped = 0
+
+    def __call__(
+        self,
+        degrees_to_use: int,
+        viewdirs: Float[Tensor, "*batch 3"],
+        coeffs: Float[Tensor, "*batch D C"],
+        camera_center: Float[Tensor, "3"],
+        ids: Optional[Tensor] = None,
+    ) -> Float[Tensor, "*batch C"]:
+        """Colors of gaussians seen along viewdirs, see :func:`spherical_harmonics`.
+
+        Colors reused for a camera that barely moved are the tensor returned
+        before, so they should not be modified in place.
+
+        Args:
+            degrees_to_use (int): degree of SHs to use (<= total number available).
+            viewdirs (Tensor): viewing directions, from camera_center to the gaussians.
+            coeffs (Tensor): harmonic coefficients.
+            camera_center (Tensor): position of the camera.
+            ids (Tensor): IDs of the gaussians in the scene, when only some of them are given.
+
+        Returns:
+            The spherical harmonics.
+        """
+        with torch.no_grad():
+            if self._near_anchor(degrees_to_use, camera_center, ids, coeffs.shape[0]):
+                self.num_hits, self.num_misses = coeffs.shape[0], 0
+                self.num_skipped += 1
+                return self._anchor_colors
+            colors = spherical_harmonics(degrees_to_use, viewdirs, coeffs.detach())
+            self.num_hits, self.num_misses = 0, coeffs.shape[0]
+            self._set_anchor(degrees_to_use, camera_center, viewdirs, ids, colors)
+            return colors
+
+    def _near_anchor(self, degrees_to_use, camera_center, ids, num_points) -> bool:
+        if self._anchor is None or degrees_to_use != self._anchor_degrees:
+            return False
+        if len(self._anchor_colors) != num_points:
+            return False
+        if (ids is None) != (self._anchor_ids is None):
+            return False
+        if ids is not None and not torch.equal(ids, self._anchor_ids):
+            return False
+        moved = torch.linalg.vector_norm(camera_center.to(self._anchor) - self._anchor)
+        return float(moved) <= self._reach
+
+    def _set_anchor(self, degrees_to_use, camera_center, viewdirs, ids, colors):
+        # a camera moving by d turns the direction to a point at distance r by
+        # at most asin(d / r), so by the tolerance for d = r sin(tolerance)
+        distance = torch.linalg.vector_norm(viewdirs, dim=-1)
+        nearest = float(distance.min()) if len(distance) > 0 else math.inf
+        self._reach = nearest * math.sin(min(self.tolerance, math.pi / 2))
+        self._anchor_degrees = degrees_to_use
+        self._anchor = camera_center.detach().to(colors.device, torch.float32)
+        self._anchor_ids = None if ids is None else ids.clone()
+        self._anchor_colors = colors
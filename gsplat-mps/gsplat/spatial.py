@@ -0,0 +1,251 @@
+"""Spatial index over gaussians for culling them against a view frustum, and their storage order"""
+
+from typing import Optional
+
+import torch
+from torch.optim import Optimizer
+from jaxtyping import Float
+from torch import Tensor
+
+
+class SpatialIndex:
+    """Uniform grid over the means of the gaussians, for frustum culling.
+
+    Each gaussian is stored in the grid cell containing its mean, and every cell
+    keeps the bounding box of the 3-sigma extents of its gaussians. A query tests
+    the occupied cells against the view frustum and then the gaussians of the
+    visible cells one by one, so its cost scales with the number of visible
+    gaussians and cells rather than with the size of the scene.
+
+    The candidates can be projected, shaded and rendered instead of the whole scene::
+
+        index = SpatialIndex(means3d, scales, glob_scale)
+        ids = index.query(viewmat, fx, fy, cx, cy, img_height, img_width)
+        xys, depths, radii, conics, num_tiles_hit, cov3d = project_gaussians(
+            means3d[ids], scales[ids], glob_scale, quats[ids], viewmat, ...
+        )
+
+    When the gaussians move between frames, :meth:`refit` updates the cell bounds
+    without reassigning gaussians to cells. Build a new index once they have moved
+    far from their cells, as the cell bounds then grow and cull less.
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        scales (Tensor): scales of the gaussians, None to treat them as points.
+        glob_scale (float): A global scaling factor applied to the scene.
+        points_per_cell (int): average number of gaussians per occupied cell to aim for.
+    """
+
+    def __init__(
+        self,
+        means3d: Float[Tensor, "*batch 3"],
+        scales: Optional[Float[Tensor, "*batch 3"]] = None,
+        glob_scale: float = 1.0,
+        points_per_cell: int = 64,
+    ):
+        means3d = means3d.detach()
+        self.num_points = means3d.shape[0]
+        lower = means3d.amin(dim=0)
+        extent = (means3d.amax(dim=0) - lower).clamp(min=1e-6)
+        cells_per_axis = max(1, round((self.num_points / points_per_cell) ** (1 / 3)))
+        cell_size = extent.max() / cells_per_axis
+        self.grid_size = torch.clamp(torch.ceil(extent / cell_size), min=1).long()
+
+        cell_xyz = torch.floor((means3d - lower) / cell_size).long()
+        cell_xyz = torch.minimum(cell_xyz.clamp(min=0), self.grid_size - 1)
+        nx, ny, nz = self.grid_size.tolist()
+        self.num_cells = nx * ny * nz
+        self._cell_ids = (cell_xyz[:, 0] * ny + cell_xyz[:, 1]) * nz + cell_xyz[:, 2]
+
+        # gaussians sorted by cell, cell c owns order[offsets[c]:offsets[c + 1]]
+        self._order = torch.argsort(self._cell_ids, stable=True)
+        counts = torch.bincount(self._cell_ids, minlength=self.num_cells)
+        self._counts = counts
+        self._offsets = torch.cumsum(counts, dim=0) - counts
+        self._occupied = torch.nonzero(counts > 0)[:, 0]
+
+        self.refit(means3d, scales, glob_scale)
+
+    def refit(
+        self,
+        means3d: Float[Tensor, "*batch 3"],
+        scales: Optional[Float[Tensor, "*batch 3"]] = None,
+        glob_scale: float = 1.0,
+    ):
+        """Updates the bounds of the cells for moved or resized gaussians.
+
+        Gaussians stay in the cells they were assigned to when the index was
+        built, so this is a single pass over the gaussians with no sorting.
+
+        Args:
+            means3d (Tensor): xyzs of gaussians, in the same order as when building the index.
+            scales (Tensor): scales of the gaussians, None to treat them as points.
+            glob_scale (float): A global scaling factor applied to the scene.
+        """
+        if means3d.shape[0] != self.num_points:
+            raise ValueError(
+                f"Expected {self.num_points} gaussians to refit, got {means3d.shape[0]}"
+            )
+        means3d = means3d.detach()
+        if scales is None:
+            radii = torch.zeros_like(means3d[:, 0])
+        else:
+            radii = 3.0 * glob_scale * scales.detach().amax(dim=-1)
+        index = self._cell_ids[:, None].expand(-1, 3)
+        lower = torch.full(
+            (self.num_cells, 3),
+            float("inf"),
+            dtype=means3d.dtype,
+            device=means3d.device,
+        )
+        upper = torch.full_like(lower, float("-inf"))
+        lower.scatter_reduce_(0, index, means3d - radii[:, None], reduce="amin")
+        upper.scatter_reduce_(0, index, means3d + radii[:, None], reduce="amax")
+        self._means3d = means3d
+        self._radii = radii
+        self._cell_lower = lower[self._occupied]
+        self._cell_upper = upper[self._occupied]
+
+    def query(
+        self,
+        viewmat: Float[Tensor, "4 4"],
+        fx: float,
+        fy: float,
+        cx: float,
+        cy: float,
+        img_height: int,
+        img_width: int,
+        clip_thresh: float = 0.01,
+        margin: float = 16.0,
+    ) -> Tensor:
+        """Returns the gaussians that may be visible in a view.
+
+        The result is conservative: every gaussian that :func:`project_gaussians`
+        would not cull is included.
+
+        Args:
+            viewmat (Tensor): view matrix for rendering.
+            fx (float): focal length x.
+            fy (float): focal length y.
+            cx (float): principal point x.
+            cy (float): principal point y.
+            img_height (int): height of the rendered image.
+            img_width (int): width of the rendered image.
+            clip_thresh (float): minimum z depth threshold.
+            margin (float): extra pixels around the image, for the blur added to projected covariances.
+
+        Returns:
+            A Tensor:
+
+            - **ids** (Tensor): sorted indices of the candidate gaussians.
+        """
+        viewmat = viewmat.to(self._means3d)
+        # frustum planes in camera space, a point p is inside if planes @ (p, 1) >= 0
+        planes = torch.tensor(
+            [
+                [0.0, 0.0, 1.0, -clip_thresh],
+                [fx, 0.0, cx + margin, 0.0],
+                [-fx, 0.0, img_width - cx + margin, 0.0],
+                [0.0, fy, cy + margin, 0.0],
+                [0.0, -fy, img_height - cy + margin, 0.0],
+            ],
+            dtype=viewmat.dtype,
+            device=viewmat.device,
+        )
+        # the same planes in world space
+        normals = planes[:, :3] @ viewmat[:3, :3]
+        offsets = planes[:, :3] @ viewmat[:3, 3] + planes[:, 3]
+
+        # a box is outside if its corner furthest along the normal is outside
+        corners = torch.where(
+            normals[None] >= 0, self._cell_upper[:, None], self._cell_lower[:, None]
+        )  # (cells, planes, 3)
+        inside = ((corners * normals).sum(-1) + offsets >= 0).all(dim=-1)
+        cells = self._occupied[inside]
+
+        # gather the gaussians of the visible cells
+        counts = self._counts[cells]
+        starts = self._offsets[cells]
+        ends = torch.cumsum(counts, dim=0)
+        total = int(ends[-1]) if len(ends) > 0 else 0
+        positions = torch.arange(total, device=counts.device)
+        positions += torch.repeat_interleave(starts - (ends - counts), counts)
+        ids = self._order[positions]
+
+        # and test each of them as a sphere of its 3-sigma radius
+        scale = torch.linalg.norm(normals, dim=-1)
+        distances = self._means3d[ids] @ normals.T + offsets
+        inside = (distances + self._radii[ids, None] * scale >= 0).all(dim=-1)
+        return torch.sort(ids[inside]).values
+
+
+def _spread_bits(x: Tensor) -> Tensor:
+    # inserts two zero bits between each of the 21 lower bits of x
+    x = x & 0x1FFFFF
+    x = (x | (x << 32)) & 0x1F00000000FFFF
+    x = (x | (x << 16)) & 0x1F0000FF0000FF
+    x = (x | (x << 8)) & 0x100F00F00F00F00F
+    x = (x | (x << 4)) & 0x10C30C30C30C30C3
+    x = (x | (x << 2)) & 0x1249249249249249
+    return x
+
+
+def morton_order(means3d: Float[Tensor, "*batch 3"], bits: int = 21) -> Tensor:
+    """Order of the gaussians along a Z-order (Morton) curve through their means.
+
+    Gaussians close in space are close along the curve, so storing them in this
+    order makes the per-gaussian reads of projection and rasterization, which
+    follow space through tiles and depths, hit nearby memory.
+
+    Args:
+        means3d (Tensor): xyzs of gaussians.
+        bits (int): bits of the grid coordinates along each axis, at most 21.
+
+    Returns:
+        A Tensor:
+
+        - **order** (Tensor): permutation of the gaussians, see :func:`reorder_gaussians`.
+    """
+    if not 1 <= bits <= 21:
+        raise ValueError(f"Expected 1 to 21 bits per axis, got {bits}")
+    means3d = means3d.detach()
+    lower = means3d.amin(dim=0)
+    extent = (means3d.amax(dim=0) - lower).max().clamp(min=1e-12)
+    cells = ((means3d - lower) / extent * ((1 << bits) - 1)).round().long()
+    codes = _spread_bits(cells[:, 0]) << 2
+    codes |= _spread_bits(cells[:, 1]) << 1
+    codes |= _spread_bits(cells[:, 2])
+    return torch.argsort(codes, stable=True)
+
+
+def reorder_gaussians(
+    order: Tensor, *tensors: Tensor, optimizer: Optional[Optimizer] = None
+):
+    """Permutes per-gaussian tensors in place, and their optimizer state if training.
+
+    The tensors keep their identity, so that the parameters held by an optimizer
+    stay the same objects. Their state of shape (N, ...) in ``optimizer``, such
+    as the moments of Adam, is permuted along::
+
+        order = morton_order(means3d)
+        reorder_gaussians(order, means3d, scales, quats, colors, opacities)
+
+    Args:
+        order (Tensor): permutation of the gaussians, e.g. from :func:`morton_order`.
+        *tensors (Tensor): tensors of shape (N, ...) to permute.
+        optimizer (Optimizer): optimizer whose state for ``tensors`` is permuted too.
+    """
+    num_points = order.shape[0]
+    for tensor in tensors:
+        if tensor.shape[0] != num_points:
+            raise ValueError(
+                f"Expected {num_points} gaussians to reorder, got {tensor.shape[0]}"
+            )
+        tensor.data = tensor.data.index_select(0, order.to(tensor.device))
+        if optimizer is None or tensor not in optimizer.state:
+            continue
+        state = optimizer.state[tensor]
+        for key, value in state.items():
+            # step counters and other scalars are left alone
+            if torch.is_tensor(value) and value.dim() > 0:
+                state[key] = value.index_select(0, order.to(value.device))
@@ -0,0 +1,322 @@
+"""Columnar scene files, memory mapped as tensors, and sequences of frames in them"""
+
+import json
+import os
+import struct
+from typing import Dict, Iterable, Optional
+
+import torch
+from torch import Tensor
+
+from .spatial import morton_order
+
+_MAGIC = b"GSPLATSC"
+# version 2 adds headers pointing to a column index at the end of the file
+_VERSION = 2
+# columns start on page boundaries, so that each of them maps on its own pages
+_ALIGNMENT = 4096
+# columns packed in one block start on cache lines
+_BLOCK_ALIGNMENT = 64
+# room for the header of a file whose columns are only known once written, so
+# that they start on the first page boundary
+_HEADER_SPACE = _ALIGNMENT - len(_MAGIC) - 8
+
+
+def _align(offset: int, alignment: int = _ALIGNMENT) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _column(tensor: Tensor, offset: int) -> Dict:
+    return {
+        "dtype": str(tensor.dtype).replace("torch.", ""),
+        "shape": list(tensor.shape),
+        "offset": offset,
+    }
+
+
+def save_scene(path: str, tensors: Dict[str, Tensor], reorder: bool = False):
+    """Writes tensors to a scene file, one page aligned column per tensor.
+
+    Any named tensors can be stored, e.g. ``means3d``, ``scales``, ``quats``,
+    ``colors`` and ``opacities``. See :func:`load_scene` to map them back::
+
+        save_scene("scene.gsplat", {"means3d": means3d, "scales": scales, ...})
+        scene = load_scene("scene.gsplat")
+        xys, depths, radii, conics, num_tiles_hit, cov3d = project_gaussians(
+            scene["means3d"], scene["scales"], glob_scale, scene["quats"], ...
+        )
+
+    With ``reorder``, the gaussians are stored along :func:`morton_order` of
+    ``means3d``, so that the loaded scene is already in that order without
+    permuting it on every load.
+
+    Args:
+        path (str): file to write.
+        tensors (Dict[str, Tensor]): tensors to store, by name.
+        reorder (bool): whether to store the gaussians in Morton order, permuting every tensor with as many rows as ``means3d``.
+    """
+    if reorder:
+        tensors = _reordered(tensors, morton_order(tensors["means3d"]))
+    columns = {}
+    offset = 0
+    for name, tensor in tensors.items():
+        columns[name] = _column(tensor, offset)
+        offset = _align(offset + tensor.numel() * tensor.element_size())
+    header = json.dumps({"version": _VERSION, "columns": columns}).encode()
+    # the columns follow the header, their offsets are relative to its end
+    start = _align(len(_MAGIC) + 8 + len(header))
+    with open(path, "wb") as f:
+        f.write(_MAGIC + struct.pack("<Q", len(header)) + header)
+        f.truncate(start + offset)
+    if offset == 0:
+        return
+    data = torch.from_file(path, shared=True, size=start + offset, dtype=torch.uint8)
+    for name, tensor in tensors.items():
+        begin = start + columns[name]["offset"]
+        size = tensor.numel() * tensor.element_size()
+        data[begin : begin + size] = tensor.detach().cpu().reshape(-1).view(torch.uint8)
+
+
+def load_scene(path: str) -> Dict[str, Tensor]:
+    """Maps the tensors of a scene file into memory, without reading them.
+
+    The tensors share one private memory map of the file: pages are read on
+    first access, and processes mapping the same file share them in the page
+    cache rather than each holding a copy. Writing to the tensors is allowed but
+    only changes the pages of the process writing, never the file.
+
+    Args:
+        path (str): file written by :func:`save_scene`.
+
+    Returns:
+        A Dict[str, Tensor]:
+
+        - **tensors** (Dict[str, Tensor]): cpu tensors of the file, by name.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a gsplat scene file")
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+        if header["version"] > _VERSION:
+            raise ValueError(
+                f"{path} has version {header['version']}, expected at most {_VERSION}"
+            )
+        columns = header.get("columns")
+        if columns is None:
+            # the columns of a file written as they came are indexed at its end
+            f.seek(header["index"]["offset"])
+            columns = json.loads(f.read(header["index"]["size"]))
+    start = _align(len(_MAGIC) + 8 + header_size)
+    size = os.path.getsize(path)
+    storage = None
+    if size > start:
+        storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=size)
+
+    tensors = {}
+    for name, column in columns.items():
+        dtype = getattr(torch, column["dtype"])
+        tensor = torch.empty(0, dtype=dtype)
+        if storage is not None:
+            offset = (start + column["offset"]) // tensor.element_size()
+            tensor.set_(storage, offset, column["shape"])
+        else:
+            tensor = tensor.reshape(column["shape"])
+        tensors[name] = tensor
+    return tensors
+
+
+def _reordered(tensors: Dict[str, Tensor], order: Tensor) -> Dict[str, Tensor]:
+    # tensors with one row per gaussian permuted, the others left alone
+    return {
+        name: (
+            tensor.index_select(0, order.to(tensor.device))
+            if tensor.dim() > 0 and tensor.shape[0] == order.shape[0]
+            else tensor
+        )
+        for name, tensor in tensors.items()
+    }
+
+
+def _append_block(
+    path: str, end: int, tensors: Dict[str, Tensor], columns: Dict[str, Dict]
+) -> int:
+    # writes tensors as one page aligned block past the end of the columns,
+    # cache line aligned within it, and returns the new end of the columns
+    begin = offset = _align(end)
+    for name, tensor in tensors.items():
+        offset = _align(offset, _BLOCK_ALIGNMENT)
+        columns[name] = _column(tensor, offset)
+        offset += tensor.numel() * tensor.element_size()
+    if offset == begin:
+        return end
+    size = _ALIGNMENT + offset
+    os.truncate(path, size)
+    data = torch.from_file(path, shared=True, size=size, dtype=torch.uint8)
+    for name, tensor in tensors.items():
+        position = _ALIGNMENT + columns[name]["offset"]
+        nbytes = tensor.numel() * tensor.element_size()
+        data[position : position + nbytes] = tensor.reshape(-1).view(torch.uint8)
+    return offset
+
+
+def save_sequence(
+    path: str,
+    frames: Iterable[Dict[str, Tensor]],
+    keyframe_interval: int = 30,
+    tolerance: float = 0.0,
+    reorder: bool = False,
+):
+    """Writes frames of gaussians as keyframes and deltas to a scene file.
+
+    Every ``keyframe_interval`` frames are stored in full. The frames between
+    keyframes only store, for each tensor, the gaussians changed since the
+    previous frame, so that the static parts of a dynamic scene are stored once
+    per keyframe. Read the frames back with :class:`GaussianSequence`.
+
+    Each frame is written as soon as it is given, packed in a page aligned
+    block of its own, so that only the last decoded frame is held in memory.
+    The columns are indexed at the end of the file once all frames are written.
+
+    Args:
+        path (str): file to write.
+        frames (Iterable[Dict[str, Tensor]]): tensors of shape (N, ...) of each frame, by name, the same names and shapes in every frame.
+        keyframe_interval (int): number of frames from a keyframe to the next.
+        tolerance (float): largest change of a value of a gaussian that is not stored. Values are compared to those decoded for the previous frame, so errors do not accumulate.
+        reorder (bool): whether to store the gaussians of every frame in the Morton order of the means of the first frame, see :func:`save_scene`.
+    """
+    if keyframe_interval < 1:
+        raise ValueError(
+            f"Expected a positive keyframe interval, got {keyframe_interval}"
+        )
+    # the header is written last, in the room left before the first page
+    with open(path, "wb") as f:
+        f.write(_MAGIC + struct.pack("<Q", _HEADER_SPACE) + b" " * _HEADER_SPACE)
+    columns = {}
+    end = 0
+    decoded = {}
+    num_frames = 0
+    order = None
+    for t, frame in enumerate(frames):
+        frame = {name: tensor.detach().cpu() for name, tensor in frame.items()}
+        if reorder:
+            # a single order for all frames, so that deltas address the same
+            # gaussian in every frame
+            if order is None:
+                order = morton_order(frame["means3d"])
+            frame = _reordered(frame, order)
+        if t > 0 and (
+            frame.keys() != decoded.keys()
+            or any(frame[name].shape != decoded[name].shape for name in frame)
+        ):
+            raise ValueError(f"Frame {t} does not have the tensors of frame 0")
+        num_frames += 1
+        block = {}
+        if t % keyframe_interval == 0:
+            for name, tensor in frame.items():
+                block[f"{t}/{name}"] = tensor
+                decoded[name] = tensor.clone()
+            end = _append_block(path, end, block, columns)
+            continue
+        for name, tensor in frame.items():
+            previous = decoded[name]
+            if tensor.is_floating_point():
+                changes = (tensor - previous).abs() > tolerance
+            else:
+                changes = tensor != previous
+            ids = torch.nonzero(changes.reshape(len(tensor), -1).any(dim=-1))[:, 0]
+            values = tensor.index_select(0, ids)
+            block[f"{t}/{name}/ids"] = ids.to(torch.int32)
+            block[f"{t}/{name}/values"] = values
+            previous.index_copy_(0, ids, values)
+        end = _append_block(path, end, block, columns)
+    end = _append_block(
+        path,
+        end,
+        {
+            "num_frames": torch.tensor(num_frames),
+            "keyframe_interval": torch.tensor(keyframe_interval),
+        },
+        columns,
+    )
+
+    index = json.dumps(columns).encode()
+    location = {"offset": _ALIGNMENT + end, "size": len(index)}
+    header = json.dumps({"version": _VERSION, "index": location}).encode()
+    with open(path, "r+b") as f:
+        f.seek(_ALIGNMENT + end)
+        f.write(index)
+        f.truncate()
+        # the header is padded with the spaces it replaces
+        f.seek(len(_MAGIC) + 8)
+        f.write(header)
+
+
+class GaussianSequence:
+    """Frames of gaussians stored as keyframes and deltas by :func:`save_sequence`.
+
+    The file is memory mapped with :func:`load_scene`, and :meth:`frame` only
+    reads the keyframe before the requested frame and the deltas up to it. The
+    last decoded frame is kept, so that playing the frames in order applies a
+    single delta per frame::
+
+        sequence = GaussianSequence("replay.gsplat", device="mps")
+        for t in range(len(sequence)):
+            frame = sequence.frame(t)
+            xys, depths, radii, conics, num_tiles_hit, cov3d = project_gaussians(
+                frame["means3d"], frame["scales"], glob_scale, frame["quats"], ...
+            )
+
+    Args:
+        path (str): file written by :func:`save_sequence`.
+        device (torch.device): device the frames are decoded on.
+    """
+
+    def __init__(self, path: str, device: Optional[torch.device] = None):
+        self._tensors = load_scene(path)
+        self.num_frames = int(self._tensors["num_frames"])
+        self.keyframe_interval = int(self._tensors["keyframe_interval"])
+        self.names = [name[2:] for name in self._tensors if name.startswith("0/")]
+        self.device = torch.device("cpu") if device is None else torch.device(device)
+        self._time = None
+        self._frame = None
+
+    def __len__(self) -> int:
+        return self.num_frames
+
+    def frame(self, t: int) -> Dict[str, Tensor]:
+        """Decodes a frame, from the closest keyframe or the last decoded frame.
+
+        Tensors that did not change since the previous frame are shared with
+        it, so they should not be modified in place.
+
+        Args:
+            t (int): index of the frame.
+
+        Returns:
+            A Dict[str, Tensor]:
+
+            - **frame** (Dict[str, Tensor]): tensors of the frame, by name.
+        """
+        if not 0 <= t < self.num_frames:
+            raise IndexError(f"Frame {t} out of range for {self.num_frames} frames")
+        keyframe = t - t % self.keyframe_interval
+        if self._time is None or not keyframe <= self._time <= t:
+            self._frame = {
+                name: self._tensors[f"{keyframe}/{name}"].to(self.device)
+                for name in self.names
+            }
+            self._time = keyframe
+        frame = dict(self._frame)
+        for s in range(self._time + 1, t + 1):
+            for name in self.names:
+                ids = self._tensors[f"{s}/{name}/ids"]
+                if len(ids) == 0:
+                    continue
+                frame[name] = frame[name].index_copy(
+                    0,
+                    ids.to(self.device, torch.long),
+                    self._tensors[f"{s}/{name}/values"].to(self.device),
+                )
+        self._time, self._frame = t, frame
+        return dict(frame)
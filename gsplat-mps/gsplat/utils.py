@@ -1,12 +1,13 @@
 """Python bindings for binning and sorting gaussians"""
 
-from typing import Tuple
+from typing import Optional, Tuple
 
 from jaxtyping import Float, Int
 from torch import Tensor
 import torch
 
-import gsplat.mps as _C
+from . import _torch_impl
+from .backends import get_backend
 
 
 def map_gaussian_to_intersects(
@@ -38,7 +39,7 @@ def map_gaussian_to_intersects(
         - **isect_ids** (Tensor): unique IDs for each gaussian in the form (tile | depth id).
         - **gaussian_ids** (Tensor): Tensor that maps isect_ids back to cum_tiles_hit.
     """
-    isect_ids, gaussian_ids = _C.map_gaussian_to_intersects(
+    isect_ids, gaussian_ids = get_backend(xys.device).map_gaussian_to_intersects(
         num_points,
         num_intersects,
         xys.contiguous(),
@@ -71,7 +72,9 @@ def get_tile_bin_edges(
 
         - **tile_bins** (Tensor): range of gaussians IDs hit per tile.
     """
-    return _C.get_tile_bin_edges(num_intersects, isect_ids_sorted.contiguous())
+    return get_backend(isect_ids_sorted.device).get_tile_bin_edges(
+        num_intersects, isect_ids_sorted.contiguous()
+    )
 
 
 def compute_cov2d_bounds(
@@ -93,7 +96,7 @@ def compute_cov2d_bounds(
     ), f"Expected input cov2d to be of shape (*batch, 3) (upper triangular values), but got {tuple(cov2d.shape)}"
     num_pts = cov2d.shape[0]
     assert num_pts > 0
-    return _C.compute_cov2d_bounds(num_pts, cov2d.contiguous())
+    return get_backend(cov2d.device).compute_cov2d_bounds(num_pts, cov2d.contiguous())
 
 
 def compute_cumulative_intersects(
@@ -114,10 +117,139 @@ def compute_cumulative_intersects(
         - **cum_tiles_hit** (Tensor): a tensor of cumulated intersections (used for sorting).
     """
     cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
-    num_intersects = cum_tiles_hit[-1].item()
+    # no gaussians at all, e.g. after compacting a view that sees none of them
+    num_intersects = cum_tiles_hit[-1].item() if len(cum_tiles_hit) > 0 else 0
     return num_intersects, cum_tiles_hit
 
 
+def compact_gaussians(
+    num_tiles_hit: Int[Tensor, "batch 1"], *tensors: Optional[Tensor]
+) -> Tuple[Optional[Tensor], ...]:
+    """Drops the gaussians that do not hit any tile from per-gaussian tensors.
+
+    Gaussians culled by the projection, or projected outside of the image, have
+    no tile hit and cannot contribute to the rendered image. Compacting them out
+    ahead of :func:`rasterize_gaussians`, or of :func:`spherical_harmonics`,
+    makes the cost of everything after the projection scale with the number of
+    visible gaussians rather than the size of the scene::
+
+        xys, depths, radii, conics, num_tiles_hit, cov3d = project_gaussians(...)
+        visible, xys, depths, radii, conics, num_tiles_hit, colors, opacity = (
+            compact_gaussians(
+                num_tiles_hit, xys, depths, radii, conics, num_tiles_hit, colors, opacity
+            )
+        )
+
+    Note:
+        This function is differentiable w.r.t the compacted tensors: their
+        gradients are scattered back to the full-size inputs.
+
+    Args:
+        num_tiles_hit (Tensor): number of tiles hit per gaussian.
+        *tensors (Tensor): tensors of shape (N, ...) to compact, None is passed through.
+
+    Returns:
+        A tuple of {Tensor, Tensor, ...}:
+
+        - **visible_ids** (Tensor): sorted indices of the gaussians hitting at least one tile.
+        - the compacted tensors, in the order they were given.
+    """
+    visible_ids = torch.nonzero(num_tiles_hit.reshape(-1) > 0)[:, 0]
+    compacted = tuple(
+        None if tensor is None else tensor.index_select(0, visible_ids)
+        for tensor in tensors
+    )
+    return (visible_ids,) + compacted
+
+
+def get_compact_key_error(
+    num_tiles: int,
+    depths: Float[Tensor, "batch 1"],
+    radii: Float[Tensor, "batch 1"],
+) -> float:
+    """Relative depth error of 32-bit intersection sort keys for a frame.
+
+    :func:`bin_and_sort_gaussians` sorts intersections by a 64-bit (tile | depth)
+    key. When there are few tiles, the tile ID and the float32 depth bits, offset
+    by the smallest depth and shifted right as needed, fit in a 32-bit key
+    instead. Dropping low depth bits is a quantization relative to the depth, so
+    two intersections of a tile may be sorted in either order when their depths
+    differ by less than this fraction of their depth.
+
+    Args:
+        num_tiles (int): number of tiles of the image.
+        depths (Tensor): z depth of gaussians.
+        radii (Tensor): radii of 2D gaussian projections, gaussians with a radius of 0 are ignored.
+
+    Returns:
+        A float:
+
+        - **error** (float): 0 if 32-bit keys are exact, inf if they cannot be used.
+    """
+    layout = _compact_key_layout(num_tiles, depths, radii)
+    if layout is None:
+        return float("inf")
+    return _compact_key_error(layout[1])
+
+
+def _compact_key_layout(num_tiles, depths, radii):
+    # (depth_bits, shift, lowest depth id) of 32-bit keys, None if they do not fit
+    depth_bits = min(32 - max(num_tiles - 1, 0).bit_length(), 31)
+    depths = depths.reshape(-1)[radii.reshape(-1) > 0]
+    if depth_bits <= 0 or depths.numel() == 0 or not bool(depths.min() > 0):
+        return None
+    # positive float32 depths sort like their bits read as integers
+    depth_ids = depths.float().contiguous().view(torch.int32)
+    lowest, highest = int(depth_ids.min()), int(depth_ids.max())
+    shift = max((highest - lowest).bit_length() - depth_bits, 0)
+    return depth_bits, shift, lowest
+
+
+def _compact_key_error(shift):
+    # a step of 2**shift float32 ulps, each at most 2**-23 of the depth
+    return 0.0 if shift == 0 else 2.0 ** (shift - 23)
+
+
+def _sort_intersections(
+    isect_ids, gaussian_ids, depths, radii, num_tiles, max_depth_error, sorted_ids
+):
+    # returns (isect_ids_sorted, gaussian_ids_sorted, tile_ids_sorted, depth_error),
+    # tile_ids_sorted is None for 64-bit keys, isect_ids_sorted is None for
+    # 32-bit keys unless sorted_ids
+    layout = _compact_key_layout(num_tiles, depths, radii)
+    if layout is None or _compact_key_error(layout[1]) > max_depth_error:
+        isect_ids_sorted, sorted_indices = torch.sort(isect_ids)
+        gaussian_ids_sorted = gaussian_ids.index_select(0, sorted_indices)
+        return isect_ids_sorted, gaussian_ids_sorted, None, 0.0
+
+    depth_bits, shift, lowest = layout
+    depth_ids = depths.reshape(-1).float().contiguous().view(torch.int32)
+    depth_keys = (depth_ids - lowest) >> shift
+    keys = ((isect_ids >> 32).to(torch.int32) << depth_bits) | (
+        depth_keys.index_select(0, gaussian_ids)
+    )
+    # flip the sign bit so that signed order matches unsigned order
+    keys ^= -(1 << 31)
+    keys_sorted, sorted_indices = torch.sort(keys, stable=True)
+    # undoes the flip on the tile field, which the shift sign extends
+    tile_ids_sorted = (keys_sorted >> depth_bits) + (1 << (31 - depth_bits))
+    isect_ids_sorted = None
+    if sorted_ids:
+        isect_ids_sorted = isect_ids.index_select(0, sorted_indices)
+    gaussian_ids_sorted = gaussian_ids.index_select(0, sorted_indices)
+    return (
+        isect_ids_sorted,
+        gaussian_ids_sorted,
+        tile_ids_sorted,
+        _compact_key_error(shift),
+    )
+
+
+# relative depth error below which intersections are sorted by 32-bit keys by
+# default, a few millimeters at a depth of 10 meters
+_MAX_DEPTH_ERROR = 2.0**-12
+
+
 def bin_and_sort_gaussians(
     num_points: int,
     num_intersects: int,
@@ -126,6 +258,9 @@ def bin_and_sort_gaussians(
     radii: Float[Tensor, "batch 1"],
     cum_tiles_hit: Float[Tensor, "batch 1"],
     tile_bounds: Tuple[int, int, int],
+    cache: Optional["TileSortCache"] = None,
+    max_depth_error: float = _MAX_DEPTH_ERROR,
+    return_depth_error: bool = False,
 ) -> Tuple[
     Float[Tensor, "num_intersects 1"],
     Float[Tensor, "num_intersects 1"],
@@ -137,6 +272,21 @@ def bin_and_sort_gaussians(
 
     We return both sorted and unsorted versions of intersect IDs and gaussian IDs for testing purposes.
 
+    Intersections are sorted by 32-bit keys when there are few enough tiles for
+    the depth error of these keys to stay within ``max_depth_error``, see
+    :func:`get_compact_key_error`. The default of ``2**-12`` takes them for any
+    depths on images of up to 4096 tiles, such as 1280x720, and on larger images
+    when the depths span few enough octaves; pass 0 to only take them when
+    exact. The tile bins are
+    then read from the sorted 32-bit keys, and the sorted 64-bit IDs are
+    gathered for the output only. The relative depth error of the sort, 0 for
+    64-bit keys, is appended to the outputs with ``return_depth_error``.
+
+    With a :class:`TileSortCache`, the sorted intersections of the previous call
+    are repaired instead of sorting all of them again, see :class:`TileSortCache`.
+    The unsorted outputs are then the sorted ones, and repaired frames are
+    exactly sorted.
+
     Note:
         This function is not differentiable to any input.
 
@@ -148,6 +298,9 @@ def bin_and_sort_gaussians(
         radii (Tensor): radii of 2D gaussian projections.
         cum_tiles_hit (Tensor): list of cumulative tiles hit.
         tile_bounds (Tuple): tile dimensions as a len 3 tuple (tiles.x , tiles.y, 1).
+        cache (TileSortCache): sorted intersections of the previous frame, updated in place.
+        max_depth_error (float): largest relative depth error allowed for sorting by 32-bit keys.
+        return_depth_error (bool): whether to also return the relative depth error of the sort.
 
     Returns:
         A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor}:
@@ -157,11 +310,353 @@ def bin_and_sort_gaussians(
         - **isect_ids_sorted** (Tensor): sorted unique IDs for each gaussian in the form (tile | depth id).
         - **gaussian_ids_sorted** (Tensor): sorted Tensor that maps isect_ids back to cum_tiles_hit. Useful for identifying gaussians.
         - **tile_bins** (Tensor): range of gaussians hit per tile.
+        - **depth_error** (float): relative depth error of the sort, only with ``return_depth_error``.
     """
+    outputs = _bin_and_sort_gaussians(
+        num_points,
+        num_intersects,
+        xys,
+        depths,
+        radii,
+        cum_tiles_hit,
+        tile_bounds,
+        cache,
+        max_depth_error,
+        sorted_ids=True,
+    )
+    return outputs if return_depth_error else outputs[:-1]
+
+
+def _bin_and_sort_gaussians(
+    num_points,
+    num_intersects,
+    xys,
+    depths,
+    radii,
+    cum_tiles_hit,
+    tile_bounds,
+    cache=None,
+    max_depth_error=_MAX_DEPTH_ERROR,
+    sorted_ids=False,
+):
+    # bin_and_sort_gaussians with the depth error, and with isect_ids_sorted
+    # None when it is not needed by the output or the cache
+    if cache is not None:
+        repaired = cache._update(
+            num_points, num_intersects, xys, depths, radii, cum_tiles_hit, tile_bounds
+        )
+        if repaired is not None:
+            isect_ids_sorted, gaussian_ids_sorted = repaired
+            tile_bins = get_tile_bin_edges(num_intersects, isect_ids_sorted)
+            return (
+                isect_ids_sorted,
+                gaussian_ids_sorted,
+                isect_ids_sorted,
+                gaussian_ids_sorted,
+                tile_bins,
+                0.0,
+            )
+
+    num_tiles = tile_bounds[0] * tile_bounds[1]
     isect_ids, gaussian_ids = map_gaussian_to_intersects(
         num_points, num_intersects, xys, depths, radii, cum_tiles_hit, tile_bounds
     )
-    isect_ids_sorted, sorted_indices = torch.sort(isect_ids)
-    gaussian_ids_sorted = torch.gather(gaussian_ids, 0, sorted_indices)
-    tile_bins = get_tile_bin_edges(num_intersects, isect_ids_sorted)
-    return isect_ids, gaussian_ids, isect_ids_sorted, gaussian_ids_sorted, tile_bins
+    (
+        isect_ids_sorted,
+        gaussian_ids_sorted,
+        tile_ids_sorted,
+        depth_error,
+    ) = _sort_intersections(
+        isect_ids,
+        gaussian_ids,
+        depths[:num_points],
+        radii[:num_points],
+        num_tiles,
+        max_depth_error,
+        sorted_ids or cache is not None,
+    )
+    if tile_ids_sorted is None:
+        tile_bins = get_tile_bin_edges(num_intersects, isect_ids_sorted)
+    else:
+        tile_bins = _torch_impl.get_tile_bins(tile_ids_sorted, num_tiles)
+    if cache is not None:
+        cache._store(isect_ids_sorted, gaussian_ids_sorted)
+    return (
+        isect_ids,
+        gaussian_ids,
+        isect_ids_sorted,
+        gaussian_ids_sorted,
+        tile_bins,
+        depth_error,
+    )
+
+
+def bin_and_sort_gaussians_batched(
+    num_views: int,
+    num_points: int,
+    num_intersects: int,
+    xys: Float[Tensor, "views*batch 2"],
+    depths: Float[Tensor, "views*batch 1"],
+    radii: Float[Tensor, "views*batch 1"],
+    cum_tiles_hit: Float[Tensor, "views*batch 1"],
+    tile_bounds: Tuple[int, int, int],
+    max_depth_error: float = _MAX_DEPTH_ERROR,
+    return_depth_error: bool = False,
+) -> Tuple[
+    Float[Tensor, "num_intersects 1"],
+    Float[Tensor, "num_intersects 1"],
+    Float[Tensor, "num_intersects 1"],
+    Float[Tensor, "num_intersects 1"],
+    Float[Tensor, "num_intersects 2"],
+]:
+    """Bins and sorts the gaussians of several views at once, see :func:`bin_and_sort_gaussians`.
+
+    The projected gaussians of all views are concatenated, view after view, and
+    their intersections are sorted by a single (view, tile, depth) key: the tile
+    ID of an intersection is offset by ``view * num_tiles``, so the tile bins of
+    view ``v`` are rows ``v * num_tiles`` to ``(v + 1) * num_tiles`` of ``tile_bins``.
+
+    Note:
+        This function is not differentiable to any input.
+
+    Args:
+        num_views (int): number of views.
+        num_points (int): number of gaussians per view.
+        num_intersects (int): cumulative number of total gaussian intersections, over all views.
+        xys (Tensor): x,y locations of 2D gaussian projections, of shape (views * N, 2).
+        depths (Tensor): z depth of gaussians, of shape (views * N).
+        radii (Tensor): radii of 2D gaussian projections, of shape (views * N).
+        cum_tiles_hit (Tensor): list of cumulative tiles hit, over all views.
+        tile_bounds (Tuple): tile dimensions of one view as a len 3 tuple (tiles.x , tiles.y, 1).
+        max_depth_error (float): largest relative depth error allowed for sorting by 32-bit keys.
+        return_depth_error (bool): whether to also return the relative depth error of the sort.
+
+    Returns:
+        A tuple of {Tensor, Tensor, Tensor, Tensor, Tensor}:
+
+        - **isect_ids_unsorted** (Tensor): unique IDs for each gaussian in the form (view tile | depth id).
+        - **gaussian_ids_unsorted** (Tensor): Tensor that maps isect_ids back to the concatenated gaussians.
+        - **isect_ids_sorted** (Tensor): sorted unique IDs for each gaussian in the form (view tile | depth id).
+        - **gaussian_ids_sorted** (Tensor): sorted Tensor that maps isect_ids back to the concatenated gaussians.
+        - **tile_bins** (Tensor): range of gaussians hit per tile, of shape (views * num_tiles, 2).
+        - **depth_error** (float): relative depth error of the sort, only with ``return_depth_error``.
+    """
+    outputs = _bin_and_sort_gaussians_batched(
+        num_views,
+        num_points,
+        num_intersects,
+        xys,
+        depths,
+        radii,
+        cum_tiles_hit,
+        tile_bounds,
+        max_depth_error,
+        sorted_ids=True,
+    )
+    return outputs if return_depth_error else outputs[:-1]
+
+
+def _bin_and_sort_gaussians_batched(
+    num_views,
+    num_points,
+    num_intersects,
+    xys,
+    depths,
+    radii,
+    cum_tiles_hit,
+    tile_bounds,
+    max_depth_error=_MAX_DEPTH_ERROR,
+    sorted_ids=False,
+):
+    # bin_and_sort_gaussians_batched with the depth error, and with
+    # isect_ids_sorted None when it is not needed by the output
+    num_tiles = num_views * tile_bounds[0] * tile_bounds[1]
+    isect_ids, gaussian_ids = map_gaussian_to_intersects(
+        num_views * num_points,
+        num_intersects,
+        xys,
+        depths,
+        radii,
+        cum_tiles_hit,
+        tile_bounds,
+    )
+    views = torch.div(gaussian_ids, num_points, rounding_mode="floor").long()
+    isect_ids = isect_ids + ((views * (num_tiles // num_views)) << 32)
+    (
+        isect_ids_sorted,
+        gaussian_ids_sorted,
+        tile_ids_sorted,
+        depth_error,
+    ) = _sort_intersections(
+        isect_ids, gaussian_ids, depths, radii, num_tiles, max_depth_error, sorted_ids
+    )
+    # one bin for every tile of every view, including trailing empty tiles
+    if tile_ids_sorted is None:
+        tile_bins = _torch_impl.get_tile_bin_edges(
+            num_intersects, isect_ids_sorted, num_tiles
+        )
+    else:
+        tile_bins = _torch_impl.get_tile_bins(tile_ids_sorted, num_tiles)
+    return (
+        isect_ids,
+        gaussian_ids,
+        isect_ids_sorted,
+        gaussian_ids_sorted,
+        tile_bins,
+        depth_error,
+    )
+
+
+class TileSortCache:
+    """Sorted intersections of the previous frame, for :func:`bin_and_sort_gaussians` to repair.
+
+    Between close frames of a moving camera most gaussians still cover the same
+    tiles, and their depth order within a tile rarely changes. Given a cache,
+    :func:`bin_and_sort_gaussians` keeps the previous sorted intersections of the
+    gaussians whose tile footprint did not change and updates their depths. Only
+    the few intersections this puts out of order are sorted again, and those of
+    the gaussians that changed footprint are sorted on their own and merged in.
+    The result is the same as sorting all intersections by their 64-bit IDs.
+
+    The cache falls back to a full sort on the first frame, when the gaussians or
+    the image change, and when more than ``max_changed`` of the visible gaussians
+    changed footprint, as after a camera cut. Call :meth:`reset` to force it.
+    Gaussians are matched to the previous frame by index, so the cache is of no
+    use with ``rasterize_gaussians(compact=True)``, whose indices change with
+    the visible gaussians::
+
+        cache = TileSortCache()
+        for viewmat in trajectory:
+            xys, depths, radii, conics, num_tiles_hit, cov3d = project_gaussians(...)
+            out_img = rasterize_gaussians(..., sort_cache=cache)
+
+    Args:
+        max_changed (float): largest fraction of visible gaussians changing tiles for which the previous frame is repaired.
+    """
+
+    def __init__(self, max_changed: float = 0.25):
+        self.max_changed = max_changed
+        self.reset()
+
+    def reset(self):
+        """Forgets the previous frame, so that the next one is fully sorted."""
+        self._key = None
+        self._footprints = None
+        self._isect_ids_sorted = None
+        self._gaussian_ids_sorted = None
+        # number of frames sorted either way, for monitoring
+        self.num_repaired = 0
+        self.num_full_sorts = 0
+
+    def _footprint(self, xys, radii, tile_bounds):
+        # tile bbox packed as 16 bits each of xmin, ymin, xmax, ymax, or 0 if culled
+        tile_min, tile_max = _torch_impl.get_tile_bbox(xys, radii, tile_bounds)
+        footprints = tile_min[:, 0].long() | (tile_min[:, 1].long() << 16)
+        footprints |= (tile_max[:, 0].long() << 32) | (tile_max[:, 1].long() << 48)
+        return torch.where(radii > 0, footprints, 0)
+
+    def _update(
+        self, num_points, num_intersects, xys, depths, radii, cum_tiles_hit, tile_bounds
+    ):
+        # returns the repaired (isect_ids_sorted, gaussian_ids_sorted), or None
+        xys, radii = xys[:num_points], radii[:num_points]
+        key = (num_points, tuple(tile_bounds), xys.device)
+        footprints = self._footprint(xys, radii, tile_bounds)
+        prev_footprints, self._footprints = self._footprints, footprints
+        if key != self._key or prev_footprints is None:
+            self._key = key
+            self.num_full_sorts += 1
+            return None
+
+        changed = footprints != prev_footprints
+        changed_ids = torch.nonzero(changed)[:, 0]
+        visible = int(torch.count_nonzero(radii > 0))
+        if len(changed_ids) > self.max_changed * max(visible, 1):
+            self.num_full_sorts += 1
+            return None
+
+        # kept intersections, with the depths of this frame
+        depth_ids = depths[:num_points].float().contiguous().view(torch.int32).long()
+        isect_ids, gaussian_ids = self._isect_ids_sorted, self._gaussian_ids_sorted
+        if len(changed_ids) > 0:
+            kept = torch.nonzero(~changed.index_select(0, gaussian_ids))[:, 0]
+            isect_ids = isect_ids.index_select(0, kept)
+            gaussian_ids = gaussian_ids.index_select(0, kept)
+        isect_ids = (isect_ids & _TILE_MASK) | depth_ids.index_select(0, gaussian_ids)
+        if len(isect_ids) + _num_hit(footprints[changed_ids]) != num_intersects:
+            self.num_full_sorts += 1
+            return None
+
+        # depths moved little, so only a few intersections are out of place
+        if torch.any(isect_ids[1:] < isect_ids[:-1]):
+            isect_ids, gaussian_ids = _repair_sorted(isect_ids, gaussian_ids)
+
+        # intersections of the gaussians that changed tiles, merged in
+        num_tiles_hit = torch.diff(
+            cum_tiles_hit[:num_points], prepend=cum_tiles_hit.new_zeros(1)
+        )[changed_ids]
+        if int(num_tiles_hit.sum()) > 0:
+            sub_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
+            new_isect_ids, new_gaussian_ids = map_gaussian_to_intersects(
+                len(changed_ids),
+                int(sub_tiles_hit[-1]),
+                xys[changed_ids].contiguous(),
+                depths[:num_points][changed_ids].contiguous(),
+                radii[changed_ids].contiguous(),
+                sub_tiles_hit,
+                tile_bounds,
+            )
+            new_isect_ids, order = torch.sort(new_isect_ids)
+            new_gaussian_ids = changed_ids[new_gaussian_ids[order].long()]
+            isect_ids, gaussian_ids = _merge_sorted(
+                isect_ids, gaussian_ids, new_isect_ids, new_gaussian_ids
+            )
+
+        self._store(isect_ids, gaussian_ids)
+        self.num_repaired += 1
+        return isect_ids, gaussian_ids.to(torch.int32)
+
+    def _store(self, isect_ids_sorted, gaussian_ids_sorted):
+        self._isect_ids_sorted = isect_ids_sorted
+        self._gaussian_ids_sorted = gaussian_ids_sorted.long()
+
+
+# keeps the tile id in the upper 32 bits of an intersection id
+_TILE_MASK = -(1 << 32)
+
+
+def _num_hit(footprints: Tensor) -> int:
+    bounds = [(footprints >> shift) & 0xFFFF for shift in (0, 16, 32, 48)]
+    width = (bounds[2] - bounds[0]).clamp(min=0)
+    height = (bounds[3] - bounds[1]).clamp(min=0)
+    return int((width * height).sum())
+
+
+def _repair_sorted(keys, values):
+    # an element no smaller than all before it and no larger than all after it
+    # is already in its sorted place, sorting the others in the remaining
+    # places sorts the whole array
+    prefix_max = torch.cummax(keys, dim=0).values
+    suffix_min = torch.cummin(keys.flip(0), dim=0).values.flip(0)
+    misplaced = (keys < prefix_max) | (keys > suffix_min)
+    positions = torch.nonzero(misplaced)[:, 0]
+    sorted_keys, order = torch.sort(keys.index_select(0, positions))
+    keys.scatter_(0, positions, sorted_keys)
+    values.scatter_(0, positions, values.index_select(0, positions)[order])
+    return keys, values
+
+
+def _merge_sorted(keys_a, values_a, keys_b, values_b):
+    # each element lands at its rank in the union, ties keep a before b
+    positions_b = torch.searchsorted(keys_a, keys_b, side="right")
+    # elements of a move back by the number of elements of b inserted before them
+    shifts = torch.bincount(positions_b, minlength=len(keys_a) + 1)[: len(keys_a)]
+    positions_a = torch.arange(len(keys_a), device=keys_a.device)
+    positions_a += torch.cumsum(shifts, dim=0)
+    positions_b += torch.arange(len(keys_b), device=keys_b.device)
+    keys = keys_a.new_empty(len(keys_a) + len(keys_b))
+    values = values_a.new_empty(len(keys))
+    keys.scatter_(0, positions_a, keys_a).scatter_(0, positions_b, keys_b)
+    values.scatter_(0, positions_a, values_a)
+    values.scatter_(0, positions_b, values_b.to(values_a))
+    return keys, values
@@ -11,7 +11,10 @@ exec(open("gsplat/version.py", "r").read())
 
 URL = "https://github.com/nerfstudio-project/gsplat"  # TODO
 
-BUILD_NO_MPS = os.getenv("BUILD_NO_MPS", "0") == "1"
+# the Metal extension only builds on macOS; elsewhere gsplat runs on the cpu backend
+BUILD_NO_MPS = os.getenv("BUILD_NO_MPS", "0") == "1" or sys.platform != "darwin"
+# the compiled cpu kernels are optional; without them the cpu backend runs in PyTorch
+BUILD_NO_CPU = os.getenv("BUILD_NO_CPU", "0") == "1"
 WITH_SYMBOLS = os.getenv("WITH_SYMBOLS", "0") == "1"
 LINE_INFO = os.getenv("LINE_INFO", "0") == "1"
 
@@ -87,17 +90,41 @@ def get_extensions():
     if sys.platform == "win32":
         extra_compile_args["nvcc"] += ["-DWIN32_LEAN_AND_MEAN"]
 
-    extension = CppExtension(
-        f"gsplat.csrc",
-        sources,
-        include_dirs=[osp.join(extensions_dir, "third_party", "glm")],
-        define_macros=define_macros,
-        undef_macros=undef_macros,
-        extra_compile_args=extra_compile_args,
-        extra_link_args=extra_link_args,
-    )
-
-    return [extension]
+    extensions = []
+    if not BUILD_NO_MPS:
+        extensions.append(
+            CppExtension(
+                f"gsplat.csrc",
+                sources,
+                include_dirs=[osp.join(extensions_dir, "third_party", "glm")],
+                define_macros=define_macros,
+                undef_macros=undef_macros,
+                extra_compile_args=extra_compile_args,
+                extra_link_args=extra_link_args,
+            )
+        )
+
+    if not BUILD_NO_CPU:
+        # the cpu kernels parallelize with their own OpenMP loops, so they need
+        # -fopenmp even where torch itself was built without OpenMP
+        cpu_compile_args = {"cxx": list(extra_compile_args["cxx"])}
+        cpu_link_args = list(extra_link_args)
+        if sys.platform not in ("darwin", "win32"):
+            if "-fopenmp" not in cpu_compile_args["cxx"]:
+                cpu_compile_args["cxx"] += ["-fopenmp"]
+            cpu_link_args += ["-fopenmp"]
+        extensions.append(
+            CppExtension(
+                f"gsplat.cpu_csrc",
+                glob.glob(osp.join("gsplat", "cpu", "csrc", "*.cpp")),
+                define_macros=define_macros,
+                undef_macros=undef_macros,
+                extra_compile_args=cpu_compile_args,
+                extra_link_args=cpu_link_args,
+            )
+        )
+
+    return extensions
 
 
 setup(
@@ -129,8 +156,8 @@ setup(
             "ninja",
         ],
     },
-    ext_modules=get_extensions() if not BUILD_NO_MPS else [],
-    cmdclass={"build_ext": get_ext()} if not BUILD_NO_MPS else {},
+    ext_modules=get_extensions() if not (BUILD_NO_MPS and BUILD_NO_CPU) else [],
+    cmdclass={"build_ext": get_ext()} if not (BUILD_NO_MPS and BUILD_NO_CPU) else {},
     packages=find_packages(),
     # https://github.com/pypa/setuptools/issues/1461#issuecomment-954725244
     include_package_data=True,
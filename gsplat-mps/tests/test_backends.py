@@ -0,0 +1,115 @@
+import math
+
+import pytest
+import torch
+
+
+def test_get_backend():
+    import gsplat
+    import gsplat.cpu
+    import gsplat.cuda
+    import gsplat.mps
+
+    assert gsplat.get_backend(torch.device("cpu")) is gsplat.cpu
+    assert gsplat.get_backend("cuda:0") is gsplat.cuda
+    assert gsplat.get_backend("mps") is gsplat.mps
+
+    gsplat.set_backend("cpu")
+    try:
+        assert gsplat.get_backend("cuda:0") is gsplat.cpu
+    finally:
+        gsplat.set_backend(None)
+
+    with pytest.raises(ValueError):
+        gsplat.set_backend("opengl")
+
+
+def test_warmup():
+    import sys
+
+    import gsplat
+    import gsplat.cuda._backend
+
+    # importing the backend module does not load the extension
+    assert not gsplat.cuda._backend._loaded
+    assert "gsplat.mps._backend" not in sys.modules
+
+    assert gsplat.warmup("cpu") is None
+    thread = gsplat.warmup("cpu", background=True)
+    thread.join()
+    assert not thread.is_alive()
+
+
+def test_render_cpu():
+    from gsplat import project_gaussians, rasterize_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 200
+    H, W = 48, 64
+    fx = fy = 0.5 * W / math.tan(0.25 * math.pi)
+    BLOCK_X, BLOCK_Y = 16, 16
+    tile_bounds = (W + BLOCK_X - 1) // BLOCK_X, (H + BLOCK_Y - 1) // BLOCK_Y, 1
+
+    means3d = torch.rand((num_points, 3)) * 2 - 1
+    scales = torch.rand((num_points, 3)) * 0.1
+    quats = torch.randn((num_points, 4))
+    quats /= torch.linalg.norm(quats, dim=-1, keepdim=True)
+    colors = torch.rand((num_points, 3))
+    opacities = torch.ones((num_points, 1)) * 0.5
+    viewmat = torch.eye(4)
+    viewmat[2, 3] = 4.0
+    projmat = (
+        torch.tensor(
+            [
+                [2 * fx / W, 0.0, 0.0, 0.0],
+                [0.0, 2 * fy / H, 0.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+            ]
+        )
+        @ viewmat
+    )
+
+    xys, depths, radii, conics, num_tiles_hit, cov3d = project_gaussians(
+        means3d,
+        scales,
+        1.0,
+        quats,
+        viewmat,
+        projmat,
+        fx,
+        fy,
+        W / 2,
+        H / 2,
+        H,
+        W,
+        tile_bounds,
+    )
+    assert cov3d.shape == (num_points, 6)
+    assert (radii > 0).all()
+
+    background = torch.zeros(3)
+    out_img, out_alpha = rasterize_gaussians(
+        xys,
+        depths,
+        radii,
+        conics,
+        num_tiles_hit,
+        colors,
+        opacities,
+        H,
+        W,
+        background,
+        return_alpha=True,
+    )
+    assert out_img.shape == (H, W, 3)
+    assert out_alpha.shape == (H, W)
+    assert out_alpha.max() > 0.5
+    torch.testing.assert_close(out_img.amax(-1) > 0, out_alpha > 0)
+
+
+if __name__ == "__main__":
+    test_get_backend()
+    test_warmup()
+    test_render_cpu()
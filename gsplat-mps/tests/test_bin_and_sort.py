@@ -0,0 +1,147 @@
+import math
+
+import torch
+
+
+def _camera(H, W, fov, position, target):
+    fx = fy = 0.5 * W / math.tan(0.5 * fov)
+    forward = torch.nn.functional.normalize(target - position, dim=0)
+    right = torch.nn.functional.normalize(
+        torch.linalg.cross(torch.tensor([0.0, 1.0, 0.0]), forward), dim=0
+    )
+    up = torch.linalg.cross(forward, right)
+    viewmat = torch.eye(4)
+    viewmat[:3, :3] = torch.stack([right, up, forward])
+    viewmat[:3, 3] = -viewmat[:3, :3] @ position
+    projmat = (
+        torch.tensor(
+            [
+                [2 * fx / W, 0.0, 0.0, 0.0],
+                [0.0, 2 * fy / H, 0.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+            ]
+        )
+        @ viewmat
+    )
+    return viewmat, projmat, fx, fy
+
+
+def _canonical(isect_ids, gaussian_ids):
+    # gaussians with equal depths in a tile may be sorted in any order
+    order = torch.argsort(gaussian_ids, stable=True)
+    order = order[torch.argsort(isect_ids[order], stable=True)]
+    return isect_ids[order], gaussian_ids[order]
+
+
+def test_tile_sort_cache():
+    from gsplat import (
+        TileSortCache,
+        bin_and_sort_gaussians,
+        compute_cumulative_intersects,
+        project_gaussians,
+    )
+
+    torch.manual_seed(42)
+
+    num_points, H, W = 3000, 64, 96
+    glob_scale = 0.5
+    tile_bounds = (W + 15) // 16, (H + 15) // 16, 1
+    means3d = torch.rand((num_points, 3)) * 4 - 2
+    scales = torch.rand((num_points, 3)) * 0.1
+    quats = torch.randn((num_points, 4))
+
+    cache = TileSortCache()
+    # a slow orbit, then a cut to the other side of the scene
+    angles = [0.002 * i for i in range(6)] + [math.pi]
+    for angle in angles:
+        position = 6.0 * torch.tensor([math.sin(angle), 0.1, -math.cos(angle)])
+        viewmat, projmat, fx, fy = _camera(H, W, 0.8, position, torch.zeros(3))
+        args = (glob_scale, quats, viewmat, projmat, fx, fy, W / 2, H / 2, H, W)
+        xys, depths, radii, _, num_tiles_hit, _ = project_gaussians(
+            means3d, scales, *args, tile_bounds
+        )
+        num_intersects, cum_tiles_hit = compute_cumulative_intersects(num_tiles_hit)
+        sort_args = (num_points, num_intersects, xys, depths, radii, cum_tiles_hit)
+
+        # repaired frames are exactly sorted
+        _, _, isect_ids, gaussian_ids, tile_bins = bin_and_sort_gaussians(
+            *sort_args, tile_bounds, max_depth_error=0.0
+        )
+        _, _, _isect_ids, _gaussian_ids, _tile_bins = bin_and_sort_gaussians(
+            *sort_args, tile_bounds, cache=cache, max_depth_error=0.0
+        )
+        torch.testing.assert_close(_isect_ids, isect_ids)
+        for a, b in zip(
+            _canonical(_isect_ids, _gaussian_ids), _canonical(isect_ids, gaussian_ids)
+        ):
+            torch.testing.assert_close(a, b)
+        torch.testing.assert_close(_tile_bins, tile_bins)
+
+    assert cache.num_repaired == len(angles) - 2
+    assert cache.num_full_sorts == 2
+
+
+def test_compact_sort_keys():
+    from gsplat import (
+        bin_and_sort_gaussians,
+        compute_cumulative_intersects,
+        get_compact_key_error,
+        project_gaussians,
+    )
+
+    torch.manual_seed(42)
+
+    num_points, H, W = 3000, 720, 1280
+    tile_bounds = (W + 15) // 16, (H + 15) // 16, 1
+    num_tiles = tile_bounds[0] * tile_bounds[1]
+    means3d = torch.rand((num_points, 3)) * 40 - 20
+    scales = torch.rand((num_points, 3)) * 0.5
+    quats = torch.randn((num_points, 4))
+    position = torch.tensor([0.0, 0.0, -25.0])
+    viewmat, projmat, fx, fy = _camera(H, W, 1.0, position, torch.zeros(3))
+    args = (0.5, quats, viewmat, projmat, fx, fy, W / 2, H / 2, H, W)
+    xys, depths, radii, _, num_tiles_hit, _ = project_gaussians(
+        means3d, scales, *args, tile_bounds
+    )
+    num_intersects, cum_tiles_hit = compute_cumulative_intersects(num_tiles_hit)
+    sort_args = (num_points, num_intersects, xys, depths, radii, cum_tiles_hit)
+
+    # 12 bits of tile ids leave 20 bits for depths spanning several octaves
+    error = get_compact_key_error(num_tiles, depths, radii)
+    assert 0 < error <= 2**-12
+    assert get_compact_key_error(2**32, depths, radii) == float("inf")
+
+    isect_ids, gaussian_ids, _, _, tile_bins, exact_error = bin_and_sort_gaussians(
+        *sort_args, tile_bounds, max_depth_error=0.0, return_depth_error=True
+    )
+    assert exact_error == 0.0
+    isect_ids, order = torch.sort(isect_ids)
+    gaussian_ids = gaussian_ids[order]
+    # 32-bit keys by default, within the default error
+    _, _, _isect_ids, _gaussian_ids, _tile_bins, _error = bin_and_sort_gaussians(
+        *sort_args, tile_bounds, return_depth_error=True
+    )
+    assert _error == error
+    _outputs = bin_and_sort_gaussians(*sort_args, tile_bounds, max_depth_error=error)
+    for a, b in zip(_outputs[2:], (_isect_ids, _gaussian_ids, _tile_bins)):
+        assert torch.equal(a, b)
+    torch.testing.assert_close(_tile_bins, tile_bins)
+    torch.testing.assert_close(_isect_ids >> 32, isect_ids >> 32)
+    # the same intersections, only the order within a tile may differ
+    resorted, order = torch.sort(_isect_ids)
+    for a, b in zip(
+        _canonical(resorted, _gaussian_ids[order]),
+        _canonical(isect_ids, gaussian_ids),
+    ):
+        torch.testing.assert_close(a, b)
+    # intersections of a tile are out of order by at most the reported error
+    tiles, sorted_depths = _isect_ids >> 32, depths[_gaussian_ids.long()]
+    same_tile = tiles[1:] == tiles[:-1]
+    in_order = sorted_depths[1:] >= sorted_depths[:-1] * (1 - error)
+    assert torch.all(in_order | ~same_tile)
+
+
+if __name__ == "__main__":
+    test_tile_sort_cache()
+    test_compact_sort_keys()
@@ -0,0 +1,88 @@
+import math
+
+import torch
+
+
+def _camera(H, W, fov, position, target):
+    fx = fy = 0.5 * W / math.tan(0.5 * fov)
+    forward = torch.nn.functional.normalize(target - position, dim=0)
+    right = torch.nn.functional.normalize(
+        torch.linalg.cross(torch.tensor([0.0, 1.0, 0.0]), forward), dim=0
+    )
+    up = torch.linalg.cross(forward, right)
+    viewmat = torch.eye(4)
+    viewmat[:3, :3] = torch.stack([right, up, forward])
+    viewmat[:3, 3] = -viewmat[:3, :3] @ position
+    projmat = (
+        torch.tensor(
+            [
+                [2 * fx / W, 0.0, 0.0, 0.0],
+                [0.0, 2 * fy / H, 0.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+            ]
+        )
+        @ viewmat
+    )
+    return viewmat, projmat, fx, fy
+
+
+def _render(means3d, scales, quats, colors, opacities, H, W):
+    from gsplat import project_gaussians, rasterize_gaussians
+
+    position = torch.tensor([0.0, 1.0, -5.0])
+    viewmat, projmat, fx, fy = _camera(H, W, 0.8, position, torch.zeros(3))
+    tile_bounds = (W + 15) // 16, (H + 15) // 16, 1
+    args = (1.0, quats, viewmat, projmat, fx, fy, W / 2, H / 2, H, W, tile_bounds)
+    xys, depths, radii, conics, num_tiles_hit, _ = project_gaussians(
+        means3d, scales, *args
+    )
+    return rasterize_gaussians(
+        xys, depths, radii, conics, num_tiles_hit, colors, opacities, H, W
+    )
+
+
+def test_compact_gaussians():
+    from gsplat import CompactGaussians
+
+    torch.manual_seed(42)
+
+    num_points, H, W = 5000, 64, 96
+    means3d = torch.rand((num_points, 3)) * 4 - 2
+    scales = torch.rand((num_points, 3)) * 0.05 + 0.005
+    quats = torch.randn((num_points, 4))
+    # colors of real scenes cluster, unlike uniform noise
+    palette = torch.rand((64, 3))
+    colors = palette[torch.randint(64, (num_points,))]
+    colors += torch.randn_like(colors) * 0.01
+    opacities = torch.rand((num_points, 1))
+
+    scene = CompactGaussians(
+        means3d, scales, quats, colors, opacities, codebook_size=256
+    )
+    assert scene.nbytes == 16 * num_points + 256 * 3 * 4
+    raw_bytes = sum(a.nbytes for a in (means3d, scales, quats, colors, opacities))
+    assert raw_bytes / scene.nbytes > 3
+
+    decoded = scene.decode()
+    _means3d, _scales, _quats, _colors, _opacities = decoded
+    torch.testing.assert_close(_means3d, means3d, atol=2e-3, rtol=0)
+    torch.testing.assert_close(_scales, scales, atol=0, rtol=0.02)
+    dots = (_quats * torch.nn.functional.normalize(quats, dim=-1)).sum(-1)
+    assert torch.all(dots.abs() > 1 - 1e-5)
+    torch.testing.assert_close(_colors, colors, atol=0.05, rtol=0)
+    torch.testing.assert_close(_opacities, opacities, atol=1 / 510, rtol=0)
+
+    # a subset decodes to the same values
+    ids = torch.randperm(num_points)[:1000]
+    for a, b in zip(scene.decode(ids), decoded):
+        torch.testing.assert_close(a, b[ids])
+
+    image = _render(means3d, scales, quats, colors, opacities, H, W)
+    _image = _render(*decoded, H, W)
+    psnr = -10 * torch.log10(torch.mean((image - _image) ** 2))
+    assert psnr > 35
+
+
+if __name__ == "__main__":
+    test_compact_gaussians()
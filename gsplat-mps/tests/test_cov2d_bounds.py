@@ -27,7 +27,7 @@ def test_compare_binding_to_pytorch():
     )
 
     conic, radii = compute_cov2d_bounds(covs2d)
-    _conic, _radii, _mask = _compute_cov2d_bounds(_covs2d)
+    _conic, _radii, _mask = _compute_cov2d_bounds(covs2d)
 
     radii = radii.squeeze(-1)
 
@@ -0,0 +1,139 @@
+import math
+
+import pytest
+import torch
+
+
+def _native():
+    from gsplat.cpu._backend import load_extension
+
+    return load_extension()
+
+
+def _random_gaussians(num_points, H, W):
+    fx = fy = 0.5 * W / math.tan(0.25 * math.pi)
+    means3d = torch.rand((num_points, 3)) * 2 - 1
+    scales = torch.rand((num_points, 3)) * 0.2
+    quats = torch.randn((num_points, 4))
+    viewmat = torch.eye(4)
+    viewmat[2, 3] = 3.0
+    projmat = (
+        torch.tensor(
+            [
+                [2 * fx / W, 0.0, 0.0, 0.0],
+                [0.0, 2 * fy / H, 0.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+            ]
+        )
+        @ viewmat
+    )
+    return means3d, scales, quats, viewmat, projmat, fx, fy
+
+
+@pytest.mark.skipif(_native() is None, reason="cpu extension not built")
+def test_cpu_extension_parity():
+    from gsplat.cpu import _torch_bindings
+
+    _C = _native()
+    torch.manual_seed(42)
+
+    num_points, H, W = 300, 48, 64
+    BLOCK_X, BLOCK_Y = 16, 16
+    tile_bounds = (W + BLOCK_X - 1) // BLOCK_X, (H + BLOCK_Y - 1) // BLOCK_Y, 1
+    means3d, scales, quats, viewmat, projmat, fx, fy = _random_gaussians(
+        num_points, H, W
+    )
+    args = (num_points, means3d, scales, 0.9, quats, viewmat, projmat, fx, fy)
+    args += (W / 2, H / 2, H, W)
+
+    outputs = _C.project_gaussians_forward(*args, tile_bounds, 0.01)
+    _outputs = _torch_bindings.project_gaussians_forward(*args, tile_bounds, 0.01)
+    for a, b in zip(outputs, _outputs):
+        torch.testing.assert_close(a, b, atol=1e-4, rtol=1e-4)
+    cov3d, xys, depths, radii, conics, num_tiles_hit = _outputs
+
+    v_xy, v_depth, v_conic = (
+        torch.randn(num_points, 2),
+        torch.randn(num_points),
+        torch.randn(num_points, 3),
+    )
+    backward_args = args + (cov3d, radii, conics, v_xy, v_depth, v_conic)
+    grads = _C.project_gaussians_backward(*backward_args)
+    _grads = _torch_bindings.project_gaussians_backward(*backward_args)
+    for a, b in zip(grads, _grads):
+        torch.testing.assert_close(a, b, atol=1e-3, rtol=1e-3)
+
+    cov2d = torch.rand(num_points, 3) + torch.tensor([1.0, 0.0, 1.0])
+    for a, b in zip(
+        _C.compute_cov2d_bounds(num_points, cov2d),
+        _torch_bindings.compute_cov2d_bounds(num_points, cov2d),
+    ):
+        torch.testing.assert_close(a, b)
+
+    for degree in range(5):
+        num_bases = (degree + 1) ** 2
+        viewdirs = torch.randn(num_points, 3)
+        coeffs = torch.randn(num_points, num_bases, 3)
+        v_colors = torch.randn(num_points, 3)
+        torch.testing.assert_close(
+            _C.compute_sh_forward(num_points, degree, degree, viewdirs, coeffs),
+            _torch_bindings.compute_sh_forward(
+                num_points, degree, degree, viewdirs, coeffs
+            ),
+        )
+        torch.testing.assert_close(
+            _C.compute_sh_backward(num_points, degree, degree, viewdirs, v_colors),
+            _torch_bindings.compute_sh_backward(
+                num_points, degree, degree, viewdirs, v_colors
+            ),
+        )
+
+    cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
+    num_intersects = cum_tiles_hit[-1].item()
+    map_args = (num_points, num_intersects, xys, depths, radii, cum_tiles_hit)
+    isect_ids, gaussian_ids = _C.map_gaussian_to_intersects(*map_args, tile_bounds)
+    _isect_ids, _gaussian_ids = _torch_bindings.map_gaussian_to_intersects(
+        *map_args, tile_bounds
+    )
+    torch.testing.assert_close(isect_ids, _isect_ids)
+    torch.testing.assert_close(gaussian_ids, _gaussian_ids)
+
+    isect_ids_sorted, sorted_indices = torch.sort(isect_ids)
+    gaussian_ids_sorted = torch.gather(gaussian_ids, 0, sorted_indices)
+    tile_bins = _C.get_tile_bin_edges(num_intersects, isect_ids_sorted)
+    torch.testing.assert_close(
+        tile_bins,
+        _torch_bindings.get_tile_bin_edges(num_intersects, isect_ids_sorted),
+    )
+
+    for channels in (3, 5):
+        colors = torch.rand(num_points, channels)
+        opacities = torch.rand(num_points, 1)
+        background = torch.rand(channels)
+        raster_args = (gaussian_ids_sorted, tile_bins, xys, conics, colors, opacities)
+        raster_args += (background,)
+        image_args = (tile_bounds, (BLOCK_X, BLOCK_Y, 1), (W, H, 1))
+        out_img, final_Ts, final_idx = _C.nd_rasterize_forward(
+            *image_args, *raster_args
+        )
+        _out_img, _final_Ts, _final_idx = _torch_bindings.nd_rasterize_forward(
+            *image_args, *raster_args
+        )
+        torch.testing.assert_close(out_img, _out_img, atol=1e-5, rtol=1e-5)
+        torch.testing.assert_close(final_Ts, _final_Ts, atol=1e-5, rtol=1e-5)
+        torch.testing.assert_close(final_idx, _final_idx)
+
+        v_output = torch.randn(H, W, channels)
+        v_output_alpha = torch.randn(H, W)
+        backward_args = (H, W) + raster_args
+        backward_args += (_final_Ts, _final_idx, v_output, v_output_alpha)
+        for a, b in zip(
+            _C.nd_rasterize_backward(*backward_args),
+            _torch_bindings.nd_rasterize_backward(*backward_args),
+        ):
+            torch.testing.assert_close(a, b, atol=1e-4, rtol=1e-4)
+
+
+if __name__ == "__main__":
+    test_cpu_extension_parity()
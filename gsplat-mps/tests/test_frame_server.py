@@ -0,0 +1,191 @@
+import asyncio
+import io
+import json
+import os
+import struct
+import sys
+import threading
+import zlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("websockets")
+pytest.importorskip("tyro")
+Image = pytest.importorskip("PIL.Image")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "examples"))
+import frame_server  # noqa: E402
+
+
+class _FakeWebSocket:
+    """Messages put by the test, and the frames sent back."""
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.incoming.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    async def send(self, data):
+        self.sent.append(data)
+
+
+class _FakeRenderer:
+    """Black images, rendered once the test allows it when gated."""
+
+    def __init__(self, gated: bool = False):
+        self.gate = threading.Semaphore(0) if gated else None
+
+    def render(self, camera, sort_cache=None):
+        if self.gate is not None:
+            assert self.gate.acquire(timeout=10)
+        return np.zeros((camera.H, camera.W, 3), dtype=np.uint8)
+
+
+def _message(**fields) -> bytes:
+    state = {
+        "H": 32,
+        "W": 48,
+        "K": [[40.0, 0.0, 24.0], [0.0, 40.0, 16.0], [0.0, 0.0, 1.0]],
+        "R": [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+        "T": [0.0, 0.0, 5.0],
+        "dx": 1.0,
+    }
+    state.update(fields)
+    return zlib.compress(json.dumps(state).encode("ascii"))
+
+
+def _seq(jpeg: bytes) -> int:
+    # the comment segment right after the start of image marker
+    assert jpeg[:4] == b"\xff\xd8\xff\xfe"
+    (length,) = struct.unpack(">H", jpeg[4:6])
+    key, value = jpeg[6 : 4 + length].split(b"=")
+    assert key == b"seq"
+    return int(value)
+
+
+async def _until(condition, timeout: float = 10.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.001)
+
+
+def _serve(server, scenario):
+    # runs a session through the scenario, then closes its websocket
+    async def main():
+        websocket = _FakeWebSocket()
+        session = frame_server.ClientSession(server, websocket)
+        task = asyncio.create_task(session.run())
+        try:
+            await scenario(session, websocket)
+        finally:
+            websocket.incoming.put_nowait(None)
+        await asyncio.wait_for(task, 10)
+        return session
+
+    return asyncio.run(main())
+
+
+def test_encode_jpeg():
+    image = np.random.default_rng(0).integers(0, 255, (32, 48, 3), dtype=np.uint8)
+    jpeg = frame_server.encode_jpeg(image, 90, 7)
+    assert _seq(jpeg) == 7
+    decoded = Image.open(io.BytesIO(jpeg))
+    assert decoded.size == (48, 32)
+    assert decoded.info["comment"] == b"seq=7"
+
+
+def test_session_lockstep():
+    server = frame_server.FrameServer(_FakeRenderer(), max_in_flight=1)
+
+    async def scenario(session, websocket):
+        for i in range(3):
+            # each message acknowledges the oldest frame sent
+            websocket.incoming.put_nowait(_message())
+            await _until(lambda: len(websocket.sent) == i + 1)
+            assert session.in_flight == 1
+
+    session = _serve(server, scenario)
+    assert [_seq(jpeg) for jpeg in session.websocket.sent] == [1, 2, 3]
+    assert session.num_dropped == 0
+
+
+def test_session_pipelined():
+    renderer = _FakeRenderer(gated=True)
+    server = frame_server.FrameServer(renderer, max_in_flight=2)
+
+    async def scenario(session, websocket):
+        # two frames render at once
+        websocket.incoming.put_nowait(_message())
+        await _until(lambda: session.rendering == 1)
+        websocket.incoming.put_nowait(_message())
+        await _until(lambda: session.rendering == 2)
+        # the next pose waits, and is replaced by the one after it
+        websocket.incoming.put_nowait(_message())
+        websocket.incoming.put_nowait(_message())
+        await _until(lambda: session.num_dropped == 1)
+        assert session.pending is not None and session.in_flight == 2
+
+        renderer.gate.release()
+        renderer.gate.release()
+        await _until(lambda: len(websocket.sent) == 2)
+        # sent but not acknowledged, so still in flight
+        assert session.in_flight == 2 and session.pending is not None
+
+        # acknowledging both frames renders the newest pose only
+        websocket.incoming.put_nowait(_message(ack=2))
+        await _until(lambda: session.rendering == 1)
+        assert session.num_dropped == 2
+        renderer.gate.release()
+        await _until(lambda: len(websocket.sent) == 3)
+        assert session.in_flight == 1
+
+    session = _serve(server, scenario)
+    assert [_seq(jpeg) for jpeg in session.websocket.sent] == [1, 2, 3]
+
+
+def test_session_drops_late_frames(monkeypatch):
+    server = frame_server.FrameServer(_FakeRenderer(), max_in_flight=2)
+    encode_jpeg = frame_server.encode_jpeg
+    newer_sent = threading.Event()
+
+    def slow_first_frame(image, quality, seq):
+        # the first frame is encoded after the second one was sent
+        if seq == 1:
+            assert newer_sent.wait(timeout=10)
+        return encode_jpeg(image, quality, seq)
+
+    monkeypatch.setattr(frame_server, "encode_jpeg", slow_first_frame)
+
+    async def scenario(session, websocket):
+        websocket.incoming.put_nowait(_message())
+        await _until(lambda: session.seq == 1)
+        websocket.incoming.put_nowait(_message())
+        await _until(lambda: len(websocket.sent) == 1)
+        newer_sent.set()
+        await _until(lambda: session.num_dropped == 1)
+        await _until(lambda: session.rendering == 0)
+        assert session.in_flight == 1
+
+    session = _serve(server, scenario)
+    assert [_seq(jpeg) for jpeg in session.websocket.sent] == [2]
+
+
+def test_session_malformed_message():
+    server = frame_server.FrameServer(_FakeRenderer(), max_in_flight=1)
+
+    async def scenario(session, websocket):
+        websocket.incoming.put_nowait(b"not a camera")
+
+    with pytest.raises(zlib.error):
+        _serve(server, scenario)
@@ -75,11 +75,51 @@ def test_get_tile_bin_edges():
     _isect_ids_sorted = sorted_values
     _gaussian_ids_sorted = torch.gather(_gaussian_ids_unsorted, 0, sorted_indices)
 
-    _tile_bins = _torch_impl.get_tile_bin_edges(_num_intersects, _isect_ids_sorted)
+    num_tiles = tile_bounds[0] * tile_bounds[1]
+    _tile_bins = _torch_impl.get_tile_bin_edges(
+        _num_intersects, _isect_ids_sorted, num_tiles
+    )
     tile_bins = get_tile_bin_edges(_num_intersects, _isect_ids_sorted)
 
-    torch.testing.assert_close(_tile_bins, tile_bins)
+    torch.testing.assert_close(_tile_bins, tile_bins[:num_tiles])
+
+
+def test_get_tile_bin_edges_cpu():
+    from gsplat import _torch_impl
+
+    torch.manual_seed(42)
+
+    num_tiles = 64
+    num_intersects = 500
+    tile_ids = torch.randint(0, num_tiles, (num_intersects,))
+    # leave a few tiles empty, including the last one
+    tile_ids = tile_ids[(tile_ids % 7 != 3) & (tile_ids != num_tiles - 1)]
+    num_intersects = tile_ids.numel()
+    depth_ids = torch.randint(0, 2**31 - 1, (num_intersects,))
+    isect_ids_sorted, _ = torch.sort((tile_ids << 32) | depth_ids)
+
+    # mirrors the get_tile_bin_edges kernel
+    _tile_bins = torch.zeros((num_tiles, 2), dtype=torch.int32)
+    for idx in range(num_intersects):
+        cur_tile_idx = isect_ids_sorted[idx] >> 32
+        if idx == 0:
+            _tile_bins[cur_tile_idx, 0] = 0
+        if idx == num_intersects - 1:
+            _tile_bins[cur_tile_idx, 1] = num_intersects
+        if idx == 0 or idx == num_intersects - 1:
+            continue
+        prev_tile_idx = isect_ids_sorted[idx - 1] >> 32
+        if prev_tile_idx != cur_tile_idx:
+            _tile_bins[prev_tile_idx, 1] = idx
+            _tile_bins[cur_tile_idx, 0] = idx
+
+    tile_bins = _torch_impl.get_tile_bin_edges(
+        num_intersects, isect_ids_sorted, num_tiles
+    )
+    assert tile_bins.shape == (num_tiles, 2)
+    torch.testing.assert_close(tile_bins, _tile_bins)
 
 
 if __name__ == "__main__":
     test_get_tile_bin_edges()
+    test_get_tile_bin_edges_cpu()
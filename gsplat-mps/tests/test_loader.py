@@ -0,0 +1,56 @@
+import time
+
+import torch
+
+
+def _wait(condition, timeout=10.0):
+    start = time.perf_counter()
+    while not condition():
+        assert time.perf_counter() - start < timeout
+        time.sleep(0.01)
+
+
+def test_frame_loader(tmp_path):
+    from gsplat import FrameLoader, GaussianSequence, save_sequence
+
+    torch.manual_seed(42)
+
+    num_points, num_frames = 1000, 40
+    means3d = torch.randn((num_points, 3))
+    frames = []
+    for t in range(num_frames):
+        means3d = means3d.clone()
+        means3d[:20] += 0.01
+        frames.append({"means3d": means3d, "opacities": torch.rand(num_points, 1)})
+    path = str(tmp_path / "sequence.gsplat")
+    save_sequence(path, frames, keyframe_interval=8)
+
+    frame_bytes = num_points * 4 * 4
+    with FrameLoader(
+        GaussianSequence(path), max_bytes=6 * frame_bytes, lookahead=3
+    ) as loader:
+        frame = loader.get_frame(0, timeout=None)
+        for name, tensor in frames[0].items():
+            assert torch.equal(frame[name], tensor)
+        # playback prefetches the next frames
+        _wait(lambda: all(t in loader for t in (1, 2, 3)))
+        assert loader.get_frame(1) is not None
+        assert loader.num_hits == 1 and loader.num_misses == 1
+
+        # and so does scrubbing backwards, two frames at a time
+        loader.get_frame(30, timeout=None)
+        loader.get_frame(28, timeout=None)
+        _wait(lambda: all(t in loader for t in (26, 24, 22)))
+        assert len(loader) <= 6
+        for t in (26, 24, 22, 20):
+            frame = loader.get_frame(t, timeout=None)
+            for name, tensor in frames[t].items():
+                assert torch.equal(frame[name], tensor)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_frame_loader(Path(tmp_dir))
@@ -0,0 +1,96 @@
+import math
+
+import torch
+
+
+def _covered(lod, ids):
+    # number of selected nodes on the path from each leaf to its root
+    selected = torch.zeros(lod.num_nodes, dtype=torch.long)
+    selected[ids] = 1
+    counts = torch.zeros(lod.num_leaves, dtype=torch.long)
+    nodes = torch.arange(lod.num_leaves)
+    valid = torch.ones(lod.num_leaves, dtype=torch.bool)
+    while torch.any(valid):
+        counts += selected[nodes] * valid
+        nodes = lod.parents[nodes]
+        valid &= nodes >= 0
+        nodes = nodes.clamp(min=0)
+    return counts
+
+
+def test_lod_hierarchy():
+    from gsplat import LODHierarchy, project_gaussians
+    from gsplat._torch_impl import scale_rot_to_cov3d
+
+    torch.manual_seed(42)
+
+    num_points, H, W = 2000, 48, 64
+    means3d = torch.rand((num_points, 3)) * 4 - 2
+    scales = torch.rand((num_points, 3)) * 0.05
+    quats = torch.randn((num_points, 4))
+    colors = torch.rand((num_points, 3))
+    opacities = torch.rand((num_points, 1))
+    lod = LODHierarchy(means3d, scales, quats, colors, opacities)
+
+    assert lod.num_nodes > num_points
+    assert len(lod.roots) == 1
+    torch.testing.assert_close(lod.means3d[:num_points], means3d)
+
+    # a parent matches the moments of its children
+    parent = lod.parents[0]
+    children = lod.children[lod.child_offsets[parent] : lod.child_offsets[parent + 1]]
+    assert torch.all(children < num_points)
+    cov3d = scale_rot_to_cov3d(lod.scales, 1.0, lod.quats)
+    axes = torch.linalg.eigvalsh(
+        cov3d[children][:, [0, 1, 2, 1, 3, 4, 2, 4, 5]].view(-1, 3, 3)
+    )
+    weights = lod.opacities[children, 0] * torch.sqrt(axes[:, 1] * axes[:, 2])
+    weights = weights / weights.sum()
+    mean = (weights[:, None] * lod.means3d[children]).sum(0)
+    torch.testing.assert_close(lod.means3d[parent], mean)
+    torch.testing.assert_close(
+        lod.colors[parent], (weights[:, None] * lod.colors[children]).sum(0)
+    )
+
+    fx = fy = 0.5 * W / math.tan(0.25 * math.pi)
+    for distance in (3.0, 30.0, 300.0):
+        viewmat = torch.eye(4)
+        viewmat[2, 3] = distance
+        ids = lod.cut(viewmat, fx, fy)
+        assert torch.all(_covered(lod, ids) == 1)
+        if distance == 300.0:
+            assert len(ids) < num_points // 10
+
+        projmat = torch.tensor(
+            [
+                [2 * fx / W, 0.0, 0.0, 0.0],
+                [0.0, 2 * fy / H, 0.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+            ]
+        )
+        project_gaussians(
+            lod.means3d[ids],
+            lod.scales[ids],
+            1.0,
+            lod.quats[ids],
+            viewmat,
+            projmat @ viewmat,
+            fx,
+            fy,
+            W / 2,
+            H / 2,
+            H,
+            W,
+            ((W + 15) // 16, (H + 15) // 16, 1),
+        )
+
+    viewmat = torch.eye(4)
+    viewmat[2, 3] = 3.0
+    ids = lod.cut(viewmat, fx, fy, pixel_size=0.0, max_primitives=300)
+    assert len(ids) <= 300
+    assert torch.all(_covered(lod, ids) == 1)
+
+
+if __name__ == "__main__":
+    test_lod_hierarchy()
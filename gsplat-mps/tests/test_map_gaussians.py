@@ -73,5 +73,61 @@ def test_map_gaussians():
     torch.testing.assert_close(isect_ids, _isect_ids)
 
 
+def _map_gaussian_to_intersects_loop(
+    num_points, xys, depths, radii, cum_tiles_hit, tile_bounds
+):
+    """Per-gaussian loop mirroring the map_gaussian_to_intersects kernel."""
+    import struct
+    from gsplat import _torch_impl
+
+    num_intersects = cum_tiles_hit[-1]
+    isect_ids = torch.zeros(num_intersects, dtype=torch.int64)
+    gaussian_ids = torch.zeros(num_intersects, dtype=torch.int32)
+    for idx in range(num_points):
+        if radii[idx] <= 0:
+            continue
+        tile_min, tile_max = _torch_impl.get_tile_bbox(
+            xys[idx], radii[idx], tile_bounds
+        )
+        cur_idx = 0 if idx == 0 else cum_tiles_hit[idx - 1].item()
+        depth_id = struct.unpack("i", struct.pack("f", depths[idx]))[0]
+        for i in range(tile_min[1], tile_max[1]):
+            for j in range(tile_min[0], tile_max[0]):
+                tile_id = i * tile_bounds[0] + j
+                isect_ids[cur_idx] = (tile_id << 32) | depth_id
+                gaussian_ids[cur_idx] = idx
+                cur_idx += 1
+    return isect_ids, gaussian_ids
+
+
+def test_map_gaussians_cpu():
+    from gsplat import _torch_impl
+
+    torch.manual_seed(42)
+
+    num_points = 100
+    xys = torch.rand((num_points, 2)) * torch.tensor([512.0, 256.0])
+    depths = torch.rand(num_points) * 10
+    radii = torch.randint(-2, 40, (num_points,), dtype=torch.int32)
+    tile_bounds = (32, 16, 1)
+
+    tile_min, tile_max = _torch_impl.get_tile_bbox(xys, radii, tile_bounds)
+    num_tiles_hit = torch.where(
+        radii > 0, torch.prod(tile_max - tile_min, dim=-1), 0
+    ).to(torch.int32)
+    cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
+
+    isect_ids, gaussian_ids = _torch_impl.map_gaussian_to_intersects(
+        num_points, xys, depths, radii, cum_tiles_hit, tile_bounds
+    )
+    _isect_ids, _gaussian_ids = _map_gaussian_to_intersects_loop(
+        num_points, xys, depths, radii, cum_tiles_hit, tile_bounds
+    )
+
+    torch.testing.assert_close(gaussian_ids, _gaussian_ids)
+    torch.testing.assert_close(isect_ids, _isect_ids)
+
+
 if __name__ == "__main__":
     test_map_gaussians()
+    test_map_gaussians_cpu()
@@ -78,7 +78,7 @@ def test_project_gaussians_forward():
     # TODO: failing
     # torch.testing.assert_close(
     #     cov3d[_masks],
-    #     _cov3d.view(-1, 9)[_masks][:, [0, 1, 2, 4, 5, 8]],
+    #     _cov3d[_masks],
     #     atol=1e-5,
     #     rtol=1e-5,
     # )
@@ -94,5 +94,205 @@ def test_project_gaussians_forward():
     # torch.testing.assert_close(num_tiles_hit[_masks], _num_tiles_hit[_masks])
 
 
+def test_project_gaussians_backward_cpu():
+    from gsplat import project_gaussians
+
+    torch.manual_seed(42)
+
+    num_points = 20
+    dtype = torch.float64
+    H, W = 32, 40
+    fx, fy = 20.0, 20.0
+    glob_scale = 0.7
+    BLOCK_X, BLOCK_Y = 16, 16
+    tile_bounds = (W + BLOCK_X - 1) // BLOCK_X, (H + BLOCK_Y - 1) // BLOCK_Y, 1
+
+    means3d = (torch.rand((num_points, 3), dtype=dtype) * 2 - 1) * 0.8
+    scales = torch.rand((num_points, 3), dtype=dtype) * 0.2 + 0.05
+    quats = torch.randn((num_points, 4), dtype=dtype)
+    viewmat = torch.eye(4, dtype=dtype)
+    viewmat[2, 3] = 4.0
+    projmat = (
+        torch.tensor(
+            [
+                [2 * fx / W, 0.0, 0.0, 0.0],
+                [0.0, 2 * fy / H, 0.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+            ],
+            dtype=dtype,
+        )
+        @ viewmat
+    )
+
+    def project(means3d, scales, quats):
+        xys, depths, _, conics, _, _ = project_gaussians(
+            means3d,
+            scales,
+            glob_scale,
+            quats,
+            viewmat,
+            projmat,
+            fx,
+            fy,
+            W / 2,
+            H / 2,
+            H,
+            W,
+            tile_bounds,
+        )
+        return xys, depths, conics
+
+    inputs = tuple(a.requires_grad_() for a in (means3d, scales, quats))
+    assert torch.autograd.gradcheck(project, inputs, atol=1e-5)
+
+
+def test_packed_covariances():
+    from gsplat import _torch_impl
+
+    torch.manual_seed(42)
+
+    num_points = 50
+    scales = torch.rand((num_points, 3)) + 0.1
+    quats = torch.randn((num_points, 4))
+    means3d = torch.randn((num_points, 3))
+    viewmat = torch.eye(4)
+    viewmat[2, 3] = 8.0
+    fx, fy, tan_fovx, tan_fovy = 30.0, 30.0, 0.5, 0.5
+
+    R = _torch_impl.quat_to_rotmat(quats)
+    M = R * 0.5 * scales[:, None, :]
+    cov3d_full = M @ M.transpose(-1, -2)
+    cov3d = _torch_impl.scale_rot_to_cov3d(scales, 0.5, quats)
+    torch.testing.assert_close(cov3d, cov3d_full.view(-1, 9)[:, [0, 1, 2, 4, 5, 8]])
+
+    t = means3d + viewmat[:3, 3]
+    lim = 1.3 * torch.tensor([tan_fovx, tan_fovy])
+    t_xy = t[:, 2:] * torch.clamp(t[:, :2] / t[:, 2:], -lim, lim)
+    rz = 1.0 / t[:, 2]
+    J = torch.zeros((num_points, 2, 3))
+    J[:, 0, 0] = fx * rz
+    J[:, 0, 2] = -fx * t_xy[:, 0] * rz**2
+    J[:, 1, 1] = fy * rz
+    J[:, 1, 2] = -fy * t_xy[:, 1] * rz**2
+    cov2d_full = J @ cov3d_full @ J.transpose(-1, -2) + 0.3 * torch.eye(2)
+    cov2d = _torch_impl.project_cov3d_ewa(
+        means3d, cov3d, viewmat, fx, fy, tan_fovx, tan_fovy
+    )
+    torch.testing.assert_close(cov2d, cov2d_full.view(-1, 4)[:, [0, 1, 3]])
+
+
+def test_project_gaussians_batched_cpu():
+    from gsplat import project_gaussians, project_gaussians_batched
+    import gsplat.cpu as _C
+    from gsplat.project_gaussians import (
+        _project_per_camera_backward,
+        _project_per_camera_forward,
+    )
+
+    torch.manual_seed(42)
+
+    num_points, num_cameras = 20, 3
+    dtype = torch.float64
+    H, W = 32, 40
+    glob_scale = 0.7
+    BLOCK_X, BLOCK_Y = 16, 16
+    tile_bounds = (W + BLOCK_X - 1) // BLOCK_X, (H + BLOCK_Y - 1) // BLOCK_Y, 1
+
+    means3d = (torch.rand((num_points, 3), dtype=dtype) * 2 - 1) * 0.8
+    scales = torch.rand((num_points, 3), dtype=dtype) * 0.2 + 0.05
+    quats = torch.randn((num_points, 4), dtype=dtype)
+    fx = torch.tensor([20.0, 25.0, 30.0], dtype=dtype)
+    fy = fx + 1.0
+    cx = [W / 2, W / 2 + 1, W / 2 - 1]
+    cy = H / 2
+    viewmats = torch.eye(4, dtype=dtype).repeat(num_cameras, 1, 1)
+    viewmats[:, :3, 3] = torch.tensor(
+        [[0.0, 0.0, 4.0], [0.5, 0.0, 3.0], [0.0, -0.3, 5.0]], dtype=dtype
+    )
+    projmats = torch.zeros((num_cameras, 4, 4), dtype=dtype)
+    projmats[:, 0, 0] = 2 * fx / W
+    projmats[:, 1, 1] = 2 * fy / H
+    projmats[:, 2, 2] = projmats[:, 3, 2] = 1.0
+    projmats = projmats @ viewmats
+
+    def project(means3d, scales, quats):
+        xys, depths, _, conics, _, _ = project_gaussians_batched(
+            means3d,
+            scales,
+            glob_scale,
+            quats,
+            viewmats,
+            projmats,
+            fx,
+            fy,
+            cx,
+            cy,
+            H,
+            W,
+            tile_bounds,
+        )
+        return xys, depths, conics
+
+    args = (means3d, scales, glob_scale, quats, viewmats, projmats, fx, fy, cx, cy)
+    outputs = project_gaussians_batched(*args, H, W, tile_bounds)
+    for i in range(num_cameras):
+        camera_outputs = project_gaussians(
+            means3d,
+            scales,
+            glob_scale,
+            quats,
+            viewmats[i],
+            projmats[i],
+            fx[i].item(),
+            fy[i].item(),
+            cx[i],
+            cy,
+            H,
+            W,
+            tile_bounds,
+        )
+        for a, b in zip(outputs[:-1], camera_outputs[:-1]):
+            torch.testing.assert_close(a[i], b)
+
+    # the per-camera path of backends without a batched kernel
+    intrins = torch.stack(
+        [fx, fy, torch.tensor(cx, dtype=dtype), torch.full_like(fx, cy)], -1
+    )
+    _outputs = _project_per_camera_forward(
+        _C,
+        num_points,
+        means3d,
+        scales,
+        glob_scale,
+        quats,
+        viewmats,
+        projmats,
+        intrins,
+        H,
+        W,
+        tile_bounds,
+        0.01,
+    )
+    for a, b in zip(outputs, _outputs[1:] + _outputs[:1]):
+        torch.testing.assert_close(a, b)
+    xys, depths, radii, conics, num_tiles_hit, cov3d = outputs
+    backward_args = (num_points, means3d, scales, glob_scale, quats, viewmats)
+    backward_args += (projmats, intrins, H, W, cov3d, radii, conics)
+    backward_args += (torch.randn_like(xys), torch.randn_like(depths))
+    backward_args += (torch.randn_like(conics),)
+    for a, b in zip(
+        _C.project_gaussians_batched_backward(*backward_args),
+        _project_per_camera_backward(_C, *backward_args),
+    ):
+        torch.testing.assert_close(a, b)
+
+    inputs = tuple(a.requires_grad_() for a in (means3d, scales, quats))
+    assert torch.autograd.gradcheck(project, inputs, atol=1e-5)
+
+
 if __name__ == "__main__":
     test_project_gaussians_forward()
+    test_project_gaussians_backward_cpu()
+    test_packed_covariances()
+    test_project_gaussians_batched_cpu()
@@ -0,0 +1,343 @@
+import pytest
+import torch
+
+
+device = torch.device("cuda:0")
+
+
+def _rasterize_forward_loop(
+    tile_bounds,
+    block,
+    img_size,
+    gaussian_ids_sorted,
+    tile_bins,
+    xys,
+    conics,
+    colors,
+    opacities,
+    background,
+):
+    """Per-pixel loop mirroring the rasterize_forward kernel."""
+    img_width, img_height = img_size[0], img_size[1]
+    out_img = torch.zeros((img_height, img_width, colors.shape[1]))
+    final_Ts = torch.zeros((img_height, img_width))
+    final_idx = torch.zeros((img_height, img_width), dtype=torch.int32)
+    for i in range(img_height):
+        for j in range(img_width):
+            tile_id = (i // block[1]) * tile_bounds[0] + (j // block[0])
+            start, end = tile_bins[tile_id].tolist()
+            T = 1.0
+            cur_idx = 0
+            for idx in range(start, end):
+                g = gaussian_ids_sorted[idx]
+                conic = conics[g]
+                dx, dy = xys[g, 0] - j, xys[g, 1] - i
+                sigma = (
+                    0.5 * (conic[0] * dx * dx + conic[2] * dy * dy) + conic[1] * dx * dy
+                )
+                alpha = min(0.999, opacities[g].item() * torch.exp(-sigma).item())
+                if sigma < 0 or alpha < 1 / 255:
+                    continue
+                next_T = T * (1 - alpha)
+                if next_T <= 1e-4:
+                    break
+                out_img[i, j] += alpha * T * colors[g]
+                T = next_T
+                cur_idx = idx
+            final_Ts[i, j] = T
+            final_idx[i, j] = cur_idx
+            out_img[i, j] += T * background
+    return out_img, final_Ts, final_idx
+
+
+def _random_scene(num_points, img_height, img_width, device, extent=1.0):
+    from gsplat import _torch_impl
+
+    BLOCK_X, BLOCK_Y = 16, 16
+    tile_bounds = (
+        (img_width + BLOCK_X - 1) // BLOCK_X,
+        (img_height + BLOCK_Y - 1) // BLOCK_Y,
+        1,
+    )
+    xys = torch.rand((num_points, 2), device=device) * torch.tensor(
+        [img_width * extent, img_height], device=device
+    )
+    scales = torch.rand((num_points, 2), device=device) * 6 + 1
+    conics = torch.stack(
+        [
+            1 / scales[:, 0] ** 2,
+            torch.zeros(num_points, device=device),
+            1 / scales[:, 1] ** 2,
+        ],
+        dim=-1,
+    )
+    radii = torch.ceil(3 * scales.amax(dim=-1)).to(torch.int32)
+    depths = torch.rand(num_points, device=device) + 1
+    colors = torch.rand((num_points, 3), device=device)
+    opacities = torch.rand((num_points, 1), device=device) * 0.5 + 0.45
+
+    tile_min, tile_max = _torch_impl.get_tile_bbox(xys, radii, tile_bounds)
+    num_tiles_hit = torch.prod(tile_max - tile_min, dim=-1).to(torch.int32)
+    cum_tiles_hit = torch.cumsum(num_tiles_hit, dim=0, dtype=torch.int32)
+    num_intersects = cum_tiles_hit[-1].item()
+    isect_ids, gaussian_ids = _torch_impl.map_gaussian_to_intersects(
+        num_points, xys, depths, radii, cum_tiles_hit, tile_bounds
+    )
+    isect_ids_sorted, sorted_indices = torch.sort(isect_ids)
+    gaussian_ids_sorted = torch.gather(gaussian_ids, 0, sorted_indices)
+    tile_bins = _torch_impl.get_tile_bin_edges(
+        num_intersects, isect_ids_sorted, tile_bounds[0] * tile_bounds[1]
+    )
+    return (
+        tile_bounds,
+        (BLOCK_X, BLOCK_Y, 1),
+        (img_width, img_height, 1),
+        gaussian_ids_sorted,
+        tile_bins,
+        xys,
+        conics,
+        colors,
+        opacities,
+    )
+
+
+def test_rasterize_forward_cpu():
+    from gsplat import _torch_impl
+
+    torch.manual_seed(42)
+
+    args = _random_scene(120, 24, 40, torch.device("cpu"))
+    background = torch.rand(3)
+
+    out_img, final_Ts, final_idx = _torch_impl.rasterize_forward(*args, background)
+    _out_img, _final_Ts, _final_idx = _rasterize_forward_loop(*args, background)
+
+    torch.testing.assert_close(out_img, _out_img)
+    torch.testing.assert_close(final_Ts, _final_Ts)
+    torch.testing.assert_close(final_idx, _final_idx)
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="No CUDA device")
+def test_rasterize_forward():
+    from gsplat import _torch_impl
+    import gsplat.cuda as _C
+
+    torch.manual_seed(42)
+
+    args = _random_scene(200, 128, 96, device)
+    background = torch.rand(3, device=device)
+
+    out_img, final_Ts, final_idx = _C.rasterize_forward(*args, background)
+    _out_img, _final_Ts, _final_idx = _torch_impl.rasterize_forward(*args, background)
+
+    torch.testing.assert_close(out_img, _out_img, atol=1e-5, rtol=1e-5)
+    torch.testing.assert_close(final_Ts, _final_Ts, atol=1e-5, rtol=1e-5)
+    torch.testing.assert_close(final_idx, _final_idx)
+
+
+def test_rasterize_backward_cpu():
+    from gsplat import _torch_impl, rasterize_gaussians
+
+    torch.manual_seed(42)
+
+    num_points, H, W = 30, 24, 40
+    args = _random_scene(num_points, H, W, torch.device("cpu"))
+    xys, conics, colors, opacities = (a.double() for a in args[5:])
+    depths = torch.rand(num_points, dtype=torch.float64) + 1
+    radii = torch.ceil(3 / conics[:, ::2].amin(dim=-1).sqrt()).to(torch.int32)
+    tile_min, tile_max = _torch_impl.get_tile_bbox(xys, radii, args[0])
+    num_tiles_hit = torch.prod(tile_max - tile_min, dim=-1).to(torch.int32)
+    background = torch.rand(3, dtype=torch.float64)
+
+    def render(xys, conics, colors, opacities):
+        return rasterize_gaussians(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            colors,
+            opacities,
+            H,
+            W,
+            background,
+            return_alpha=True,
+        )
+
+    inputs = tuple(a.requires_grad_() for a in (xys, conics, colors, opacities))
+    assert torch.autograd.gradcheck(render, inputs, atol=1e-5, fast_mode=True)
+
+
+# a narrow scene leaves the tiles on the right empty
+@pytest.mark.parametrize("extent", [1.0, 0.25])
+def test_rasterize_cpu_workers(extent):
+    from gsplat import _torch_impl
+    from gsplat.cpu import _torch_bindings, get_num_workers, set_num_workers
+    from gsplat.cpu._parallel import partition_tiles, run_units
+
+    torch.manual_seed(42)
+
+    H, W = 64, 80
+    args = _random_scene(300, H, W, torch.device("cpu"), extent)
+    tile_bins = args[4]
+    num_tiles = args[0][0] * args[0][1]
+    background = torch.rand(3)
+
+    units = partition_tiles(tile_bins, num_tiles, 7)
+    assert [t for unit in units for t in unit] == list(range(num_tiles))
+
+    outputs = _torch_impl.rasterize_forward(*args, background)
+    v_output = torch.randn(H, W, 3)
+    v_output_alpha = torch.randn(H, W)
+    grads = _torch_impl.rasterize_backward(
+        *args, background, *outputs[1:], v_output, v_output_alpha
+    )
+
+    num_workers, num_threads = get_num_workers(), torch.get_num_threads()
+    set_num_workers(4)
+    try:
+        _outputs = _torch_bindings.rasterize_forward(*args, background)
+        _grads = _torch_bindings.rasterize_backward(
+            H, W, *args[3:], background, *_outputs[1:], v_output, v_output_alpha
+        )
+        # workers do not start torch threads of their own on top of the pool,
+        # and leave those of the calling thread alone
+        torch.set_num_threads(4)
+        threads = []
+        run_units(lambda unit: threads.append(torch.get_num_threads()), units)
+        assert threads == [1] * len(units)
+        assert torch.get_num_threads() == 4
+    finally:
+        set_num_workers(num_workers)
+        torch.set_num_threads(num_threads)
+
+    for a, b in zip(outputs, _outputs):
+        torch.testing.assert_close(a, b)
+    for a, b in zip(grads, _grads):
+        torch.testing.assert_close(a, b)
+
+
+def test_rasterize_batched_cpu():
+    from gsplat import _torch_impl, rasterize_gaussians, rasterize_gaussians_batched
+
+    torch.manual_seed(42)
+
+    num_views, num_points, H, W = 3, 60, 24, 40
+    tile_bounds = (W + 15) // 16, (H + 15) // 16, 1
+    views = [_random_scene(num_points, H, W, torch.device("cpu")) for _ in range(3)]
+    xys, conics, _, opacities = (torch.stack(a) for a in zip(*(v[5:] for v in views)))
+    xys[0, :10] = -100.0  # gaussians outside of one view
+    depths = torch.rand(num_views, num_points) + 1
+    radii = torch.ceil(3 / conics[..., ::2].amin(dim=-1).sqrt()).to(torch.int32)
+    tile_min, tile_max = _torch_impl.get_tile_bbox(xys, radii, tile_bounds)
+    num_tiles_hit = torch.prod(tile_max - tile_min, dim=-1).to(torch.int32)
+
+    # colors are always shared, opacities once
+    for channels, shared_opacity in ((3, False), (5, True)):
+        colors = torch.rand(num_points, channels)
+        background = torch.rand(channels)
+        opacity = opacities[0].detach() if shared_opacity else opacities.detach()
+        inputs = tuple(a.requires_grad_() for a in (xys, conics, colors, opacity))
+        out_img, out_alpha = rasterize_gaussians_batched(
+            xys,
+            depths,
+            radii,
+            conics,
+            num_tiles_hit,
+            colors,
+            opacity,
+            H,
+            W,
+            background,
+            return_alpha=True,
+        )
+        assert out_img.shape == (num_views, H, W, channels)
+        v_img, v_alpha = torch.randn_like(out_img), torch.randn_like(out_alpha)
+        grads = torch.autograd.grad(
+            (out_img * v_img).sum() + (out_alpha * v_alpha).sum(), inputs
+        )
+
+        loss = 0.0
+        for i in range(num_views):
+            _out_img, _out_alpha = rasterize_gaussians(
+                xys[i],
+                depths[i],
+                radii[i],
+                conics[i],
+                num_tiles_hit[i],
+                colors,
+                opacity if shared_opacity else opacity[i],
+                H,
+                W,
+                background,
+                return_alpha=True,
+            )
+            torch.testing.assert_close(out_img[i], _out_img)
+            torch.testing.assert_close(out_alpha[i], _out_alpha)
+            loss = loss + (_out_img * v_img[i]).sum() + (_out_alpha * v_alpha[i]).sum()
+        _grads = torch.autograd.grad(loss, inputs)
+        for a, b in zip(grads, _grads):
+            # views are rendered shifted down, which rounds xys slightly differently
+            torch.testing.assert_close(a, b, atol=1e-4, rtol=1e-4)
+
+
+def test_rasterize_compact_cpu():
+    from gsplat import _torch_impl, compact_gaussians, rasterize_gaussians
+
+    torch.manual_seed(42)
+
+    num_points, H, W = 200, 32, 48
+    tile_bounds = (W + 15) // 16, (H + 15) // 16, 1
+    xys, conics, colors, opacities = _random_scene(num_points, H, W, "cpu")[5:]
+    xys[::2] -= 500.0  # half of the gaussians are off screen
+    depths = torch.rand(num_points) + 1
+    radii = torch.ceil(3 / conics[:, ::2].amin(dim=-1).sqrt()).to(torch.int32)
+    radii[1::4] = 0  # and some were culled by the projection
+    tile_min, tile_max = _torch_impl.get_tile_bbox(xys, radii, tile_bounds)
+    num_tiles_hit = torch.prod(tile_max - tile_min, dim=-1).to(torch.int32)
+    num_tiles_hit[radii <= 0] = 0
+
+    visible = compact_gaussians(num_tiles_hit)[0]
+    assert torch.equal(visible, torch.nonzero(num_tiles_hit > 0)[:, 0])
+    assert len(visible) < num_points // 2
+
+    inputs = tuple(a.requires_grad_() for a in (xys, conics, colors, opacities))
+    args = (depths, radii, conics, num_tiles_hit, colors, opacities, H, W)
+    outputs = [
+        rasterize_gaussians(xys, *args, return_alpha=True, compact=compact)
+        for compact in (False, True)
+    ]
+    for a, b in zip(*outputs):
+        torch.testing.assert_close(a, b)
+
+    v_img, v_alpha = torch.randn(H, W, 3), torch.randn(H, W)
+    grads, _grads = (
+        torch.autograd.grad((img * v_img).sum() + (alpha * v_alpha).sum(), inputs)
+        for img, alpha in outputs
+    )
+    for a, b in zip(grads, _grads):
+        assert a.shape == b.shape
+        torch.testing.assert_close(a, b)
+
+    # no gaussian hits a tile, as when they are all behind the camera
+    num_tiles_hit = torch.zeros_like(num_tiles_hit)
+    args = (depths, radii, conics, num_tiles_hit, colors, opacities, H, W)
+    outputs = [
+        rasterize_gaussians(xys, *args, return_alpha=True, compact=compact)
+        for compact in (False, True)
+    ]
+    for a, b in zip(*outputs):
+        torch.testing.assert_close(a, b)
+    torch.testing.assert_close(outputs[1][0], torch.ones(H, W, 3))
+    grads = torch.autograd.grad(outputs[1][0].sum(), inputs, allow_unused=True)
+    for grad, tensor in zip(grads, inputs):
+        assert grad is None or (grad.shape == tensor.shape and not grad.any())
+
+
+if __name__ == "__main__":
+    test_rasterize_forward_cpu()
+    test_rasterize_forward()
+    test_rasterize_backward_cpu()
+    test_rasterize_cpu_workers()
+    test_rasterize_batched_cpu()
+    test_rasterize_compact_cpu()
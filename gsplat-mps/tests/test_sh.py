@@ -1,3 +1,5 @@
+import math
+
 import pytest
 import torch
 
@@ -46,5 +48,81 @@ def test_sh():
     torch.testing.assert_close(check_colors, gt_colors)
 
 
+def test_sh_cpu(monkeypatch):
+    from gsplat import _torch_impl, sh
+    from gsplat.cpu import _torch_bindings
+    from gsplat.cpu._backend import load_extension
+
+    torch.manual_seed(42)
+
+    # several chunks, the last one partial
+    monkeypatch.setattr(_torch_bindings, "SH_CHUNK_SIZE", 64)
+    num_points, degree = 300, 4
+    viewdirs = torch.randn(num_points, 3)
+    coeffs = torch.randn(num_points, sh.num_sh_bases(degree), 3)
+    v_colors = torch.randn(num_points, 3)
+    bindings = [_torch_bindings]
+    if load_extension() is not None:
+        bindings.append(load_extension())
+
+    for degrees_to_use in range(degree + 1):
+        num_bases = sh.num_sh_bases(degrees_to_use)
+        inputs = coeffs.clone().requires_grad_()
+        check_colors = _torch_impl.compute_sh_color(
+            torch.nn.functional.normalize(viewdirs, dim=-1), inputs[:, :num_bases]
+        )
+        (check_grad,) = torch.autograd.grad(check_colors, inputs, v_colors)
+        assert torch.all(check_grad[:, num_bases:] == 0)
+
+        for _C in bindings:
+            args = (num_points, degree, degrees_to_use, viewdirs)
+            colors = _C.compute_sh_forward(*args, coeffs)
+            grad = _C.compute_sh_backward(*args, v_colors)
+            torch.testing.assert_close(colors, check_colors)
+            torch.testing.assert_close(grad, check_grad)
+
+
+def test_sh_color_cache():
+    from gsplat import SHColorCache, spherical_harmonics
+
+    torch.manual_seed(42)
+
+    num_points, degree = 2000, 3
+    means3d = torch.rand(num_points, 3) * 2 - 1
+    coeffs = torch.randn(num_points, 16, 3)
+
+    # exact colors are reused while the camera barely moves
+    cache = SHColorCache(tolerance=0.02)
+    # nearest gaussian about 2.3 away, so the camera may move by about 0.046,
+    # each camera with the one its colors are evaluated for
+    angles = [(0.0, 0.0), (0.002, 0.0), (0.005, 0.0), (0.02, 0.02), (0.021, 0.02)]
+    for i, (a, b) in enumerate(angles):
+        position, anchor = (
+            torch.tensor([4.0 * math.sin(x), 0.5, -4.0 * math.cos(x)]) for x in (a, b)
+        )
+        colors = cache(degree, means3d - position, coeffs, position)
+        assert cache.num_skipped == [0, 1, 2, 2, 3][i]
+        assert cache.num_hits == (num_points if i in (1, 2, 4) else 0)
+        torch.testing.assert_close(
+            colors, spherical_harmonics(degree, means3d - anchor, coeffs)
+        )
+
+    # other gaussians, or another degree, are evaluated again
+    ids = torch.arange(num_points)
+    viewdirs = means3d - position
+    cache(degree, viewdirs[:400], coeffs[:400], position, ids[:400])
+    assert cache.num_misses == 400
+    cache(degree, viewdirs[:400], coeffs[:400], position, ids[:400])
+    assert cache.num_hits == 400
+    colors = cache(degree, viewdirs[200:600], coeffs[200:600], position, ids[200:600])
+    assert cache.num_misses == 400
+    torch.testing.assert_close(
+        colors, spherical_harmonics(degree, viewdirs[200:600], coeffs[200:600])
+    )
+    cache(degree - 1, viewdirs[200:600], coeffs[200:600], position, ids[200:600])
+    assert cache.num_misses == 400
+
+
 if __name__ == "__main__":
     test_sh()
+    test_sh_color_cache()
@@ -0,0 +1,110 @@
+import math
+
+import torch
+
+
+def _camera(H, W, fov, position, target):
+    fx = fy = 0.5 * W / math.tan(0.5 * fov)
+    forward = torch.nn.functional.normalize(target - position, dim=0)
+    right = torch.nn.functional.normalize(
+        torch.linalg.cross(torch.tensor([0.0, 1.0, 0.0]), forward), dim=0
+    )
+    up = torch.linalg.cross(forward, right)
+    viewmat = torch.eye(4)
+    viewmat[:3, :3] = torch.stack([right, up, forward])
+    viewmat[:3, 3] = -viewmat[:3, :3] @ position
+    projmat = (
+        torch.tensor(
+            [
+                [2 * fx / W, 0.0, 0.0, 0.0],
+                [0.0, 2 * fy / H, 0.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+                [0.0, 0.0, 1.0, 0.0],
+            ]
+        )
+        @ viewmat
+    )
+    return viewmat, projmat, fx, fy
+
+
+def test_spatial_index_query():
+    from gsplat import SpatialIndex, project_gaussians
+
+    torch.manual_seed(42)
+
+    num_points, H, W = 5000, 48, 64
+    glob_scale = 0.5
+    tile_bounds = (W + 15) // 16, (H + 15) // 16, 1
+    means3d = torch.rand((num_points, 3)) * 20 - 10
+    scales = torch.rand((num_points, 3)) * 0.2
+    quats = torch.randn((num_points, 4))
+    index = SpatialIndex(means3d, scales, glob_scale)
+
+    cameras = [
+        _camera(H, W, 0.3, torch.tensor([0.0, 0.0, -15.0]), torch.zeros(3)),
+        _camera(
+            H, W, 1.5, torch.tensor([2.0, 1.0, -3.0]), torch.tensor([0.0, 2.0, 5.0])
+        ),
+    ]
+    for step in range(2):
+        if step > 0:
+            # gaussians moved since the index was built
+            means3d = means3d + torch.randn_like(means3d) * 0.5
+            scales = scales * 1.5
+            index.refit(means3d, scales, glob_scale)
+        for viewmat, projmat, fx, fy in cameras:
+            args = (glob_scale, quats, viewmat, projmat, fx, fy, W / 2, H / 2, H, W)
+            num_tiles_hit = project_gaussians(means3d, scales, *args, tile_bounds)[4]
+            ids = index.query(viewmat, fx, fy, W / 2, H / 2, H, W)
+
+            assert torch.all(ids[1:] > ids[:-1])
+            assert len(ids) < num_points
+            visible = torch.zeros(num_points, dtype=torch.bool)
+            visible[ids] = True
+            assert not torch.any((num_tiles_hit > 0) & ~visible)
+
+
+def test_morton_order():
+    from gsplat import morton_order, reorder_gaussians
+
+    torch.manual_seed(42)
+
+    # the corners of a cube, x is the most significant axis
+    corners = torch.tensor(
+        [[x, y, z] for z in (0.0, 1.0) for y in (0.0, 1.0) for x in (0.0, 1.0)]
+    )
+    order = morton_order(corners)
+    torch.testing.assert_close(
+        corners[order] @ torch.tensor([4.0, 2.0, 1.0]), torch.arange(8.0)
+    )
+
+    num_points = 4000
+    means3d = torch.rand((num_points, 3))
+    colors = torch.rand((num_points, 3), requires_grad=True)
+    optimizer = torch.optim.Adam([colors], lr=0.01)
+    colors.grad = torch.randn_like(colors)
+    optimizer.step()
+
+    params = means3d.clone(), colors.detach().clone()
+    state = {k: v.clone() for k, v in optimizer.state[colors].items()}
+    order = morton_order(means3d)
+    assert torch.equal(torch.sort(order).values, torch.arange(num_points))
+    reorder_gaussians(order, means3d, colors, optimizer=optimizer)
+
+    torch.testing.assert_close(means3d, params[0][order])
+    torch.testing.assert_close(colors.detach(), params[1][order])
+    for key, value in optimizer.state[colors].items():
+        expected = state[key][order] if value.dim() > 0 else state[key]
+        torch.testing.assert_close(value, expected)
+    assert optimizer.param_groups[0]["params"][0] is colors
+
+    # neighbours along the curve are much closer than neighbours in memory
+    def spacing(points):
+        return (points[1:] - points[:-1]).norm(dim=-1).mean()
+
+    assert spacing(means3d) < 0.2 * spacing(params[0])
+
+
+if __name__ == "__main__":
+    test_spatial_index_query()
+    test_morton_order()
@@ -0,0 +1,134 @@
+import os
+
+import pytest
+import torch
+
+
+def test_scene_store(tmp_path):
+    from gsplat import load_scene, morton_order, save_scene
+
+    torch.manual_seed(42)
+
+    num_points = 1000
+    tensors = {
+        "means3d": torch.randn((num_points, 3)),
+        "scales": torch.rand((num_points, 3)),
+        "quats": torch.randn((num_points, 4)),
+        "colors": torch.rand((num_points, 16, 3)).half(),
+        "opacities": torch.rand((num_points, 1)),
+        "color_ids": torch.randint(-(1 << 15), 1 << 15, (num_points,)).short(),
+        "flags": torch.rand(num_points) > 0.5,
+        "empty": torch.zeros((0, 3)),
+    }
+    path = str(tmp_path / "scene.gsplat")
+    save_scene(path, tensors)
+
+    scene = load_scene(path)
+    assert list(scene) == list(tensors)
+    for name, tensor in tensors.items():
+        assert scene[name].dtype == tensor.dtype
+        torch.testing.assert_close(scene[name], tensor)
+    # every column is a page aligned view of one mapping of the file
+    storage = scene["means3d"].untyped_storage()
+    for name in ("scales", "quats", "colors", "color_ids"):
+        assert scene[name].untyped_storage().data_ptr() == storage.data_ptr()
+        assert scene[name].data_ptr() % 4096 == 0
+
+    # writes stay in the process
+    scene["means3d"].zero_()
+    torch.testing.assert_close(load_scene(path)["means3d"], tensors["means3d"])
+
+    # stored in Morton order, tensors without a row per gaussian left alone
+    order = morton_order(tensors["means3d"])
+    save_scene(path, tensors, reorder=True)
+    scene = load_scene(path)
+    for name, tensor in tensors.items():
+        if name != "empty":
+            tensor = tensor[order]
+        torch.testing.assert_close(scene[name], tensor)
+
+    with open(path, "r+b") as f:
+        f.write(b"NOTASCENE")
+    with pytest.raises(ValueError):
+        load_scene(path)
+
+
+def test_gaussian_sequence(tmp_path):
+    from gsplat import GaussianSequence, load_scene, morton_order, save_sequence
+
+    torch.manual_seed(42)
+
+    # a static scene with a few moving gaussians
+    num_points, num_frames = 2000, 11
+    means3d = torch.randn((num_points, 3))
+    colors = torch.rand((num_points, 3))
+    moving = torch.arange(50)
+    frames = []
+    for t in range(num_frames):
+        means3d = means3d.clone()
+        # frame 6 does not move
+        if t != 6:
+            means3d[moving] += 0.01 * torch.randn((len(moving), 3))
+        frames.append(
+            {"means3d": means3d, "colors": colors, "ids": torch.arange(num_points)}
+        )
+
+    path = str(tmp_path / "sequence.gsplat")
+    sizes = []
+
+    def stream():
+        for frame in frames:
+            yield frame
+            sizes.append(os.path.getsize(path))
+
+    # each frame is written before the next one is asked for
+    save_sequence(path, stream(), keyframe_interval=4)
+    assert sizes[0] > 4096 and sizes == sorted(sizes)
+    # all but the static frame grow the file
+    assert len(set(sizes)) == num_frames - 1
+    tensors = load_scene(path)
+    assert len(tensors["1/means3d/ids"]) == len(moving)
+    assert len(tensors["1/colors/ids"]) == 0
+    assert len(tensors["6/means3d/ids"]) == 0
+    assert "4/means3d" in tensors and "5/means3d" not in tensors
+    # the deltas of a frame share one page
+    pointers = [tensors[f"1/means3d/{key}"].data_ptr() for key in ("ids", "values")]
+    assert pointers[0] % 4096 == 0 and pointers[1] - pointers[0] < 4096
+
+    sequence = GaussianSequence(path)
+    assert len(sequence) == num_frames
+    # playback, then seeks back and forth
+    for t in list(range(num_frames)) + [9, 2, 3, 10, 0, 6]:
+        frame = sequence.frame(t)
+        assert list(frame) == list(frames[t])
+        for name, tensor in frames[t].items():
+            assert torch.equal(frame[name], tensor)
+    with pytest.raises(IndexError):
+        sequence.frame(num_frames)
+
+    # every frame in the Morton order of the first one, with the same deltas
+    order = morton_order(frames[0]["means3d"])
+    save_sequence(path, frames, keyframe_interval=4, reorder=True)
+    assert len(load_scene(path)["1/means3d/ids"]) == len(moving)
+    sequence = GaussianSequence(path)
+    for t in range(num_frames):
+        frame = sequence.frame(t)
+        for name, tensor in frames[t].items():
+            assert torch.equal(frame[name], tensor[order])
+
+    # small changes are dropped without drifting from the frames
+    save_sequence(path, frames, keyframe_interval=100, tolerance=0.02)
+    sequence = GaussianSequence(path)
+    assert len(load_scene(path)["1/means3d/ids"]) < len(moving)
+    for t in range(num_frames):
+        error = (sequence.frame(t)["means3d"] - frames[t]["means3d"]).abs()
+        assert error.max() <= 0.02
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_scene_store(Path(tmp_dir))
+        test_gaussian_sequence(Path(tmp_dir))